@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from accounts import throttle
+
+
+HASHERS = ["argon2", "scrypt", "pbkdf2_sha256"]
+
+
+class Command(BaseCommand):
+    help = "Measure password checks per second on one core for each hasher, and the throttled rejection path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=3.0, help="Time spent on each hasher")
+        parser.add_argument("--hashers", nargs="+", default=HASHERS, choices=HASHERS)
+
+    def handle(self, *args, **options):
+        preferred = get_hasher("default").algorithm
+        self.stdout.write(f"Configured hasher: {preferred}")
+        for algorithm in options["hashers"]:
+            try:
+                hasher = get_hasher(algorithm)
+                encoded = make_password("correct horse battery staple", hasher=algorithm)
+            except ValueError:
+                self.stdout.write(f"{algorithm:>14}: not available")
+                continue
+            count, elapsed = self._run(lambda: hasher.verify("correct horse battery staple", encoded), options["seconds"])
+            self.stdout.write(f"{algorithm:>14}: {count / elapsed:8.1f} logins/s per core ({elapsed / count * 1000:.1f} ms each)")
+
+        # A throttled attempt costs only the cache reads in front of the form
+        limiter = throttle.SlidingWindowLimiter("login_username")
+        with override_settings(AUTH_THROTTLE={**getattr(settings, "AUTH_THROTTLE", {}), "login_username": (1, 300)}):
+            limiter.hit("bench-user")
+            count, elapsed = self._run(lambda: limiter.blocked("bench-user"), min(options["seconds"], 1.0))
+            limiter.reset("bench-user")
+        self.stdout.write(f"{'throttled':>14}: {count / elapsed:8.0f} rejections/s per core")
+
+    def _run(self, fn, seconds):
+        count = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while True:
+            fn()
+            count += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                return count, now - started
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_latest_default(apps, schema_editor):
+    """Leave only each user's most recently updated default before adding the constraint."""
+    Address = apps.get_model('accounts', 'Address')
+    seen = set()
+    stale = []
+    for pk, user_id in Address.objects.filter(is_default=True).order_by('user_id', '-updated_at', '-pk').values_list('pk', 'user_id'):
+        if user_id in seen:
+            stale.append(pk)
+        seen.add(user_id)
+    Address.objects.filter(pk__in=stale).update(is_default=False)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_default, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='address',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('user',), name='address_one_default_per_user'),
+        ),
+    ]
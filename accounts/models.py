@@ -19,6 +19,11 @@ class Address(models.Model):
     class Meta:
         verbose_name_plural = 'Addresses'
         ordering = ['-is_default', '-updated_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(is_default=True), name='address_one_default_per_user',
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.full_name} — {self.city} {self.postal_code}"
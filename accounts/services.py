@@ -0,0 +1,65 @@
+"""Address book writes and the cached "has an address" flag used at checkout."""
+from django.core.cache import cache
+from django.db import transaction
+
+from core.db import serialized_write
+from .models import Address
+
+
+HAS_ADDRESS_TIMEOUT = 60 * 60 * 24
+
+
+def _has_address_key(user_id) -> str:
+    return f'accounts:has_address:{user_id}'
+
+
+def has_address(user) -> bool:
+    """Whether the user has saved an address; cached per user, invalidated by Address signals.
+
+    Only a True result is cached. A cached False would keep a shopper who opened
+    checkout before adding an address bounced to their profile until the entry
+    expired, whenever the invalidation didn't reach this cache.
+    """
+    key = _has_address_key(user.pk)
+    if cache.get(key):
+        return True
+    if not Address.objects.filter(user=user).exists():
+        return False
+    cache.set(key, True, HAS_ADDRESS_TIMEOUT)
+    return True
+
+
+def forget_has_address(user_id) -> None:
+    cache.delete(_has_address_key(user_id))
+
+
+def _clear_default(user, keep_id=None) -> None:
+    # Touches at most the one current default row (the partial unique index
+    # allows no more), and none when keep_id already is the default
+    stale = Address.objects.filter(user=user, is_default=True)
+    if keep_id is not None:
+        stale = stale.exclude(pk=keep_id)
+    stale.update(is_default=False)
+
+
+def create_address(user, *, is_default=False, **fields) -> Address:
+    with serialized_write():
+        if is_default:
+            _clear_default(user)
+        return Address.objects.create(user=user, is_default=is_default, **fields)
+
+
+def set_default_address(user, address_id) -> bool:
+    """Make address_id the user's default; False if it isn't one of their addresses.
+
+    The partial unique constraint on (user) where is_default guarantees a single
+    default. SQLite checks it row by row during an UPDATE, so the switch is the
+    old default's conditional clear followed by the new row's set, both inside
+    one serialized transaction; no other writer can observe the state between.
+    """
+    with serialized_write():
+        _clear_default(user, keep_id=address_id)
+        if not Address.objects.filter(pk=address_id, user=user).update(is_default=True):
+            transaction.set_rollback(True)
+            return False
+    return True
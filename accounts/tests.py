@@ -1,3 +1,140 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from core.models import User
+from .models import Address
+from . import services, throttle
+
+
+def _address_fields(n):
+    return {
+        'full_name': f'Shopper {n}', 'phone_number': '9999999999', 'line1': f'{n} Spice Street',
+        'city': 'Kochi', 'state': 'Kerala', 'postal_code': '682001',
+    }
+
+
+class AddressServiceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='shopper', password='x')
+        self.addresses = [services.create_address(self.user, **_address_fields(n)) for n in range(3)]
+
+    def defaults(self):
+        return list(Address.objects.filter(user=self.user, is_default=True).values_list('pk', flat=True))
+
+    def test_switching_default_leaves_exactly_one(self):
+        for address in self.addresses + self.addresses[::-1]:
+            self.assertTrue(services.set_default_address(self.user, address.pk))
+            self.assertEqual(self.defaults(), [address.pk])
+
+    def test_new_default_address_replaces_the_old_one(self):
+        services.set_default_address(self.user, self.addresses[0].pk)
+        added = services.create_address(self.user, is_default=True, **_address_fields(9))
+        self.assertEqual(self.defaults(), [added.pk])
+
+    def test_foreign_address_is_rejected_without_clearing_the_default(self):
+        services.set_default_address(self.user, self.addresses[0].pk)
+        other = User.objects.create_user(username='other', password='x')
+        foreign = services.create_address(other, **_address_fields(5))
+        self.assertFalse(services.set_default_address(self.user, foreign.pk))
+        self.assertEqual(self.defaults(), [self.addresses[0].pk])
+
+    def test_constraint_rejects_a_second_default(self):
+        services.set_default_address(self.user, self.addresses[0].pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Address.objects.filter(pk=self.addresses[1].pk).update(is_default=True)
+
+    def test_has_address_flag_follows_saves_and_deletes(self):
+        other = User.objects.create_user(username='new', password='x')
+        self.assertFalse(services.has_address(other))
+        address = services.create_address(other, **_address_fields(1))
+        self.assertTrue(services.has_address(other))
+        # Served from the shared cache; the database cache backend makes that one lookup
+        with self.assertNumQueries(1):
+            self.assertTrue(services.has_address(other))
+        address.delete()
+        self.assertFalse(services.has_address(other))
+
+    def test_a_missing_address_is_never_cached(self):
+        other = User.objects.create_user(username='late', password='x')
+        self.assertFalse(services.has_address(other))
+        # Written without the post_save signal, as if the invalidation never reached this cache
+        Address.objects.bulk_create([Address(user=other, **_address_fields(1))])
+        self.assertTrue(services.has_address(other))
+
+
+@override_settings(AUTH_THROTTLE={'login_ip': (5, 300), 'login_username': (3, 300), 'signup_ip': (10, 3600)})
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Mid-window, so no test straddles a window boundary and sees its hits discounted
+        clock = mock.patch.object(throttle, '_now', return_value=1_800_000_150.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.user = User.objects.create_user(username='shopper', password='right-password')
+
+    def login(self, username='shopper', password='wrong', ip='10.0.0.1', **headers):
+        return self.client.post(
+            '/accounts/login/', {'username': username, 'password': password}, REMOTE_ADDR=ip, **headers,
+        )
+
+    def test_username_is_locked_out_before_hashing(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 200)
+        with mock.patch('django.contrib.auth.backends.ModelBackend.authenticate') as authenticate:
+            response = self.login(password='right-password', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        authenticate.assert_not_called()
+
+    def test_ip_limit_spans_usernames(self):
+        for n in range(5):
+            self.login(username=f'guess-{n}')
+        self.assertEqual(self.login(username='someone-else').status_code, 429)
+        self.assertEqual(self.login(username='someone-else', ip='10.0.0.9').status_code, 200)
+
+    def test_success_clears_the_username_window(self):
+        self.login()
+        self.login()
+        self.assertEqual(self.login(password='right-password').status_code, 302)
+        self.client.logout()
+        for _ in range(2):
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        self.user.password = make_password('right-password', hasher='pbkdf2_sha256')
+        self.user.save(update_fields=['password'])
+        self.assertEqual(self.login(password='right-password').status_code, 302)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.password.startswith('pbkdf2_sha256$'))
+
+    @override_settings(TRUSTED_PROXIES=['10.0.0.1'], CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_shoppers_behind_the_proxy_get_their_own_ip_bucket(self):
+        for n in range(5):
+            self.login(username=f'guess-{n}', HTTP_X_FORWARDED_FOR='203.0.113.5')
+        self.assertEqual(self.login(username='x', HTTP_X_FORWARDED_FOR='203.0.113.5').status_code, 429)
+        self.assertEqual(self.login(username='x', HTTP_X_FORWARDED_FOR='198.51.100.7').status_code, 200)
+
+
+@override_settings(TRUSTED_PROXIES=['127.0.0.1', '10.1.0.0/16'], CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+class ClientIpTests(SimpleTestCase):
+    def ip(self, remote, forwarded=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded is not None else {}
+        return throttle.client_ip(RequestFactory().get('/', REMOTE_ADDR=remote, **extra))
+
+    def test_header_is_read_only_from_a_trusted_proxy(self):
+        self.assertEqual(self.ip('127.0.0.1', '203.0.113.5'), '203.0.113.5')
+        self.assertEqual(self.ip('198.51.100.7', '203.0.113.5'), '198.51.100.7')
+
+    def test_spoofed_hops_left_of_the_proxies_are_ignored(self):
+        self.assertEqual(self.ip('127.0.0.1', '1.2.3.4, 203.0.113.5, 10.1.4.2'), '203.0.113.5')
+
+    def test_missing_header_falls_back_to_the_peer(self):
+        self.assertEqual(self.ip('127.0.0.1'), '127.0.0.1')
+
+    @override_settings(TRUSTED_PROXIES=[])
+    def test_no_trusted_proxies_means_remote_addr(self):
+        self.assertEqual(self.ip('127.0.0.1', '203.0.113.5'), '127.0.0.1')
@@ -0,0 +1,116 @@
+"""Cache-backed sliding-window limits on login and signup attempts.
+
+Each key keeps a counter per fixed window; the sliding count weights the
+previous window by how much of it still overlaps the last `period` seconds.
+That costs two cache reads per check and one increment per hit, no matter how
+many attempts are made.
+
+Counters live in the shared default cache, so a limit holds across all
+workers rather than once per worker. Redis increments atomically. The
+database cache's incr() is a read and a write, so a burst of concurrent hits
+can undercount by a few.
+"""
+import hashlib
+import ipaddress
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+DEFAULTS = {
+    # scope: (attempts, period in seconds)
+    'login_ip': (30, 300),
+    'login_username': (10, 300),
+    'signup_ip': (10, 3600),
+}
+
+
+def _now() -> float:
+    return time.time()
+
+
+class SlidingWindowLimiter:
+    def __init__(self, scope: str):
+        self.scope = scope
+
+    @property
+    def limit(self) -> int:
+        return getattr(settings, 'AUTH_THROTTLE', {}).get(self.scope, DEFAULTS[self.scope])[0]
+
+    @property
+    def period(self) -> int:
+        return getattr(settings, 'AUTH_THROTTLE', {}).get(self.scope, DEFAULTS[self.scope])[1]
+
+    def _keys(self, ident: str, now: float):
+        digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+        window = int(now // self.period)
+        base = f'auth:throttle:{self.scope}:{digest}'
+        return f'{base}:{window}', f'{base}:{window - 1}', window
+
+    def count(self, ident: str, now=None) -> float:
+        now = _now() if now is None else now
+        current_key, previous_key, window = self._keys(ident, now)
+        counts = cache.get_many([current_key, previous_key])
+        overlap = 1 - (now - window * self.period) / self.period
+        return counts.get(current_key, 0) + counts.get(previous_key, 0) * overlap
+
+    def blocked(self, ident: str, now=None) -> bool:
+        return bool(ident) and self.count(ident, now) >= self.limit
+
+    def retry_after(self, ident: str, now=None) -> int:
+        """Seconds until the oldest counted window stops mattering (an upper bound)."""
+        now = _now() if now is None else now
+        return max(1, math.ceil(self.period - now % self.period))
+
+    def hit(self, ident: str, now=None) -> None:
+        if not ident:
+            return
+        now = _now() if now is None else now
+        current_key, _, _ = self._keys(ident, now)
+        # add() then incr() keeps the increment atomic on backends that support it
+        cache.add(current_key, 0, self.period * 2)
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, self.period * 2)
+
+    def reset(self, ident: str, now=None) -> None:
+        now = _now() if now is None else now
+        current_key, previous_key, _ = self._keys(ident, now)
+        cache.delete_many([current_key, previous_key])
+
+
+login_ip = SlidingWindowLimiter('login_ip')
+login_username = SlidingWindowLimiter('login_username')
+signup_ip = SlidingWindowLimiter('signup_ip')
+
+
+def _trusted(address: str, proxies) -> bool:
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def client_ip(request) -> str:
+    """The shopper's address, for the per-IP limits.
+
+    Behind a reverse proxy REMOTE_ADDR is the proxy, which would put every
+    shopper in one bucket. When REMOTE_ADDR is in TRUSTED_PROXIES the address is
+    read from CLIENT_IP_HEADER instead. For a comma-separated header like
+    X-Forwarded-For that is the right-most hop not added by a trusted proxy; the
+    hops left of it are whatever the client chose to send.
+    """
+    remote = request.META.get('REMOTE_ADDR', '')
+    header = getattr(settings, 'CLIENT_IP_HEADER', '')
+    proxies = getattr(settings, 'TRUSTED_PROXIES', ())
+    if not header or not _trusted(remote, proxies):
+        return remote
+    hops = [hop.strip() for hop in request.META.get(header, '').split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, proxies):
+            return hop
+    return remote
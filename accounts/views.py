@@ -11,15 +11,27 @@ from django.views.decorators.csrf import csrf_exempt
 
 from .forms import CustomUserCreationForm
 from .models import Address
+from . import services, throttle
 
 User = get_user_model()
 
 
+def _throttled(request, template, form, retry_after):
+    messages.error(request, 'Too many attempts. Please wait a few minutes and try again.')
+    response = render(request, template, {'form': form}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 class SignupView(View):
     def get(self, request):
         return render(request, 'accounts/signup.html', {'form': CustomUserCreationForm()})
 
     def post(self, request):
+        ip = throttle.client_ip(request)
+        if throttle.signup_ip.blocked(ip):
+            return _throttled(request, 'accounts/signup.html', CustomUserCreationForm(), throttle.signup_ip.retry_after(ip))
+        throttle.signup_ip.hit(ip)
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
             user = form.save()
@@ -33,16 +45,28 @@ class LoginView(View):
         return render(request, 'accounts/login.html', {'form': AuthenticationForm()})
 
     def post(self, request):
+        # Checked before the form runs authenticate(), so rejected attempts never hash
+        ip = throttle.client_ip(request)
+        username = (request.POST.get('username') or '').strip().lower()
+        for limiter, ident in ((throttle.login_ip, ip), (throttle.login_username, username)):
+            if limiter.blocked(ident):
+                return _throttled(request, 'accounts/login.html', AuthenticationForm(), limiter.retry_after(ident))
+
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
+            throttle.login_username.reset(username)
             auth_login(request, form.get_user())
             return redirect('accounts:profile')
+        throttle.login_ip.hit(ip)
+        throttle.login_username.hit(username)
         return render(request, 'accounts/login.html', {'form': form})
 
 
 @login_required
 def profile(request):
-    return render(request, 'accounts/profile.html')
+    # Evaluated once here rather than by each request.user.addresses.all in the template
+    addresses = list(Address.objects.filter(user=request.user))
+    return render(request, 'accounts/profile.html', {'addresses': addresses})
 
 
 def logout_view(request):
@@ -57,9 +81,8 @@ def logout_view(request):
 def add_address(request):
     """Add a new address for the user"""
     if request.method == 'POST':
-        # Create new address
-        address = Address.objects.create(
-            user=request.user,
+        services.create_address(
+            request.user,
             full_name=request.POST.get('full_name'),
             phone_number=request.POST.get('phone_number'),
             line1=request.POST.get('line1'),
@@ -68,13 +91,8 @@ def add_address(request):
             state=request.POST.get('state'),
             postal_code=request.POST.get('postal_code'),
             country=request.POST.get('country', 'IN'),
-            is_default=request.POST.get('is_default') == 'on'
+            is_default=request.POST.get('is_default') == 'on',
         )
-        
-        # If this is set as default, unset others
-        if address.is_default:
-            Address.objects.filter(user=request.user).exclude(id=address.id).update(is_default=False)
-        
         messages.success(request, 'Address added successfully!')
         return redirect('accounts:profile')
     
@@ -85,15 +103,8 @@ def add_address(request):
 @require_POST
 def set_default_address(request, address_id):
     """Set an address as default"""
-    address = get_object_or_404(Address, id=address_id, user=request.user)
-    
-    # Unset all other default addresses
-    Address.objects.filter(user=request.user).update(is_default=False)
-    
-    # Set this address as default
-    address.is_default = True
-    address.save()
-    
+    if not services.set_default_address(request.user, address_id):
+        return JsonResponse({'success': False, 'error': 'Address not found'}, status=404)
     return JsonResponse({'success': True})
 
 
@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Rollups are written by checkout and backfill_sales_rollups only."""
+
+    date_hierarchy = "day"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(RollupAdmin):
+    list_display = ("day", "orders", "units", "revenue", "discount")
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(RollupAdmin):
+    list_display = ("day", "product_name", "category_name", "orders", "units", "revenue", "discount")
+    search_fields = ("product_name",)
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(RollupAdmin):
+    list_display = ("day", "category_name", "orders", "units", "revenue", "discount")
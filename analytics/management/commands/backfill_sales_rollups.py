@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in missing daily sales rollups from the orders still stored in sessions, a batch of "
+        "sessions at a time. Existing rows are kept unless --replace is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--since", required=True, help="Only rebuild days on or after this ISO date")
+        parser.add_argument(
+            "--replace", action="store_true",
+            help="Recompute existing rows from the stored orders alone, dropping anything counted "
+                 "from sessions that have since been flushed",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            since = date.fromisoformat(options["since"])
+        except ValueError:
+            raise CommandError("--since must be an ISO date (YYYY-MM-DD)")
+        written = rebuild_rollups(since, batch_size=options["batch_size"], replace=options["replace"])
+        orders = written.pop("orders")
+        summary = ", ".join(f"{count} {name}" for name, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {orders} orders into {summary}"))
@@ -0,0 +1,69 @@
+from django.db import models
+
+from catalog.models import Category, Product
+
+
+# Rollups outlive the catalog rows they describe: no FK constraint, names copied at sale time
+_HISTORICAL = dict(on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+
+
+class SalesTotals(models.Model):
+    """Counters shared by every rollup table."""
+
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # MRP minus the price paid, times units
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesTotals):
+    day = models.DateField(unique=True)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'Daily sales'
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.revenue}"
+
+
+class DailyProductSales(SalesTotals):
+    day = models.DateField()
+    product = models.ForeignKey(Product, **_HISTORICAL)
+    product_name = models.CharField(max_length=200)
+    # Unknown when the product was deleted before a backfill
+    category = models.ForeignKey(Category, null=True, **_HISTORICAL)
+    category_name = models.CharField(max_length=120)
+
+    class Meta:
+        ordering = ['-day', '-revenue']
+        verbose_name_plural = 'Daily product sales'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='daily_product_sales_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day'], name='daily_product_sales_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.product_name}: {self.units}"
+
+
+class DailyCategorySales(SalesTotals):
+    day = models.DateField()
+    category = models.ForeignKey(Category, **_HISTORICAL)
+    category_name = models.CharField(max_length=120)
+
+    class Meta:
+        ordering = ['-day', '-revenue']
+        verbose_name_plural = 'Daily category sales'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='daily_category_sales_unique'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.category_name}: {self.units}"
@@ -0,0 +1,64 @@
+"""Report queries for the sales dashboard and CSV export; they read only the rollup tables."""
+from datetime import date, timedelta
+
+from django.db.models import Max, Sum
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+
+DEFAULT_DAYS = 30
+
+_TOTALS = {name: Sum(name) for name in ('orders', 'units', 'revenue', 'discount')}
+
+
+def date_range(params):
+    """(start, end) from ?start=&end= (ISO dates, inclusive); the last DEFAULT_DAYS days otherwise."""
+    def parse(name):
+        try:
+            return date.fromisoformat(params.get(name) or '')
+        except ValueError:
+            return None
+
+    end = parse('end') or date.today()
+    start = parse('start') or end - timedelta(days=DEFAULT_DAYS - 1)
+    if start > end:
+        start, end = end, start
+    return start, end
+
+
+def daily_rows(start, end):
+    return (
+        DailySales.objects.filter(day__range=(start, end))
+        .order_by('day')
+        .values('day', 'orders', 'units', 'revenue', 'discount')
+    )
+
+
+def product_rows(start, end):
+    return (
+        DailyProductSales.objects.filter(day__range=(start, end))
+        .values('product_id')
+        .annotate(product_name=Max('product_name'), category_name=Max('category_name'), **_TOTALS)
+        .order_by('-revenue', 'product_id')
+    )
+
+
+def category_rows(start, end):
+    return (
+        DailyCategorySales.objects.filter(day__range=(start, end))
+        .values('category_id')
+        .annotate(category_name=Max('category_name'), **_TOTALS)
+        .order_by('-revenue', 'category_id')
+    )
+
+
+def totals(start, end) -> dict:
+    return DailySales.objects.filter(day__range=(start, end)).aggregate(**_TOTALS)
+
+
+# report name: (rows, CSV columns)
+REPORTS = {
+    'daily': (daily_rows, ['day', 'orders', 'units', 'revenue', 'discount']),
+    'products': (product_rows, ['product_id', 'product_name', 'category_name', 'orders', 'units', 'revenue', 'discount']),
+    'categories': (category_rows, ['category_id', 'category_name', 'orders', 'units', 'revenue', 'discount']),
+}
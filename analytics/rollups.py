@@ -0,0 +1,196 @@
+"""Daily sales rollups, kept current at checkout and rebuildable from stored orders.
+
+Orders live in the buyer's session (see cart.session_keys.ORDERS_KEY), so reporting
+straight from them would decode every session on each page load. payment() adds
+each order to three small tables instead (per day, per day and product, per day
+and category) and the staff dashboard reads only those.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db.models import F, Q
+
+from cart.session_keys import ORDERS_KEY
+from catalog.models import Product
+from core.db import serialized_write
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+
+CENT = Decimal('0.01')
+COUNTERS = ('orders', 'units', 'revenue', 'discount')
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _counters(**names):
+    return dict(names, orders=0, units=0, revenue=Decimal('0.00'), discount=Decimal('0.00'))
+
+
+def _catalog(product_ids=None):
+    """{product_id: (name, category_id, category_name, mrp)} for the given products (all if None)."""
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    rows = products.values_list('id', 'name', 'category_id', 'category__name', 'mrp')
+    return {pk: rest for pk, *rest in rows.iterator(chunk_size=2000)}
+
+
+class Rollup:
+    """In-memory rollup rows for a set of orders, keyed like the tables."""
+
+    def __init__(self):
+        self.days = {}
+        self.products = {}
+        self.categories = {}
+
+    def add(self, order, catalog) -> None:
+        day = date.fromisoformat(str(order['ordered_at'])[:10])
+        day_row = self.days.setdefault(day, _counters())
+        day_row['orders'] += 1
+        seen_products, seen_categories = set(), set()
+        for item in order.get('items') or []:
+            units = int(item.get('quantity') or 0)
+            if units <= 0:
+                continue
+            product_id = item['product_id']
+            name, category_id, category_name, current_mrp = catalog.get(
+                product_id, (item.get('name', ''), None, '', None),
+            )
+            price = _money(item.get('price'))
+            revenue = _money(item.get('line_total', price * units))
+            # Orders placed before items carried an MRP fall back to today's MRP
+            mrp = _money(item.get('mrp') or current_mrp or price)
+            discount = max(mrp - price, Decimal('0.00')) * units
+
+            rows = [day_row, self.products.setdefault((day, product_id), _counters(
+                product_name=item.get('name') or name, category_id=category_id, category_name=category_name or '',
+            ))]
+            if product_id not in seen_products:
+                seen_products.add(product_id)
+                rows[1]['orders'] += 1
+            if category_id is not None:
+                rows.append(self.categories.setdefault(
+                    (day, category_id), _counters(category_name=category_name),
+                ))
+                if category_id not in seen_categories:
+                    seen_categories.add(category_id)
+                    rows[2]['orders'] += 1
+            for row in rows:
+                row['units'] += units
+                row['revenue'] += revenue
+                row['discount'] += discount
+
+    def tables(self):
+        """(model, {lookup: row}) for each rollup table."""
+        return [
+            (DailySales, {(('day', day),): row for day, row in self.days.items()}),
+            (DailyProductSales, {
+                (('day', day), ('product_id', pk)): row for (day, pk), row in self.products.items()
+            }),
+            (DailyCategorySales, {
+                (('day', day), ('category_id', pk)): row for (day, pk), row in self.categories.items()
+            }),
+        ]
+
+
+def record_order(order) -> None:
+    """Add one just-placed order to the rollups.
+
+    Call inside the checkout's serialized_write() block so the increments commit
+    with the stock changes, and no other writer can create the same row between
+    the UPDATE and the INSERT.
+    """
+    rollup = Rollup()
+    rollup.add(order, _catalog({item['product_id'] for item in order.get('items') or []}))
+    for model, rows in rollup.tables():
+        for lookup, row in rows.items():
+            lookup = dict(lookup)
+            increments = {name: F(name) + row[name] for name in COUNTERS}
+            if not model.objects.filter(**lookup).update(**increments):
+                model.objects.create(**lookup, **row)
+
+
+def stored_orders(batch_size: int = 500):
+    """Every order in the session table, read batch_size sessions at a time."""
+    store = SessionStore()
+    sessions = Session.objects.order_by('session_key').values_list('session_key', 'session_data')
+    last_key = ''
+    while True:
+        batch = list(sessions.filter(session_key__gt=last_key)[:batch_size])
+        if not batch:
+            return
+        last_key = batch[-1][0]
+        for _, data in batch:
+            yield from store.decode(data).get(ORDERS_KEY) or []
+
+
+def _covered(model, lookups):
+    """The rows of model matching any of the given lookups, one filter per day."""
+    by_day = {}
+    for lookup in lookups:
+        lookup = dict(lookup)
+        day = lookup.pop('day')
+        by_day.setdefault(day, []).extend(lookup.values())
+    if not by_day:
+        return model.objects.none()
+    if model is DailySales:
+        return model.objects.filter(day__in=by_day)
+    field = 'product_id' if model is DailyProductSales else 'category_id'
+    query = Q()
+    for day, ids in by_day.items():
+        query |= Q(day=day, **{f'{field}__in': ids})
+    return model.objects.filter(query)
+
+
+def _existing(model, lookups) -> set:
+    """The lookups (as in Rollup.tables) that already have a row in model."""
+    if not lookups:
+        return set()
+    names = [name for name, _ in next(iter(lookups))]
+    return {
+        tuple(zip(names, values)) for values in _covered(model, lookups).values_list(*names).iterator()
+    }
+
+
+def rebuild_rollups(since: date, batch_size: int = 500, replace: bool = False) -> dict:
+    """Fill in rollup rows from the orders stored since `since`; returns rows written per table.
+
+    Logging out or session expiry deletes a session's orders, so the stored
+    orders are only part of the history record_order() already counted. By
+    default only rows that are missing are inserted and existing rows are never
+    touched. With replace, every day, day/product and day/category row that a
+    stored order falls in is recomputed from the stored orders alone, which
+    drops anything counted from sessions that are gone; use it only to repair
+    days whose sessions are known to be intact.
+
+    Sessions are read and rows written under one serialized_write(), so an
+    order placed mid-run is either in the sessions read or not yet counted,
+    never counted and then overwritten. Only the aggregates are kept, so memory
+    grows with days × products sold rather than with order history.
+    """
+    written = {}
+    orders = 0
+    with serialized_write():
+        rollup = Rollup()
+        catalog = _catalog()
+        for order in stored_orders(batch_size):
+            if str(order.get('ordered_at', ''))[:10] < since.isoformat():
+                continue
+            rollup.add(order, catalog)
+            orders += 1
+
+        for model, rows in rollup.tables():
+            if replace:
+                _covered(model, rows).delete()
+            else:
+                existing = _existing(model, rows)
+                rows = {lookup: row for lookup, row in rows.items() if lookup not in existing}
+            objects = [model(**dict(lookup), **row) for lookup, row in rows.items()]
+            model.objects.bulk_create(objects, batch_size=batch_size)
+            written[model._meta.verbose_name_plural] = len(objects)
+    written['orders'] = orders
+    return written
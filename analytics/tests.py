@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Address
+from catalog.models import Category, Product
+from core.models import User
+from .models import DailyCategorySales, DailyProductSales, DailySales
+from .rollups import rebuild_rollups
+
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', password='x')
+        Address.objects.create(
+            user=cls.user, full_name='Buyer', phone_number='9999999999', line1='1 Spice Street',
+            city='Kochi', state='Kerala', postal_code='682001',
+        )
+        category = Category.objects.first()
+        cls.saffron = Product.objects.create(
+            name='Saffron', slug='saffron-rollup', category=category, mrp=500, sale_price=400, stock_quantity=10,
+        )
+        cls.pepper = Product.objects.create(
+            name='Pepper', slug='pepper-rollup', category=category, mrp=100, stock_quantity=10,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _checkout(self, cart):
+        session = self.client.session
+        session['cart_items'] = cart
+        session.save()
+        response = self.client.post('/cart/payment/', {
+            'card_number': '4111111111111111', 'expiry': '12/99', 'cvv': '123',
+        })
+        self.assertRedirects(response, '/cart/orders/', fetch_redirect_response=False)
+
+    def test_checkout_updates_rollups(self):
+        self._checkout({str(self.saffron.pk): 2, str(self.pepper.pk): 1})
+        self._checkout({str(self.saffron.pk): 1})
+
+        day = DailySales.objects.get()
+        self.assertEqual((day.orders, day.units), (2, 4))
+        self.assertEqual(day.revenue, Decimal('1300.00'))
+        self.assertEqual(day.discount, Decimal('300.00'))
+
+        saffron = DailyProductSales.objects.get(product=self.saffron)
+        self.assertEqual((saffron.orders, saffron.units, saffron.revenue), (2, 3, Decimal('1200.00')))
+        category = DailyCategorySales.objects.get()
+        self.assertEqual((category.orders, category.units), (2, 4))
+
+    def test_backfill_matches_incremental_rollups(self):
+        self._checkout({str(self.saffron.pk): 2, str(self.pepper.pk): 1})
+        self._checkout({str(self.pepper.pk): 3})
+
+        def snapshot():
+            return [
+                list(model.objects.order_by('pk').values_list('day', 'orders', 'units', 'revenue', 'discount'))
+                for model in (DailySales, DailyProductSales, DailyCategorySales)
+            ]
+
+        before = snapshot()
+        written = rebuild_rollups(date.min, batch_size=1, replace=True)
+        self.assertEqual(written['orders'], 2)
+        self.assertEqual(sorted(map(sorted, snapshot())), sorted(map(sorted, before)))
+
+        for model in (DailySales, DailyProductSales, DailyCategorySales):
+            model.objects.all().delete()
+        rebuild_rollups(date.min)
+        self.assertEqual(sorted(map(sorted, snapshot())), sorted(map(sorted, before)))
+
+    def test_rebuild_keeps_rows_it_cannot_recompute(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        DailySales.objects.create(day=yesterday, orders=4, units=9, revenue=Decimal('900.00'))
+        self._checkout({str(self.saffron.pk): 2})
+        self.client.post('/accounts/logout/')  # flushes the session holding that order
+        self.client.force_login(self.user)
+        # Same day, and sharing the category row, with the flushed order
+        self._checkout({str(self.pepper.pk): 1})
+        DailyProductSales.objects.filter(product=self.pepper).delete()
+
+        written = rebuild_rollups(yesterday)
+
+        self.assertEqual(written['orders'], 1)
+        self.assertEqual(written[DailyProductSales._meta.verbose_name_plural], 1)
+        self.assertEqual(DailySales.objects.get(day=yesterday).revenue, Decimal('900.00'))
+        today = DailySales.objects.get(day=timezone.localdate())
+        self.assertEqual((today.orders, today.units), (2, 3))
+        self.assertEqual(DailyCategorySales.objects.get().orders, 2)
+        self.assertEqual(DailyProductSales.objects.get(product=self.saffron).units, 2)
+        # The missing row is filled in from the surviving order
+        self.assertEqual(DailyProductSales.objects.get(product=self.pepper).units, 1)
+
+    def test_replace_recomputes_covered_rows_from_surviving_orders_only(self):
+        self._checkout({str(self.saffron.pk): 2})
+        self.client.post('/accounts/logout/')
+        self.client.force_login(self.user)
+        self._checkout({str(self.pepper.pk): 1})
+
+        rebuild_rollups(timezone.localdate(), replace=True)
+
+        today = DailySales.objects.get(day=timezone.localdate())
+        self.assertEqual((today.orders, today.units), (1, 1))
+        self.assertEqual(DailyProductSales.objects.get(product=self.saffron).units, 2)
+
+    def test_backfill_command_requires_since(self):
+        with self.assertRaisesMessage(CommandError, '--since'):
+            call_command('backfill_sales_rollups', stdout=StringIO())
+        out = StringIO()
+        call_command('backfill_sales_rollups', '--since', '2020-01-01', stdout=out)
+        self.assertIn('Rolled up 0 orders', out.getvalue())
+
+    def test_dashboard_and_export_are_staff_only(self):
+        self.assertEqual(self.client.get('/analytics/sales/').status_code, 302)
+
+        self._checkout({str(self.pepper.pk): 2})
+        self.client.force_login(User.objects.create_user(username='staff', password='x', is_staff=True))
+        self.client.get('/analytics/sales/')  # sets the badge cookie
+        # Session, user, the wishlist revision behind the badge cookie, then one query
+        # per report; no session decoding or order scans
+        with self.assertNumQueries(7):
+            response = self.client.get('/analytics/sales/')
+        self.assertContains(response, 'Pepper')
+
+        response = self.client.get('/analytics/sales/products.csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'product_id,product_name,category_name,orders,units,revenue,discount')
+        self.assertIn(f'{self.pepper.pk},Pepper', lines[1])
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('sales/', views.sales_dashboard, name='sales_dashboard'),
+    path('sales/<slug:report>.csv', views.sales_export, name='sales_export'),
+]
@@ -0,0 +1,52 @@
+import csv
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import render
+
+from .reports import REPORTS, category_rows, daily_rows, date_range, product_rows, totals
+
+
+TOP_ROWS = 20
+
+
+class _Echo:
+    """File-like object whose write() hands the CSV line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+@staff_member_required
+def sales_dashboard(request):
+    start, end = date_range(request.GET)
+    days = list(daily_rows(start, end))
+    peak = max((row['revenue'] for row in days), default=0) or 1
+    for row in days:
+        row['bar'] = float(row['revenue'] / peak * 100)
+    return render(request, 'analytics/sales_dashboard.html', {
+        'start': start,
+        'end': end,
+        'totals': totals(start, end),
+        'days': days,
+        'products': product_rows(start, end)[:TOP_ROWS],
+        'categories': category_rows(start, end),
+    })
+
+
+@staff_member_required
+def sales_export(request, report):
+    if report not in REPORTS:
+        raise Http404('Unknown report')
+    rows, columns = REPORTS[report]
+    start, end = date_range(request.GET)
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(columns)
+        for row in rows(start, end).iterator(chunk_size=2000):
+            yield writer.writerow([row[column] for column in columns])
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="sales-{report}-{start}-{end}.csv"'
+    return response
@@ -0,0 +1,143 @@
+"""Find carts left idle in sessions and queue reminder emails for them.
+
+Carts live in the session (cart.session_keys.SESSION_KEY), so the scan streams
+django_session in (expire_date, session_key) order, a batch at a time, and only
+decodes the rows in the current batch. Sessions are saved whenever the cart
+changes, so expire_date - SESSION_COOKIE_AGE is the time of the last cart
+activity. A session is picked up once it has been idle for IDLE_HOURS. The
+ScanMark moves past it, so it is never decoded again unless the shopper comes
+back and saves the session again.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db.models import Q
+from django.utils import timezone
+
+from catalog.models import Product
+from core.db import serialized_write
+from notifications.models import Notification
+from .models import AbandonedCart, ScanMark
+from .session_keys import SESSION_KEY
+
+
+DEFAULTS = {
+    # A cart untouched for this long counts as abandoned
+    'IDLE_HOURS': 24,
+    # Carts idle for longer than this are never reminded about (first run, or after an outage)
+    'LOOKBACK_HOURS': 72,
+    'BATCH_SIZE': 500,
+}
+
+SCAN_NAME = 'abandoned_carts'
+USER_KEY = '_auth_user_id'
+
+
+def abandoned_setting(name):
+    return getattr(settings, 'ABANDONED_CARTS', {}).get(name, DEFAULTS[name])
+
+
+def _expire_date(last_activity):
+    return last_activity + timedelta(seconds=settings.SESSION_COOKIE_AGE)
+
+
+def _last_activity(expire_date):
+    return expire_date - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+
+
+def idle_session_batches(after, after_key, until, batch_size):
+    """Yield lists of (session_key, expire_date, data) after (after, after_key) up to until, in order."""
+    store = SessionStore()
+    sessions = Session.objects.filter(expire_date__lte=until).order_by('expire_date', 'session_key')
+    while True:
+        rows = list(
+            sessions.filter(Q(expire_date__gt=after) | Q(expire_date=after, session_key__gt=after_key))
+            .values_list('session_key', 'expire_date', 'session_data')[:batch_size]
+        )
+        if not rows:
+            return
+        after_key, after = rows[-1][0], rows[-1][1]
+        yield [(key, expire_date, store.decode(data)) for key, expire_date, data in rows]
+
+
+def price_carts(carts):
+    """[(user_id, session_key, expire_date, {product_id: qty})] -> AbandonedCart rows, with one price query."""
+    product_ids = {int(pk) for _, _, _, cart in carts for pk in cart}
+    products = {
+        pk: (name, price)
+        for pk, name, price in Product.objects.filter(id__in=product_ids, is_active=True)
+        .values_list('id', 'name', 'effective_price')
+    }
+    priced = []
+    for user_id, session_key, expire_date, cart in carts:
+        items = []
+        for pk, quantity in cart.items():
+            if int(pk) not in products or int(quantity) <= 0:
+                continue
+            name, price = products[int(pk)]
+            items.append({
+                'product_id': int(pk), 'name': name, 'quantity': int(quantity),
+                'price': float(price), 'line_total': float(price * int(quantity)),
+            })
+        if items:
+            priced.append(AbandonedCart(
+                user_id=user_id, session_key=session_key, items=items,
+                item_count=sum(item['quantity'] for item in items),
+                total=sum((Decimal(str(item['line_total'])) for item in items), Decimal('0.00')),
+                last_activity=_last_activity(expire_date),
+            ))
+    return priced
+
+
+def find_abandoned_carts(idle_hours=None, batch_size=None, dry_run=False) -> dict:
+    """Record and queue reminders for carts that went idle since the last run.
+
+    Each batch's AbandonedCart and Notification rows are written with the new
+    high-water mark in one transaction, so an interrupted run resumes after the
+    last finished batch and never queues a reminder twice.
+    """
+    idle_hours = idle_hours or abandoned_setting('IDLE_HOURS')
+    batch_size = batch_size or abandoned_setting('BATCH_SIZE')
+    now = timezone.now()
+    until = _expire_date(now - timedelta(hours=idle_hours))
+    floor = _expire_date(now - timedelta(hours=abandoned_setting('LOOKBACK_HOURS')))
+
+    mark = ScanMark.objects.filter(name=SCAN_NAME).first() or ScanMark(name=SCAN_NAME, expire_date=floor)
+    after, after_key = mark.expire_date, mark.session_key
+    if after < floor:
+        after, after_key = floor, ''
+
+    stats = {'sessions': 0, 'carts': 0, 'reminders': 0}
+    # One reminder per shopper per run, even when their idle sessions fall in different batches
+    reminded = set()
+    for batch in idle_session_batches(after, after_key, until, batch_size):
+        stats['sessions'] += len(batch)
+        # Within a batch, the shopper's most recently used session wins
+        latest = {}
+        for session_key, expire_date, data in batch:
+            if data.get(SESSION_KEY) and data.get(USER_KEY) and int(data[USER_KEY]) not in reminded:
+                latest[data[USER_KEY]] = (int(data[USER_KEY]), session_key, expire_date, data[SESSION_KEY])
+        carts = price_carts(list(latest.values()))
+        reminded.update(cart.user_id for cart in carts)
+        stats['carts'] += len(carts)
+        if dry_run:
+            continue
+
+        notifications = [
+            Notification(user_id=cart.user_id, kind=Notification.ABANDONED_CART, context={'cart': {
+                'items': cart.items, 'item_count': cart.item_count, 'total': float(cart.total),
+            }})
+            for cart in carts
+        ]
+        for cart in carts:
+            cart.reminder_queued = True
+        mark.session_key, mark.expire_date = batch[-1][0], batch[-1][1]
+        with serialized_write():
+            AbandonedCart.objects.bulk_create(carts)
+            Notification.objects.bulk_create(notifications)
+            mark.save()
+        stats['reminders'] += len(notifications)
+    return stats
@@ -0,0 +1,41 @@
+from django.contrib import admin
+
+from .models import AbandonedCart, ScanMark, Wishlist, WishlistAlert, WishlistItem
+
+
+class WishlistItemInline(admin.TabularInline):
+    model = WishlistItem
+    extra = 0
+    raw_id_fields = ("product",)
+    readonly_fields = ("seen_price", "seen_in_stock", "added_at")
+
+
+@admin.register(Wishlist)
+class WishlistAdmin(admin.ModelAdmin):
+    list_display = ("user", "created_at")
+    search_fields = ("user__username", "user__email")
+    inlines = [WishlistItemInline]
+
+
+@admin.register(WishlistAlert)
+class WishlistAlertAdmin(admin.ModelAdmin):
+    list_display = ("user", "product", "kind", "old_price", "new_price", "created_at", "sent_at")
+    list_filter = ("kind", ("sent_at", admin.EmptyFieldListFilter))
+    search_fields = ("user__username", "product__name")
+    raw_id_fields = ("user", "product")
+    date_hierarchy = "created_at"
+
+
+@admin.register(AbandonedCart)
+class AbandonedCartAdmin(admin.ModelAdmin):
+    list_display = ("user", "item_count", "total", "last_activity", "reminder_queued", "created_at")
+    list_filter = ("reminder_queued",)
+    search_fields = ("user__username", "user__email")
+    raw_id_fields = ("user",)
+    readonly_fields = ("session_key", "items", "item_count", "total", "last_activity", "created_at")
+    date_hierarchy = "created_at"
+
+
+@admin.register(ScanMark)
+class ScanMarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "expire_date", "session_key", "updated_at")
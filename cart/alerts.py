@@ -0,0 +1,60 @@
+"""Find wishlisted products that got cheaper or came back in stock, across all users.
+
+Each WishlistItem keeps the price and stock state its owner last saw. One query
+compares every item against its product, and the matches are turned into
+WishlistAlert rows batch by batch. After each batch the baselines are moved
+forward, so an item alerts once per change.
+"""
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+
+from catalog.models import Product
+from .models import WishlistAlert, WishlistItem
+
+
+def changed_items():
+    return WishlistItem.objects.filter(
+        Q(product__effective_price__lt=F('seen_price')) | Q(seen_in_stock=False, product__stock_quantity__gt=0),
+        product__is_active=True,
+    )
+
+
+def _advance_baseline(items) -> int:
+    """Set the items' baseline to their product's current price and stock in one UPDATE."""
+    product = Product.objects.filter(pk=OuterRef('product_id'))
+    return items.update(
+        seen_price=Subquery(product.values('effective_price')[:1]),
+        seen_in_stock=Exists(product.filter(stock_quantity__gt=0)),
+    )
+
+
+def queue_wishlist_alerts(batch_size: int = 1000) -> int:
+    """Queue a WishlistAlert per changed item; returns how many were queued."""
+    candidates = changed_items().order_by('pk').values_list(
+        'pk', 'wishlist__user_id', 'product_id', 'seen_price', 'seen_in_stock',
+        'product__effective_price', 'product__stock_quantity',
+    )
+    queued = 0
+    last_pk = 0
+    while True:
+        rows = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        alerts = []
+        for _, user_id, product_id, seen_price, seen_in_stock, price, stock in rows:
+            kind = WishlistAlert.BACK_IN_STOCK if not seen_in_stock and stock > 0 else WishlistAlert.PRICE_DROP
+            alerts.append(WishlistAlert(
+                user_id=user_id, product_id=product_id, kind=kind, old_price=seen_price, new_price=price,
+            ))
+        with transaction.atomic():
+            WishlistAlert.objects.bulk_create(alerts, batch_size=batch_size)
+            _advance_baseline(WishlistItem.objects.filter(pk__in=[row[0] for row in rows]))
+        queued += len(alerts)
+
+    # Price rises and sell-outs don't alert, but the baseline follows them so the
+    # next drop or restock is measured from the new state
+    _advance_baseline(WishlistItem.objects.filter(
+        Q(product__effective_price__gt=F('seen_price')) | Q(seen_in_stock=True, product__stock_quantity=0),
+    ))
+    return queued
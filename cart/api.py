@@ -0,0 +1,142 @@
+import json
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from .badges import mark_badges_changed
+from .services import CartError, apply_operations, cart_state, save_wishlist, wishlist_product_ids
+from .session_keys import SESSION_KEY
+
+
+IDEMPOTENCY_TTL = 60 * 60 * 24
+# How long a key stays reserved for a request that never finished (worker killed mid-request)
+IDEMPOTENCY_PENDING_TTL = 60
+PENDING = 'pending'
+MAX_BATCH_OPERATIONS = 50
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'authentication required'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def idempotent(view):
+    """Replay the stored response when a client retries with the same Idempotency-Key.
+
+    The key is reserved with cache.add() before the view runs, so of two
+    concurrent requests carrying it only one runs; the other gets a 409 until
+    the first has stored its response. The cache is shared by every worker, so
+    a retry routed to another worker is deduplicated too.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key or request.method == 'GET':
+            return view(request, *args, **kwargs)
+        cache_key = f'cart:idempotency:{request.user.pk}:{request.path}:{key[:100]}'
+        if not cache.add(cache_key, PENDING, IDEMPOTENCY_PENDING_TTL):
+            stored = cache.get(cache_key)
+            if stored is None or stored == PENDING:
+                response = JsonResponse({'error': 'a request with this Idempotency-Key is in progress'}, status=409)
+                response['Retry-After'] = '1'
+                return response
+            response = JsonResponse(stored['body'], status=stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        if response.status_code < 500:
+            cache.set(cache_key, {'body': json.loads(response.content), 'status': response.status_code}, IDEMPOTENCY_TTL)
+        else:
+            cache.delete(cache_key)
+        return response
+    return wrapper
+
+
+def _json_body(request: HttpRequest) -> dict:
+    if not request.body:
+        return {}
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        raise CartError('body must be JSON')
+    if not isinstance(body, dict):
+        raise CartError('body must be a JSON object')
+    return body
+
+
+def _run(request: HttpRequest, operations) -> JsonResponse:
+    cart = dict(request.session.get(SESSION_KEY, {}))
+    stored = wishlist_product_ids(request.user)
+    wishlist = {str(pid): 1 for pid in stored}
+    try:
+        touched = apply_operations(cart, wishlist, operations)
+    except CartError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    request.session[SESSION_KEY] = cart
+    save_wishlist(request.user, stored, wishlist)
+    mark_badges_changed(request)
+    return JsonResponse(cart_state(cart, wishlist, touched))
+
+
+@require_http_methods(['GET'])
+@api_login_required
+def summary(request: HttpRequest) -> JsonResponse:
+    cart = request.session.get(SESSION_KEY, {})
+    wishlist = {str(pid): 1 for pid in wishlist_product_ids(request.user)}
+    return JsonResponse(cart_state(cart, wishlist, [int(pid) for pid in cart]))
+
+
+@require_http_methods(['POST', 'DELETE'])
+@api_login_required
+@idempotent
+def cart_item(request: HttpRequest, product_id: int) -> JsonResponse:
+    """POST {"qty": n} adds n (or {"qty": n, "set": true} sets it); DELETE removes the line."""
+    if request.method == 'DELETE':
+        return _run(request, [{'op': 'remove', 'product_id': product_id}])
+    try:
+        body = _json_body(request)
+    except CartError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    op = 'set' if body.get('set') else 'add'
+    return _run(request, [{'op': op, 'product_id': product_id, 'qty': body.get('qty', 1)}])
+
+
+@require_http_methods(['POST', 'DELETE'])
+@api_login_required
+@idempotent
+def wishlist_item(request: HttpRequest, product_id: int) -> JsonResponse:
+    op = 'wishlist_remove' if request.method == 'DELETE' else 'wishlist_add'
+    return _run(request, [{'op': op, 'product_id': product_id}])
+
+
+@require_http_methods(['POST'])
+@api_login_required
+@idempotent
+def wishlist_move_to_cart(request: HttpRequest, product_id: int) -> JsonResponse:
+    return _run(request, [{'op': 'move_to_cart', 'product_id': product_id}])
+
+
+@require_http_methods(['POST'])
+@api_login_required
+@idempotent
+def batch(request: HttpRequest) -> JsonResponse:
+    """POST {"ops": [{"op": "add", "product_id": 1, "qty": 2}, ...]}; applied all-or-nothing."""
+    try:
+        operations = _json_body(request).get('ops')
+    except CartError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({'error': 'ops must be a non-empty list'}, status=400)
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return JsonResponse({'error': f'at most {MAX_BATCH_OPERATIONS} ops per batch'}, status=400)
+    return _run(request, operations)
@@ -0,0 +1,83 @@
+"""Async cart and wishlist endpoints, routed when settings.ASYNC_VIEWS is on.
+
+Session reads and writes use the async session API; wishlist writes and the
+full-page cart and wishlist renders run in a worker thread.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from catalog.models import Product
+from .badges import mark_badges_changed
+from .services import add_to_wishlist, remove_from_wishlist
+from .session_keys import SESSION_KEY
+
+
+async def _get_cart(request: HttpRequest) -> dict:
+    return await request.session.aget(SESSION_KEY, {})
+
+
+async def _save_cart(request: HttpRequest, cart: dict) -> None:
+    await request.session.aset(SESSION_KEY, cart)
+
+
+@login_required
+async def add_to_cart(request: HttpRequest, product_id: int) -> HttpResponse:
+    await aget_object_or_404(Product, id=product_id)
+    cart = await _get_cart(request)
+    qty = 1
+    if request.method == 'POST':
+        try:
+            qty = max(1, int(request.POST.get('qty', '1')))
+        except ValueError:
+            qty = 1
+    cart[str(product_id)] = cart.get(str(product_id), 0) + qty
+    await _save_cart(request, cart)
+    return redirect('cart:view')
+
+
+@login_required
+async def remove_from_cart(request: HttpRequest, product_id: int) -> HttpResponse:
+    cart = await _get_cart(request)
+    cart.pop(str(product_id), None)
+    await _save_cart(request, cart)
+    return redirect('cart:view')
+
+
+@login_required
+async def wishlist_view(request: HttpRequest) -> HttpResponse:
+    user = await request.auser()
+    products = [
+        p async for p in Product.objects.filter(wishlist_items__wishlist__user=user).order_by('-wishlist_items__added_at')
+    ]
+    return await sync_to_async(render)(request, 'cart/wishlist.html', { 'products': products })
+
+
+@login_required
+async def wishlist_add(request: HttpRequest, product_id: int) -> HttpResponse:
+    await aget_object_or_404(Product, id=product_id)
+    await sync_to_async(add_to_wishlist)(await request.auser(), [product_id])
+    mark_badges_changed(request)
+    messages.success(request, 'Added to wishlist')
+    return redirect('cart:wishlist')
+
+
+@login_required
+async def wishlist_remove(request: HttpRequest, product_id: int) -> HttpResponse:
+    await sync_to_async(remove_from_wishlist)(await request.auser(), [product_id])
+    mark_badges_changed(request)
+    return redirect('cart:wishlist')
+
+
+@login_required
+async def wishlist_move_to_cart(request: HttpRequest, product_id: int) -> HttpResponse:
+    await aget_object_or_404(Product, id=product_id)
+    await sync_to_async(remove_from_wishlist)(await request.auser(), [product_id])
+    mark_badges_changed(request)
+    cart = await _get_cart(request)
+    cart[str(product_id)] = cart.get(str(product_id), 0) + 1
+    await _save_cart(request, cart)
+    messages.success(request, 'Moved to cart')
+    return redirect('cart:view')
@@ -0,0 +1,117 @@
+"""Cart and wishlist badge counts kept in a small signed cookie.
+
+The header badges render on every page. Reading them from the session and the
+wishlist table would cost a session load and a COUNT even on pages that never
+touch the cart, so the counts are written to a signed cookie whenever the cart
+or wishlist changes and read back from there. The session and database are
+only consulted when the cookie is missing or was issued for a different session.
+
+A wishlist can also change from another device, which never touches this
+session. The cookie therefore carries the user's wishlist revision, kept in the
+shared cache and moved by every wishlist write, and a cookie with an old
+revision is recounted.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import WishlistItem
+from .session_keys import SESSION_KEY
+
+
+BADGE_COOKIE = 'badge_counts'
+BADGE_SALT = 'cart.badges'
+BADGE_MAX_AGE = 60 * 60 * 24 * 14
+
+
+def _revision_key(user_id) -> str:
+    return f'wishlist:revision:{user_id}'
+
+
+def wishlist_revision(user_id) -> int:
+    """The user's current wishlist revision; a clock reading, so a lost one is never reissued."""
+    key = _revision_key(user_id)
+    revision = cache.get(key)
+    if revision is None:
+        cache.add(key, time.time_ns(), timeout=BADGE_MAX_AGE)
+        revision = cache.get(key)
+    return revision
+
+
+def bump_wishlist_revision(user_id) -> None:
+    cache.set(_revision_key(user_id), time.time_ns(), timeout=BADGE_MAX_AGE)
+
+
+def _session_digest(session_key: str) -> str:
+    return hashlib.sha256(session_key.encode()).hexdigest()[:16]
+
+
+def current_counts(request) -> tuple:
+    cart = request.session.get(SESSION_KEY, {}) or {}
+    wishlist_count = 0
+    if request.user.is_authenticated:
+        wishlist_count = WishlistItem.objects.filter(wishlist__user_id=request.user.pk).count()
+    return sum(int(qty) for qty in cart.values()), wishlist_count
+
+
+def _counts_from_cookie(request):
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        # No session cookie means an anonymous, empty session; nothing to load
+        return 0, 0
+    value = request.get_signed_cookie(BADGE_COOKIE, default=None, salt=BADGE_SALT, max_age=BADGE_MAX_AGE)
+    if not value:
+        return None
+    digest, _, counts = value.partition(':')
+    if digest != _session_digest(session_key):
+        return None
+    try:
+        cart_count, wishlist_count, revision = (int(n) for n in counts.split(':'))
+    except ValueError:
+        return None
+    if request.user.is_authenticated and revision != wishlist_revision(request.user.pk):
+        return None
+    return cart_count, wishlist_count
+
+
+def badge_counts(request) -> tuple:
+    """(cart items, wishlist items) for the request, memoized on it."""
+    counts = getattr(request, '_badge_counts', None)
+    if counts is None:
+        counts = _counts_from_cookie(request)
+        if counts is None:
+            counts = current_counts(request)
+            request._badge_cookie_stale = True
+        request._badge_counts = counts
+    return counts
+
+
+def mark_badges_changed(request) -> None:
+    """Call after changing the wishlist; session writes are picked up on their own."""
+    request._badge_counts = None
+    request._badge_cookie_stale = True
+
+
+def needs_badge_update(request) -> bool:
+    session = getattr(request, 'session', None)
+    if session is None:
+        return False
+    return (session.accessed and session.modified) or getattr(request, '_badge_cookie_stale', False)
+
+
+def update_badge_cookie(request, response) -> None:
+    """Rewrite the cookie after the cart or wishlist changed or the cookie failed to validate."""
+    session_key = request.session.session_key
+    if session_key is None:
+        response.delete_cookie(BADGE_COOKIE)
+        return
+    # Read before counting, so a change that lands in between leaves the cookie outdated
+    revision = wishlist_revision(request.user.pk) if request.user.is_authenticated else 0
+    cart_count, wishlist_count = current_counts(request)
+    response.set_signed_cookie(
+        BADGE_COOKIE, f'{_session_digest(session_key)}:{cart_count}:{wishlist_count}:{revision}',
+        salt=BADGE_SALT, max_age=BADGE_MAX_AGE, httponly=True, samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
@@ -1,15 +1,13 @@
 from typing import Dict
 
-SESSION_KEY = 'cart_items'
-WISHLIST_KEY = 'wishlist_items'
+from django.utils.functional import SimpleLazyObject
+
+from .badges import badge_counts
 
 
 def cart_summary(request) -> Dict[str, int]:
-    cart = request.session.get(SESSION_KEY, {}) or {}
-    count = sum(int(qty) for qty in cart.values())
+    # Lazy, so pages that don't show the badges never read the cookie or session
     return {
-        'cart_item_count': count,
-        'wishlist_item_count': len(request.session.get(WISHLIST_KEY, {}) or {}),
+        'cart_item_count': SimpleLazyObject(lambda: badge_counts(request)[0]),
+        'wishlist_item_count': SimpleLazyObject(lambda: badge_counts(request)[1]),
     }
-
-
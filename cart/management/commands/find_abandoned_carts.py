@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from cart.abandoned import find_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = "Find carts idle since the last run, price them and queue reminder emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--idle-hours", type=float, default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--dry-run", action="store_true", help="Count carts without queueing or moving the mark")
+
+    def handle(self, *args, **options):
+        stats = find_abandoned_carts(
+            idle_hours=options["idle_hours"], batch_size=options["batch_size"], dry_run=options["dry_run"],
+        )
+        verb = "Would queue" if options["dry_run"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['sessions']} idle sessions, found {stats['carts']} abandoned carts; "
+            f"{verb} {stats['carts'] if options['dry_run'] else stats['reminders']} reminders"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from cart.alerts import changed_items, queue_wishlist_alerts
+
+
+class Command(BaseCommand):
+    help = "Queue alerts for wishlisted products whose price dropped or that came back in stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the items that would alert")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            self.stdout.write(f"{changed_items().count()} wishlist items changed")
+            return
+        queued = queue_wishlist_alerts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} wishlist alerts"))
@@ -0,0 +1,34 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .badges import needs_badge_update, update_badge_cookie
+
+
+class BadgeCookieMiddleware:
+    """Keep the badge count cookie in step with the cart and wishlist.
+
+    Listed before SessionMiddleware so the response pass runs after the session
+    is saved and a newly created session already has its key.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if needs_badge_update(request):
+            update_badge_cookie(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if needs_badge_update(request):
+            # Counting wishlist rows hits the database
+            await sync_to_async(update_badge_cookie)(request, response)
+        return response
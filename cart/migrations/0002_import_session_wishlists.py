@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import migrations
+from django.utils import timezone
+
+
+WISHLIST_KEY = 'wishlist_items'
+
+
+def import_session_wishlists(apps, schema_editor):
+    """Copy wishlists kept in live sessions into Wishlist rows and drop them from the session."""
+    Session = apps.get_model('sessions', 'Session')
+    Product = apps.get_model('catalog', 'Product')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Wishlist = apps.get_model('cart', 'Wishlist')
+    WishlistItem = apps.get_model('cart', 'WishlistItem')
+
+    store = SessionStore()
+    for session in Session.objects.filter(expire_date__gt=timezone.now()).iterator(chunk_size=500):
+        data = store.decode(session.session_data)
+        wishlist = data.pop(WISHLIST_KEY, None)
+        user_id = data.get('_auth_user_id')
+        if wishlist and user_id and User.objects.filter(pk=user_id).exists():
+            owner, _ = Wishlist.objects.get_or_create(user_id=user_id)
+            products = Product.objects.filter(id__in=[int(pid) for pid in wishlist])
+            WishlistItem.objects.bulk_create(
+                [
+                    WishlistItem(wishlist=owner, product=p, seen_price=p.effective_price, seen_in_stock=p.stock_quantity > 0)
+                    for p in products
+                ],
+                ignore_conflicts=True,
+            )
+        if wishlist is not None:
+            session.session_data = store.encode(data)
+            session.save(update_fields=['session_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+        ('sessions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(import_session_wishlists, migrations.RunPython.noop),
+    ]
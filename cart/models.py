@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db import models
+
+
+class Wishlist(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='wishlist')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Wishlist of {self.user}"
+
+
+class WishlistItem(models.Model):
+    """A wishlisted product with the price and stock state the user last saw.
+
+    notify_wishlist_changes compares the baseline against the product to find
+    price drops and restocks, then moves the baseline forward.
+    """
+
+    wishlist = models.ForeignKey(Wishlist, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey('catalog.Product', on_delete=models.CASCADE, related_name='wishlist_items')
+    seen_price = models.DecimalField(max_digits=10, decimal_places=2)
+    seen_in_stock = models.BooleanField(default=True)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-added_at']
+        constraints = [
+            models.UniqueConstraint(fields=['wishlist', 'product'], name='wishlist_product_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['product'], name='wishlist_item_product_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.wishlist.user} — {self.product}"
+
+
+class WishlistAlert(models.Model):
+    """Queued notification that a wishlisted product got cheaper or came back in stock."""
+
+    PRICE_DROP = 'price_drop'
+    BACK_IN_STOCK = 'back_in_stock'
+    KIND_CHOICES = [
+        (PRICE_DROP, 'Price drop'),
+        (BACK_IN_STOCK, 'Back in stock'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='wishlist_alerts')
+    product = models.ForeignKey('catalog.Product', on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    old_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user'], condition=models.Q(sent_at__isnull=True), name='wishlist_alert_unsent_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()}: {self.product} for {self.user}"
+
+
+class AbandonedCart(models.Model):
+    """A signed-in shopper's cart that sat idle past the threshold, priced when it was found."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='abandoned_carts')
+    session_key = models.CharField(max_length=40)
+    # [{product_id, name, quantity, price, line_total}] at current effective prices
+    items = models.JSONField(default=list)
+    item_count = models.PositiveIntegerField()
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    last_activity = models.DateTimeField()
+    reminder_queued = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='abandoned_cart_user_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user}: {self.item_count} items, ₹{self.total}"
+
+
+class ScanMark(models.Model):
+    """High-water mark of an incremental scan over django_session, in (expire_date, session_key) order."""
+
+    name = models.CharField(max_length=50, unique=True)
+    expire_date = models.DateTimeField()
+    session_key = models.CharField(max_length=40, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} at {self.expire_date:%Y-%m-%d %H:%M}"
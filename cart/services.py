@@ -0,0 +1,158 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from catalog.models import Product
+from .badges import bump_wishlist_revision
+from .models import Wishlist, WishlistItem
+
+
+class CartError(ValueError):
+    pass
+
+
+OPERATIONS = ('add', 'set', 'remove', 'wishlist_add', 'wishlist_remove', 'move_to_cart')
+
+
+def _quantity(value, minimum):
+    try:
+        qty = int(value)
+    except (TypeError, ValueError):
+        raise CartError('qty must be an integer')
+    if qty < minimum:
+        raise CartError(f'qty must be at least {minimum}')
+    return qty
+
+
+def apply_operations(cart: dict, wishlist: dict, operations) -> list:
+    """Apply cart/wishlist operations in order to the cart and wishlist dicts; returns touched product ids.
+
+    All referenced products are checked with one query up front, so a batch
+    either applies completely or raises CartError without changing anything.
+    """
+    parsed = []
+    for op in operations:
+        if not isinstance(op, dict):
+            raise CartError('each operation must be an object')
+        kind = op.get('op')
+        if kind not in OPERATIONS:
+            raise CartError(f'unknown op {kind!r}')
+        try:
+            product_id = int(op.get('product_id'))
+        except (TypeError, ValueError):
+            raise CartError('product_id must be an integer')
+        qty = None
+        if kind == 'add':
+            qty = _quantity(op.get('qty', 1), 1)
+        elif kind == 'set':
+            qty = _quantity(op.get('qty'), 0)
+        parsed.append((kind, product_id, qty))
+
+    needed = {pid for kind, pid, _ in parsed if kind in ('add', 'set', 'wishlist_add', 'move_to_cart')}
+    existing = set(Product.objects.filter(id__in=needed).values_list('id', flat=True))
+    missing = needed - existing
+    if missing:
+        raise CartError(f'unknown product {min(missing)}')
+
+    touched = []
+    for kind, product_id, qty in parsed:
+        key = str(product_id)
+        if kind == 'add':
+            cart[key] = cart.get(key, 0) + qty
+        elif kind == 'set':
+            if qty:
+                cart[key] = qty
+            else:
+                cart.pop(key, None)
+        elif kind == 'remove':
+            cart.pop(key, None)
+        elif kind == 'wishlist_add':
+            wishlist[key] = 1
+        elif kind == 'wishlist_remove':
+            wishlist.pop(key, None)
+        elif kind == 'move_to_cart':
+            wishlist.pop(key, None)
+            cart[key] = cart.get(key, 0) + 1
+        if product_id not in touched:
+            touched.append(product_id)
+    return touched
+
+
+def badge_counts(cart: dict, wishlist: dict) -> dict:
+    return {'cart': sum(int(qty) for qty in cart.values()), 'wishlist': len(wishlist)}
+
+
+def cart_state(cart: dict, wishlist: dict, touched) -> dict:
+    """JSON payload: the touched lines, cart totals and badge counts (one price query)."""
+    prices = dict(
+        Product.objects.filter(id__in=[int(pid) for pid in cart]).values_list('id', 'effective_price')
+    )
+    subtotal = Decimal('0')
+    for pid, qty in cart.items():
+        subtotal += (prices.get(int(pid)) or 0) * int(qty)
+
+    lines = []
+    for product_id in touched:
+        qty = int(cart.get(str(product_id), 0))
+        price = prices.get(product_id)
+        lines.append({
+            'product_id': product_id,
+            'quantity': qty,
+            'in_wishlist': str(product_id) in wishlist,
+            'price': str(price) if price is not None else None,
+            'line_total': str(price * qty) if price is not None else '0',
+        })
+    return {
+        'lines': lines,
+        'totals': {'subtotal': str(subtotal), 'items': badge_counts(cart, wishlist)['cart']},
+        'badges': badge_counts(cart, wishlist),
+    }
+
+
+def wishlist_product_ids(user) -> set:
+    return set(WishlistItem.objects.filter(wishlist__user_id=user.pk).values_list('product_id', flat=True))
+
+
+def add_to_wishlist(user, product_ids) -> None:
+    """Wishlist the products, recording their current price and stock as the alert baseline."""
+    wishlist, _ = Wishlist.objects.get_or_create(user=user)
+    rows = Product.objects.filter(id__in=product_ids).values_list('id', 'effective_price', 'stock_quantity')
+    WishlistItem.objects.bulk_create(
+        [
+            WishlistItem(wishlist=wishlist, product_id=pid, seen_price=price, seen_in_stock=stock > 0)
+            for pid, price, stock in rows
+        ],
+        ignore_conflicts=True,
+    )
+    bump_wishlist_revision(user.pk)
+
+
+def remove_from_wishlist(user, product_ids) -> int:
+    removed = WishlistItem.objects.filter(wishlist__user_id=user.pk, product_id__in=product_ids).delete()[0]
+    if removed:
+        bump_wishlist_revision(user.pk)
+    return removed
+
+
+def move_wishlist_to_cart(user, cart: dict, product_ids=None) -> list:
+    """Move wishlisted products (all, or those in product_ids) into the cart dict at qty 1."""
+    items = WishlistItem.objects.filter(wishlist__user_id=user.pk)
+    if product_ids is not None:
+        items = items.filter(product_id__in=product_ids)
+    moved = list(items.values_list('product_id', flat=True))
+    if moved:
+        remove_from_wishlist(user, moved)
+    for product_id in moved:
+        key = str(product_id)
+        cart[key] = cart.get(key, 0) + 1
+    return moved
+
+
+@transaction.atomic
+def save_wishlist(user, before: set, wishlist: dict) -> None:
+    """Persist the difference between the stored wishlist ids and the edited wishlist dict."""
+    after = {int(pid) for pid in wishlist}
+    if before - after:
+        remove_from_wishlist(user, before - after)
+    if after - before:
+        add_to_wishlist(user, after - before)
@@ -0,0 +1,10 @@
+"""Keys of the cart data kept in the shopper's session.
+
+Offline jobs (sales rollups, related products, abandoned-cart scans) decode
+sessions too; they import these rather than cart.views.
+"""
+
+# {product_id: quantity}
+SESSION_KEY = 'cart_items'
+# [order, ...] newest first, appended by cart.views.payment
+ORDERS_KEY = 'orders'
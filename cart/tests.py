@@ -0,0 +1,291 @@
+import importlib
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.utils import timezone
+
+from catalog.models import Category, Product
+from core.models import User
+from notifications.mailer import Mailer
+from notifications.models import Notification
+from notifications.outbox import send_due_notifications
+from .abandoned import find_abandoned_carts
+from .alerts import queue_wishlist_alerts
+from .api import PENDING
+from .badges import BADGE_COOKIE, BADGE_SALT
+from .models import AbandonedCart, WishlistAlert, WishlistItem
+from .services import add_to_wishlist, move_wishlist_to_cart, remove_from_wishlist
+from .session_keys import SESSION_KEY
+
+
+class CartApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.first()
+        cls.pepper, cls.clove = [
+            Product.objects.create(name=name, slug=name.lower(), category=category, mrp=mrp, sale_price=sale)
+            for name, mrp, sale in (('Pepper', 200, 150), ('Clove', 90, None))
+        ]
+        cls.user = User.objects.create_user(username='api-shopper', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def post(self, path, body=None, **headers):
+        return self.client.post(f'/cart/api/{path}', json.dumps(body or {}), content_type='application/json', **headers)
+
+    def cart(self):
+        return self.client.session.get(SESSION_KEY, {})
+
+    def test_login_is_required(self):
+        self.client.logout()
+        self.assertEqual(self.post(f'items/{self.pepper.pk}/').status_code, 401)
+
+    def test_add_returns_only_the_touched_line(self):
+        self.post(f'items/{self.clove.pk}/', {'qty': 1})
+        body = self.post(f'items/{self.pepper.pk}/', {'qty': 2}).json()
+        self.assertEqual(body['lines'], [{
+            'product_id': self.pepper.pk, 'quantity': 2, 'in_wishlist': False,
+            'price': '150.00', 'line_total': '300.00',
+        }])
+        self.assertEqual(body['totals'], {'subtotal': '390.00', 'items': 3})
+
+    def test_batch_is_all_or_nothing(self):
+        response = self.post('batch/', {'ops': [
+            {'op': 'add', 'product_id': self.pepper.pk, 'qty': 1},
+            {'op': 'wishlist_add', 'product_id': self.clove.pk},
+            {'op': 'add', 'product_id': 999999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.cart(), {})
+        self.assertFalse(WishlistItem.objects.exists())
+
+        body = self.post('batch/', {'ops': [
+            {'op': 'add', 'product_id': self.pepper.pk, 'qty': 1},
+            {'op': 'wishlist_add', 'product_id': self.clove.pk},
+        ]}).json()
+        self.assertEqual(body['badges'], {'cart': 1, 'wishlist': 1})
+        self.assertEqual(self.cart(), {str(self.pepper.pk): 1})
+
+    def test_retry_with_the_same_key_is_replayed(self):
+        first = self.post(f'items/{self.pepper.pk}/', {'qty': 1}, HTTP_IDEMPOTENCY_KEY='order-line-1')
+        retry = self.post(f'items/{self.pepper.pk}/', {'qty': 1}, HTTP_IDEMPOTENCY_KEY='order-line-1')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(self.cart(), {str(self.pepper.pk): 1})
+
+        self.post(f'items/{self.pepper.pk}/', {'qty': 1}, HTTP_IDEMPOTENCY_KEY='order-line-2')
+        self.assertEqual(self.cart(), {str(self.pepper.pk): 2})
+
+    def test_a_key_still_in_progress_is_rejected(self):
+        path = f'/cart/api/items/{self.pepper.pk}/'
+        cache.add(f'cart:idempotency:{self.user.pk}:{path}:in-flight', PENDING)
+        response = self.post(f'items/{self.pepper.pk}/', {'qty': 1}, HTTP_IDEMPOTENCY_KEY='in-flight')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.cart(), {})
+
+
+class BadgeCookieTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.first()
+        cls.pepper = Product.objects.create(name='Badge Pepper', slug='badge-pepper', category=category, mrp=200)
+        cls.user = User.objects.create_user(username='badge-shopper', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def badge(self, response):
+        """(cart, wishlist) from the cookie the response set, or None if it left it alone."""
+        morsel = response.cookies.get(BADGE_COOKIE)
+        if morsel is None:
+            return None
+        request = RequestFactory().get('/')
+        request.COOKIES[BADGE_COOKIE] = morsel.value
+        value = request.get_signed_cookie(BADGE_COOKIE, salt=BADGE_SALT)
+        _, cart_count, wishlist_count, _ = value.split(':')
+        return int(cart_count), int(wishlist_count)
+
+    def test_cookie_is_issued_then_trusted(self):
+        self.assertEqual(self.badge(self.client.get('/')), (0, 0))
+        self.assertIsNone(self.badge(self.client.get('/')))
+
+    def test_cookie_is_rewritten_after_cart_and_wishlist_changes(self):
+        self.client.get('/')
+        self.assertEqual(self.badge(self.client.post(f'/cart/add/{self.pepper.pk}/', {'qty': 2})), (2, 0))
+        self.assertEqual(self.badge(self.client.get(f'/cart/wishlist/add/{self.pepper.pk}/')), (2, 1))
+        self.assertEqual(self.badge(self.client.get(f'/cart/wishlist/remove/{self.pepper.pk}/')), (2, 0))
+
+    def test_tampered_cookie_is_recounted(self):
+        self.client.post(f'/cart/add/{self.pepper.pk}/')
+        signed = self.client.cookies[BADGE_COOKIE].value
+        value, signature = signed.rsplit(':', 1)
+        self.client.cookies[BADGE_COOKIE] = value.replace(':1:0:', ':9:0:') + ':' + signature
+        self.assertEqual(self.badge(self.client.get('/')), (1, 0))
+
+    def test_cookie_from_another_session_is_recounted(self):
+        self.client.post(f'/cart/add/{self.pepper.pk}/', {'qty': 3})
+        other = Client()
+        other.force_login(self.user)
+        other.cookies[BADGE_COOKIE] = self.client.cookies[BADGE_COOKIE].value
+        self.assertEqual(self.badge(other.get('/')), (0, 0))
+
+    def test_wishlist_change_from_another_device_is_picked_up(self):
+        self.client.get('/')
+        phone = Client()
+        phone.force_login(self.user)
+        phone.get(f'/cart/wishlist/add/{self.pepper.pk}/')
+        self.assertEqual(self.badge(self.client.get('/')), (0, 1))
+
+    def test_cookie_is_deleted_on_logout(self):
+        self.client.post(f'/cart/add/{self.pepper.pk}/')
+        response = self.client.get('/accounts/logout/')
+        self.assertEqual(response.cookies[BADGE_COOKIE].value, '')
+        self.assertEqual(response.cookies[BADGE_COOKIE]['max-age'], 0)
+
+
+class WishlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.first()
+        cls.saffron = Product.objects.create(
+            name='Wish Saffron', slug='wish-saffron', category=category, mrp=500, stock_quantity=4,
+        )
+        cls.hing = Product.objects.create(name='Wish Hing', slug='wish-hing', category=category, mrp=120)
+        cls.user = User.objects.create_user(username='wisher', password='x')
+
+    def items(self):
+        return dict(WishlistItem.objects.filter(wishlist__user=self.user).values_list('product_id', 'seen_in_stock'))
+
+    def test_add_records_the_baseline_and_ignores_duplicates(self):
+        add_to_wishlist(self.user, [self.saffron.pk, self.hing.pk])
+        add_to_wishlist(self.user, [self.saffron.pk])
+        self.assertEqual(self.items(), {self.saffron.pk: True, self.hing.pk: False})
+        self.assertEqual(
+            WishlistItem.objects.get(product=self.saffron).seen_price, Decimal('500.00'),
+        )
+
+    def test_remove(self):
+        add_to_wishlist(self.user, [self.saffron.pk, self.hing.pk])
+        self.assertEqual(remove_from_wishlist(self.user, [self.hing.pk, 999999]), 1)
+        self.assertEqual(remove_from_wishlist(self.user, [self.hing.pk]), 0)
+        self.assertEqual(list(self.items()), [self.saffron.pk])
+
+    def test_move_all_adds_to_existing_cart_lines(self):
+        add_to_wishlist(self.user, [self.saffron.pk, self.hing.pk])
+        cart = {str(self.saffron.pk): 2}
+        moved = move_wishlist_to_cart(self.user, cart)
+        self.assertEqual(sorted(moved), sorted([self.saffron.pk, self.hing.pk]))
+        self.assertEqual(cart, {str(self.saffron.pk): 3, str(self.hing.pk): 1})
+        self.assertEqual(self.items(), {})
+        self.assertEqual(move_wishlist_to_cart(self.user, cart), [])
+
+    def test_move_all_view_moves_only_the_selected_items(self):
+        add_to_wishlist(self.user, [self.saffron.pk, self.hing.pk])
+        self.client.force_login(self.user)
+        self.client.post('/cart/wishlist/move-all-to-cart/', {'product_ids': [self.hing.pk]})
+        self.assertEqual(self.client.session[SESSION_KEY], {str(self.hing.pk): 1})
+        self.assertEqual(list(self.items()), [self.saffron.pk])
+
+    def test_price_drop_and_restock_alert_once_per_change(self):
+        add_to_wishlist(self.user, [self.saffron.pk, self.hing.pk])
+        self.assertEqual(queue_wishlist_alerts(), 0)
+
+        self.saffron.sale_price = 450
+        self.saffron.save()
+        self.hing.stock_quantity = 10
+        self.hing.save()
+        self.assertEqual(queue_wishlist_alerts(batch_size=1), 2)
+        self.assertEqual(queue_wishlist_alerts(), 0)
+        alerts = {alert.product_id: alert for alert in WishlistAlert.objects.all()}
+        self.assertEqual(alerts[self.saffron.pk].kind, WishlistAlert.PRICE_DROP)
+        self.assertEqual(alerts[self.saffron.pk].new_price, Decimal('450.00'))
+        self.assertEqual(alerts[self.hing.pk].kind, WishlistAlert.BACK_IN_STOCK)
+
+        # A rise moves the baseline up, so the drop back is a new change
+        self.saffron.sale_price = 480
+        self.saffron.save()
+        self.assertEqual(queue_wishlist_alerts(), 0)
+        self.saffron.sale_price = 450
+        self.saffron.save()
+        self.assertEqual(queue_wishlist_alerts(), 1)
+
+    def test_session_wishlists_are_imported(self):
+        migration = importlib.import_module('cart.migrations.0002_import_session_wishlists')
+        signed_in = SessionStore()
+        signed_in.update({'_auth_user_id': str(self.user.pk), 'wishlist_items': {str(self.saffron.pk): 1}, 'keep': 1})
+        signed_in.create()
+        anonymous = SessionStore()
+        anonymous['wishlist_items'] = {str(self.hing.pk): 1}
+        anonymous.create()
+
+        migration.import_session_wishlists(apps, None)
+
+        self.assertEqual(self.items(), {self.saffron.pk: True})
+        signed_in = SessionStore(session_key=signed_in.session_key)
+        self.assertNotIn('wishlist_items', signed_in.load())
+        self.assertEqual(signed_in['keep'], 1)
+        self.assertNotIn('wishlist_items', SessionStore(session_key=anonymous.session_key).load())
+
+
+class AbandonedCartTests(TestCase):
+    def setUp(self):
+        category = Category.objects.first()
+        self.saffron = Product.objects.create(name='Saffron', slug='saffron', category=category, mrp=500, sale_price=450)
+        self.user = User.objects.create_user(username='browser', email='browser@example.com', password='x')
+
+    def _session(self, user, cart, idle_hours):
+        session = SessionStore()
+        session.update({'_auth_user_id': str(user.pk), 'cart_items': cart})
+        session.create()
+        last_activity = timezone.now() - timedelta(hours=idle_hours)
+        Session.objects.filter(session_key=session.session_key).update(
+            expire_date=last_activity + timedelta(seconds=settings.SESSION_COOKIE_AGE),
+        )
+        return session
+
+    def test_idle_carts_are_reminded_once(self):
+        self._session(self.user, {str(self.saffron.pk): 2}, idle_hours=30)
+        fresh = User.objects.create_user(username='fresh', email='fresh@example.com', password='x')
+        self._session(fresh, {str(self.saffron.pk): 1}, idle_hours=1)
+        stale = User.objects.create_user(username='stale', email='stale@example.com', password='x')
+        self._session(stale, {str(self.saffron.pk): 1}, idle_hours=24 * 30)
+
+        stats = find_abandoned_carts(idle_hours=24, batch_size=1)
+
+        self.assertEqual(stats['reminders'], 1)
+        cart = AbandonedCart.objects.get()
+        self.assertEqual((cart.user, cart.item_count, cart.total), (self.user, 2, Decimal('900.00')))
+        # The high-water mark keeps already-seen sessions from being decoded again
+        self.assertEqual(find_abandoned_carts(idle_hours=24)['sessions'], 0)
+
+        with Mailer(rate=0) as mailer:
+            self.assertEqual(send_due_notifications(mailer), 1)
+        self.assertIn('2 × Saffron', mail.outbox[0].body)
+
+    def test_returning_shopper_is_reminded_again(self):
+        session = self._session(self.user, {str(self.saffron.pk): 1}, idle_hours=30)
+        find_abandoned_carts(idle_hours=24)
+        Session.objects.filter(session_key=session.session_key).update(
+            expire_date=timezone.now() - timedelta(hours=25) + timedelta(seconds=settings.SESSION_COOKIE_AGE),
+        )
+        self.assertEqual(find_abandoned_carts(idle_hours=24)['reminders'], 1)
+        self.assertEqual(Notification.objects.filter(kind=Notification.ABANDONED_CART).count(), 2)
+
+    def test_idle_sessions_in_different_batches_remind_once(self):
+        self._session(self.user, {str(self.saffron.pk): 1}, idle_hours=40)
+        self._session(self.user, {str(self.saffron.pk): 3}, idle_hours=30)
+        stats = find_abandoned_carts(idle_hours=24, batch_size=1)
+        self.assertEqual((stats['sessions'], stats['reminders']), (2, 1))
+        self.assertEqual(Notification.objects.filter(kind=Notification.ABANDONED_CART).count(), 1)
+
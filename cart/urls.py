@@ -1,21 +1,35 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views
+
+if settings.ASYNC_VIEWS:
+    from . import async_views
+    cart_views = async_views
+else:
+    cart_views = views
 
 app_name = 'cart'
 
 urlpatterns = [
     path('', views.view_cart, name='view'),
-    path('add/<int:product_id>/', views.add_to_cart, name='add'),
-    path('remove/<int:product_id>/', views.remove_from_cart, name='remove'),
+    path('add/<int:product_id>/', cart_views.add_to_cart, name='add'),
+    path('remove/<int:product_id>/', cart_views.remove_from_cart, name='remove'),
     path('clear/', views.clear_cart, name='clear'),
     path('buy-now/<int:product_id>/', views.buy_now, name='buy_now'),
     path('payment/', views.payment, name='payment'),
     path('orders/', views.orders, name='orders'),
     path('orders/<int:order_id>/', views.order_detail, name='order_detail'),
     # Wishlist
-    path('wishlist/', views.wishlist_view, name='wishlist'),
-    path('wishlist/add/<int:product_id>/', views.wishlist_add, name='wishlist_add'),
-    path('wishlist/remove/<int:product_id>/', views.wishlist_remove, name='wishlist_remove'),
-    path('wishlist/move-to-cart/<int:product_id>/', views.wishlist_move_to_cart, name='wishlist_move_to_cart'),
+    path('wishlist/', cart_views.wishlist_view, name='wishlist'),
+    path('wishlist/add/<int:product_id>/', cart_views.wishlist_add, name='wishlist_add'),
+    path('wishlist/remove/<int:product_id>/', cart_views.wishlist_remove, name='wishlist_remove'),
+    path('wishlist/move-to-cart/<int:product_id>/', cart_views.wishlist_move_to_cart, name='wishlist_move_to_cart'),
+    path('wishlist/move-all-to-cart/', views.wishlist_move_all_to_cart, name='wishlist_move_all_to_cart'),
+    # JSON API: returns only the touched lines, totals and badge counts
+    path('api/', api.summary, name='api_summary'),
+    path('api/items/<int:product_id>/', api.cart_item, name='api_item'),
+    path('api/batch/', api.batch, name='api_batch'),
+    path('api/wishlist/<int:product_id>/', api.wishlist_item, name='api_wishlist_item'),
+    path('api/wishlist/<int:product_id>/move-to-cart/', api.wishlist_move_to_cart, name='api_wishlist_move_to_cart'),
 ]
 
@@ -2,15 +2,20 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpRequest, HttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.views.decorators.http import require_POST
 from datetime import datetime, timedelta
 import re
-from accounts.models import Address
+from accounts.services import has_address
+from analytics.rollups import record_order
 from catalog.models import Product
-
-
-SESSION_KEY = 'cart_items'
-ORDERS_KEY = 'orders'
-WISHLIST_KEY = 'wishlist_items'
+from catalog.related import record_co_purchases
+from core.db import serialized_write
+from inventory.ledger import record_movements
+from inventory.models import StockMovement
+from .badges import mark_badges_changed
+from .services import add_to_wishlist, move_wishlist_to_cart, remove_from_wishlist
+from .session_keys import ORDERS_KEY, SESSION_KEY
 
 
 def _get_cart(request: HttpRequest) -> dict:
@@ -22,15 +27,6 @@ def _save_cart(request: HttpRequest, cart: dict) -> None:
     request.session.modified = True
 
 
-def _get_wishlist(request: HttpRequest) -> dict:
-    return request.session.get(WISHLIST_KEY, {})
-
-
-def _save_wishlist(request: HttpRequest, wishlist: dict) -> None:
-    request.session[WISHLIST_KEY] = wishlist
-    request.session.modified = True
-
-
 @login_required
 def add_to_cart(request: HttpRequest, product_id: int) -> HttpResponse:
     product = get_object_or_404(Product, id=product_id)
@@ -103,7 +99,7 @@ def payment(request: HttpRequest) -> HttpResponse:
         price_f = float(p.sale_price or p.mrp or 0)
         total += price_f * qty
     # Require at least one saved address before proceeding
-    if not Address.objects.filter(user=request.user).exists():
+    if not has_address(request.user):
         messages.info(request, 'Please add a delivery address before making a payment.')
         return redirect('accounts:profile')
 
@@ -129,37 +125,52 @@ def payment(request: HttpRequest) -> HttpResponse:
         if not re.match(r'^\d{3}$', cvv):
             return render(request, 'cart/payment.html', { 'total': total, 'error': 'CVV must be exactly 3 digits.' })
 
-        # Build order and reduce stock
+        # Build order and reduce stock; re-read stock inside the write queue so
+        # concurrent checkouts see each other's decrements
         items = []
-        for p in products:
-            qty = id_to_quantity.get(p.id, 0)
-            price = float(p.sale_price or p.mrp or 0)
-            
-            # Reduce stock
-            if p.stock_quantity >= qty:
-                p.stock_quantity -= qty
-                p.save()
-            else:
-                return render(request, 'cart/payment.html', { 'total': total, 'error': f'Insufficient stock for {p.name}. Only {p.stock_quantity} available.' })
-            
-            items.append({
-                'product_id': p.id,
-                'name': p.name,
-                'quantity': qty,
-                'price': price,
-                'line_total': price * qty,
-            })
-        order = {
-            'id': int(datetime.now().timestamp()),
-            'ordered_at': datetime.now().isoformat(),
-            'arrival_date': (datetime.now() + timedelta(days=7)).date().isoformat(),
-            'paid': True,
-            'total': total,
-            'items': items,
-        }
+        movements = []
+        order_id = int(datetime.now().timestamp())
+        with serialized_write():
+            for p in Product.objects.select_for_update().filter(id__in=product_ids):
+                qty = id_to_quantity.get(p.id, 0)
+                price = float(p.sale_price or p.mrp or 0)
+
+                # Reduce stock
+                if p.stock_quantity >= qty:
+                    p.stock_quantity -= qty
+                    p.save(update_fields=['stock_quantity'])
+                    movements.append(StockMovement(
+                        product=p, kind=StockMovement.SALE, quantity=-qty, reference=f'order {order_id}',
+                    ))
+                else:
+                    transaction.set_rollback(True)
+                    return render(request, 'cart/payment.html', { 'total': total, 'error': f'Insufficient stock for {p.name}. Only {p.stock_quantity} available.' })
+
+                items.append({
+                    'product_id': p.id,
+                    'name': p.name,
+                    'quantity': qty,
+                    'price': price,
+                    'mrp': float(p.mrp or 0),
+                    'line_total': price * qty,
+                })
+            record_movements(movements)
+            order = {
+                'id': order_id,
+                'ordered_at': datetime.now().isoformat(),
+                'arrival_date': (datetime.now() + timedelta(days=7)).date().isoformat(),
+                'paid': True,
+                'total': total,
+                'items': items,
+            }
+            record_order(order)
+            record_co_purchases(item['product_id'] for item in items)
         orders = request.session.get(ORDERS_KEY, [])
         orders.insert(0, order)
         request.session[ORDERS_KEY] = orders
+        # Imported here: the mail stack is only needed once an order is placed
+        from notifications.outbox import queue_order_notifications
+        queue_order_notifications(request.user, order)
         _save_cart(request, {})
         messages.success(request, 'Payment successful! Your order has been placed.')
         return redirect('cart:orders')
@@ -194,27 +205,23 @@ def order_detail(request: HttpRequest, order_id: int) -> HttpResponse:
 # Wishlist views
 @login_required
 def wishlist_view(request: HttpRequest) -> HttpResponse:
-    wishlist = _get_wishlist(request)
-    product_ids = [int(pid) for pid in wishlist.keys()]
-    products = Product.objects.filter(id__in=product_ids)
+    products = Product.objects.filter(wishlist_items__wishlist__user=request.user).order_by('-wishlist_items__added_at')
     return render(request, 'cart/wishlist.html', { 'products': products })
 
 
 @login_required
 def wishlist_add(request: HttpRequest, product_id: int) -> HttpResponse:
     get_object_or_404(Product, id=product_id)
-    wishlist = _get_wishlist(request)
-    wishlist[str(product_id)] = 1
-    _save_wishlist(request, wishlist)
+    add_to_wishlist(request.user, [product_id])
+    mark_badges_changed(request)
     messages.success(request, 'Added to wishlist')
     return redirect('cart:wishlist')
 
 
 @login_required
 def wishlist_remove(request: HttpRequest, product_id: int) -> HttpResponse:
-    wishlist = _get_wishlist(request)
-    wishlist.pop(str(product_id), None)
-    _save_wishlist(request, wishlist)
+    remove_from_wishlist(request.user, [product_id])
+    mark_badges_changed(request)
     return redirect('cart:wishlist')
 
 
@@ -222,9 +229,8 @@ def wishlist_remove(request: HttpRequest, product_id: int) -> HttpResponse:
 def wishlist_move_to_cart(request: HttpRequest, product_id: int) -> HttpResponse:
     # Move single item from wishlist to cart (qty 1)
     get_object_or_404(Product, id=product_id)
-    wishlist = _get_wishlist(request)
-    wishlist.pop(str(product_id), None)
-    _save_wishlist(request, wishlist)
+    remove_from_wishlist(request.user, [product_id])
+    mark_badges_changed(request)
     cart = _get_cart(request)
     cart[str(product_id)] = cart.get(str(product_id), 0) + 1
     _save_cart(request, cart)
@@ -232,3 +238,18 @@ def wishlist_move_to_cart(request: HttpRequest, product_id: int) -> HttpResponse
     return redirect('cart:view')
 
 
+@login_required
+@require_POST
+def wishlist_move_all_to_cart(request: HttpRequest) -> HttpResponse:
+    # Optional product_ids narrow the move to the selected items
+    try:
+        product_ids = [int(pid) for pid in request.POST.getlist('product_ids')] or None
+    except ValueError:
+        product_ids = None
+    cart = _get_cart(request)
+    moved = move_wishlist_to_cart(request.user, cart, product_ids)
+    if moved:
+        _save_cart(request, cart)
+        mark_badges_changed(request)
+        messages.success(request, f'Moved {len(moved)} item(s) to cart')
+    return redirect('cart:view')
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Product, ProductImage
+from inventory.ledger import record_stock_edit
+from .models import Category, PriceHistory, Product, ProductImage
 
 
 @admin.register(Category)
@@ -16,12 +17,28 @@ class ProductImageInline(admin.TabularInline):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "category", "is_active", "stock_quantity", "mrp", "sale_price")
+    list_display = ("name", "category", "is_active", "stock_quantity", "mrp", "sale_price", "lowest_price_30d")
     list_filter = ("category", "is_active")
     search_fields = ("name", "slug", "description")
     prepopulated_fields = {"slug": ("name",)}
     inlines = [ProductImageInline]
-    readonly_fields = ("total_stock",)
+    readonly_fields = ("total_stock", "lowest_price_30d")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "stock_quantity" in form.changed_data:
+            record_stock_edit(obj, form.initial.get("stock_quantity", 0), reference=f"admin {request.user}")
+
+
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(admin.ModelAdmin):
+    list_display = ("product", "price", "changed_at")
+    search_fields = ("product__name",)
+    raw_id_fields = ("product",)
+    date_hierarchy = "changed_at"
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # ProductImage managed via inline on Product; no separate admin
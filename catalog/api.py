@@ -0,0 +1,225 @@
+"""Read-only JSON API over the catalog.
+
+Every resource is served from values() rows, not model instances. ?fields=
+picks the columns that get selected, ?ids= fetches a batch by primary key in one
+query, and lists page on an opaque primary-key cursor. ETags are derived from
+the catalog revision row (catalog.revision), so a client revalidating an
+unchanged catalog gets a 304 after a single one-row query, from any worker.
+"""
+import base64
+import hashlib
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET
+
+from .models import Category, Product, ProductImage, ProductVariant
+from .revision import current_revision
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class ApiError(Exception):
+    pass
+
+
+def _media_url(name):
+    return settings.MEDIA_URL + name if name else None
+
+
+def _product_url(slug):
+    return reverse('catalog:product_detail', kwargs={'slug': slug})
+
+
+@dataclass
+class Field:
+    # ORM lookup or annotation name passed to values()
+    source: str
+    transform: Optional[Callable] = None
+
+
+@dataclass
+class Resource:
+    queryset: Callable
+    fields: dict
+    default_fields: list
+    # ?<param>=a,b filters: param -> (lookup taking a list, item type or None for strings)
+    filters: dict = field(default_factory=dict)
+
+    def rows(self, params):
+        names = self._requested_fields(params.get('fields'))
+        queryset = self.queryset()
+        for param, (lookup, cast) in self.filters.items():
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: _split(params[param], param, cast)})
+
+        sources = {'pk'} | {self.fields[name].source for name in names}
+        queryset = queryset.order_by('pk').values(*sources)
+
+        if params.get('ids'):
+            ids = _split(params['ids'], 'ids')
+            if len(ids) > MAX_LIMIT:
+                raise ApiError(f'at most {MAX_LIMIT} ids per request')
+            return self._serialize(queryset.filter(pk__in=ids), names), None
+
+        limit = _limit(params.get('limit'))
+        after = _decode_cursor(params.get('cursor'))
+        page = list(queryset.filter(pk__gt=after)[:limit + 1])
+        next_cursor = _encode_cursor(page[limit - 1]['pk']) if len(page) > limit else None
+        return self._serialize(page[:limit], names), next_cursor
+
+    def _requested_fields(self, value):
+        if not value:
+            return self.default_fields
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"unknown field(s): {', '.join(unknown)}; available: {', '.join(self.fields)}")
+        return names
+
+    def _serialize(self, rows, names):
+        columns = [(name, self.fields[name].source, self.fields[name].transform) for name in names]
+        return [
+            {name: transform(row[source]) if transform else row[source] for name, source, transform in columns}
+            for row in rows
+        ]
+
+
+def _split(value, param, cast=int):
+    try:
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        return [cast(item) for item in items] if cast else items
+    except ValueError:
+        raise ApiError(f'{param} must be a comma-separated list of integers')
+
+
+def _limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+
+
+def _encode_cursor(pk) -> str:
+    return base64.urlsafe_b64encode(f'pk:{pk}'.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(value) -> int:
+    if not value:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        prefix, pk = decoded.split(':')
+        if prefix != 'pk':
+            raise ValueError
+        return int(pk)
+    except ValueError:
+        raise ApiError('invalid cursor')
+
+
+RESOURCES = {
+    'categories': Resource(
+        queryset=lambda: Category.objects.all(),
+        fields={
+            'id': Field('pk'),
+            'name': Field('name'),
+            'slug': Field('slug'),
+            'parent': Field('parent_id'),
+            'image': Field('image', _media_url),
+        },
+        default_fields=['id', 'name', 'slug', 'parent'],
+    ),
+    'products': Resource(
+        queryset=lambda: Product.objects.filter(is_active=True),
+        fields={
+            'id': Field('pk'),
+            'name': Field('name'),
+            'slug': Field('slug'),
+            'url': Field('slug', _product_url),
+            'category': Field('category_id'),
+            'category_slug': Field('category__slug'),
+            'description': Field('description'),
+            'price': Field('effective_price'),
+            'mrp': Field('mrp'),
+            'sale_price': Field('sale_price'),
+            'lowest_price_30d': Field('lowest_price_30d'),
+            'stock': Field('stock_quantity'),
+            'thumbnail': Field('thumbnail', _media_url),
+        },
+        default_fields=['id', 'name', 'slug', 'category', 'price', 'mrp', 'sale_price', 'stock'],
+        filters={'category': ('category__slug__in', None)},
+    ),
+    'variants': Resource(
+        queryset=lambda: ProductVariant.objects.filter(product__is_active=True),
+        fields={
+            'id': Field('pk'),
+            'product': Field('product_id'),
+            'sku': Field('sku'),
+            'grams': Field('unit_size_grams'),
+            'mrp': Field('mrp'),
+            'sale_price': Field('sale_price'),
+        },
+        default_fields=['id', 'product', 'sku', 'grams', 'mrp', 'sale_price'],
+        filters={'product': ('product_id__in', int)},
+    ),
+    'images': Resource(
+        queryset=lambda: ProductImage.objects.filter(product__is_active=True),
+        fields={
+            'id': Field('pk'),
+            'product': Field('product_id'),
+            'url': Field('image', _media_url),
+            'alt_text': Field('alt_text'),
+            'is_primary': Field('is_primary'),
+        },
+        default_fields=['id', 'product', 'url', 'alt_text', 'is_primary'],
+        filters={'product': ('product_id__in', int)},
+    ),
+    # One row per product, grouped in SQL; ids= and the cursor refer to product ids
+    'review-summaries': Resource(
+        queryset=lambda: Product.objects.filter(is_active=True).annotate(
+            review_count=Count('reviews'),
+            average_rating=Avg('reviews__rating'),
+            **{f'stars_{n}': Count('reviews', filter=Q(reviews__rating=n)) for n in range(1, 6)},
+        ),
+        fields={
+            'product': Field('pk'),
+            'count': Field('review_count'),
+            'average': Field('average_rating', lambda value: round(value, 2) if value is not None else None),
+            **{f'stars_{n}': Field(f'stars_{n}') for n in range(1, 6)},
+        },
+        default_fields=['product', 'count', 'average'],
+    ),
+}
+
+
+def _etag(request, resource):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()[:16]
+    return f'{current_revision()}-{digest}'
+
+
+@require_GET
+@condition(etag_func=_etag)
+def resource_list(request, resource):
+    spec = RESOURCES.get(resource)
+    if spec is None:
+        return JsonResponse({'error': f'unknown resource {resource}'}, status=404)
+    try:
+        data, next_cursor = spec.rows(request.GET)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    body = {'data': data}
+    if not request.GET.get('ids'):
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        body['next'] = f'{request.path}?{params.urlencode()}' if next_cursor else None
+    response = JsonResponse(body)
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
@@ -0,0 +1,76 @@
+"""Async counterparts of the catalog read views, routed when settings.ASYNC_VIEWS is on.
+
+Queries go through the async ORM and the cache through its async API. Template
+rendering stays sync (context processors and templates may touch the ORM lazily),
+so it runs in a worker thread via sync_to_async.
+"""
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render
+
+from . import views
+from .facets import aget_facets
+from .models import Category, Product, Review
+from .forms import ReviewForm
+from .views import apply_facets, filter_products
+
+
+async def product_list(request):
+    products = [p async for p in filter_products(request.GET)]
+    facets = await aget_facets(request.GET)
+    categories = [c async for c in Category.objects.all()]
+    apply_facets(request, categories, facets)
+    context = {
+        'products': products,
+        'categories': categories,
+        'facets': facets,
+        'active_category': request.GET.get('category'),
+    }
+    return await sync_to_async(render)(request, 'catalog/product_list.html', context)
+
+
+async def product_detail(request, slug):
+    if request.method == 'POST':
+        # Review submission writes through the serialized write queue; keep it sync
+        return await sync_to_async(views.product_detail)(request, slug)
+
+    product = await aget_object_or_404(
+        Product.objects.select_related('category').prefetch_related('images', 'reviews__user'),
+        slug=slug,
+        is_active=True,
+    )
+    images = list(product.images.all())
+    if product.thumbnail and not any(img.image.name == product.thumbnail.name for img in images):
+        images.insert(0, type('Thumb', (), {'image': product.thumbnail, 'alt_text': product.name})())
+
+    related = [
+        entry.related
+        async for entry in product.related_entries.filter(related__is_active=True).select_related('related__category')[:8]
+    ]
+    if not related:
+        related = [
+            p async for p in Product.objects.filter(is_active=True, category=product.category)
+            .exclude(pk=product.pk)
+            .select_related('category')[:8]
+        ]
+
+    # Reviews are prefetched; aggregate them here instead of two more queries
+    reviews = product.reviews.all()
+    ratings = [r.rating for r in reviews]
+    avg_rating = sum(ratings) / len(ratings) if ratings else 0
+
+    user = await request.auser()
+    user_review = None
+    if user.is_authenticated:
+        user_review = await Review.objects.filter(product=product, user=user).afirst()
+
+    context = {
+        'product': product,
+        'images': images,
+        'related': related,
+        'reviews': reviews,
+        'avg_rating': avg_rating,
+        'review_count': len(ratings),
+        'form': ReviewForm(),
+        'user_review': user_review,
+    }
+    return await sync_to_async(render)(request, 'catalog/product_detail.html', context)
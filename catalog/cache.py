@@ -0,0 +1,34 @@
+import time
+
+from django.core.cache import cache
+
+
+VERSION_KEY = 'catalog:version'
+
+
+def _new_version() -> int:
+    # A fresh clock reading rather than a counter: if the key is evicted or the
+    # cache is emptied, the replacement can't repeat a version that old cache
+    # keys or client ETags were built on
+    return time.time_ns()
+
+
+def catalog_version() -> int:
+    """Current catalog generation; cache keys built on it go stale when it moves."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acatalog_version() -> int:
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _new_version(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    cache.set(VERSION_KEY, _new_version(), timeout=None)
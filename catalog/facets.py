@@ -0,0 +1,111 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .cache import acatalog_version, catalog_version
+from .models import Product
+
+
+# (label, min, max) — max is exclusive, None means open-ended
+PRICE_BANDS = [
+    ('Under ₹100', None, 100),
+    ('₹100 – ₹199', 100, 200),
+    ('₹200 – ₹299', 200, 300),
+    ('₹300 & above', 300, None),
+]
+
+FACET_CACHE_TIMEOUT = 60 * 15
+
+_FACET_PARAMS = ('q', 'category', 'price_min', 'price_max', 'on_sale')
+
+
+def _signature(params) -> str:
+    normalized = '&'.join(f'{key}={(params.get(key) or "").strip().lower()}' for key in _FACET_PARAMS)
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def _band_q(low, high) -> Q:
+    q = Q()
+    if low is not None:
+        q &= Q(effective_price__gte=low)
+    if high is not None:
+        q &= Q(effective_price__lt=high)
+    return q
+
+
+def _count(q: Q) -> Count:
+    return Count('id', filter=q or None)
+
+
+def compute_facets(params) -> dict:
+    """Count every facet value for the current filters in one grouped query.
+
+    Each facet ignores its own selection (so picking a category still shows the
+    other categories' counts) but honours the rest. Rows are grouped by category
+    with one conditional COUNT per facet; category selection is applied when
+    summing the rows here.
+    """
+    q = params.get('q')
+    category_slug = params.get('category')
+    price_min = params.get('price_min')
+    price_max = params.get('price_max')
+
+    base = Product.objects.filter(is_active=True)
+    if q:
+        base = base.filter(Q(name__icontains=q) | Q(description__icontains=q))
+
+    price_q = Q()
+    if price_min:
+        price_q &= Q(effective_price__gte=price_min)
+    if price_max:
+        price_q &= Q(effective_price__lte=price_max)
+    sale_q = Q(sale_price__isnull=False) if params.get('on_sale') == '1' else Q()
+
+    aggregates = {
+        'matching': _count(price_q & sale_q),
+        'on_sale': _count(price_q & Q(sale_price__isnull=False)),
+    }
+    for index, (_, low, high) in enumerate(PRICE_BANDS):
+        aggregates[f'band_{index}'] = _count(_band_q(low, high) & sale_q)
+
+    rows = base.order_by().values('category__slug').annotate(**aggregates)
+
+    facets = {
+        'categories': {},
+        'price_bands': [
+            {'label': label, 'min': low, 'max': high, 'count': 0} for label, low, high in PRICE_BANDS
+        ],
+        'on_sale': 0,
+        'total': 0,
+    }
+    for row in rows:
+        facets['categories'][row['category__slug']] = row['matching']
+        if category_slug and row['category__slug'] != category_slug:
+            continue
+        facets['total'] += row['matching']
+        facets['on_sale'] += row['on_sale']
+        for index, band in enumerate(facets['price_bands']):
+            band['count'] += row[f'band_{index}']
+    return facets
+
+
+def get_facets(params) -> dict:
+    """Facet counts for params, cached per filter signature and catalog version."""
+    key = f'catalog:facets:{catalog_version()}:{_signature(params)}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(params)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
+
+
+async def aget_facets(params) -> dict:
+    """Async get_facets: the cache round trips are awaited, only a miss touches a thread."""
+    key = f'catalog:facets:{await acatalog_version()}:{_signature(params)}'
+    facets = await cache.aget(key)
+    if facets is None:
+        facets = await sync_to_async(compute_facets)(params)
+        await cache.aset(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
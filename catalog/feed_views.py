@@ -0,0 +1,78 @@
+"""Sitemap index, sitemap shards and merchant feeds served from the gzipped shard cache."""
+import gzip
+from xml.sax.saxutils import escape
+
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+
+from .feeds import FORMATS, MERCHANT_HEADERS, feed_setting, open_shard, shards
+
+
+READ_SIZE = 64 * 1024
+
+
+def _accepts_gzip(request) -> bool:
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+
+def _read(stream, decompress):
+    with stream, (gzip.GzipFile(fileobj=stream) if decompress else stream) as source:
+        while chunk := source.read(READ_SIZE):
+            yield chunk
+
+
+def _members(fmt, shard_numbers, compressed):
+    """The merchant document as gzip members (header, each shard, footer), or as plain bytes."""
+    header, footer = MERCHANT_HEADERS[fmt]
+    yield gzip.compress(header.encode()) if compressed else header.encode()
+    for shard in shard_numbers:
+        yield from _read(open_shard(fmt, shard), decompress=not compressed)
+    if footer:
+        yield gzip.compress(footer.encode()) if compressed else footer.encode()
+
+
+def _gzip_response(response, request, content_type):
+    response['Content-Type'] = f'{content_type}; charset=utf-8'
+    if _accepts_gzip(request):
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@require_GET
+def sitemap_index(request):
+    base = feed_setting('BASE_URL').rstrip('/')
+    entries = ''.join(
+        f"<sitemap><loc>{escape(base + reverse('sitemap_shard', args=[shard]))}</loc></sitemap>\n"
+        for shard in shards()
+    )
+    body = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f'{entries}</sitemapindex>\n'
+    )
+    return StreamingHttpResponse([body], content_type='application/xml; charset=utf-8')
+
+
+@require_GET
+def sitemap_shard(request, shard):
+    if shard not in shards():
+        raise Http404('No such sitemap')
+    # Opened up front: a rebuild for a newer token may remove the file, but not an open handle
+    stream = open_shard('sitemap', shard)
+    if _accepts_gzip(request):
+        response = FileResponse(stream)
+    else:
+        response = StreamingHttpResponse(_read(stream, decompress=True))
+    return _gzip_response(response, request, FORMATS['sitemap'][2])
+
+
+@require_GET
+def merchant_feed(request, extension):
+    fmt = f'merchant-{extension}'
+    if fmt not in MERCHANT_HEADERS:
+        raise Http404('No such feed')
+    response = StreamingHttpResponse(_members(fmt, shards(), compressed=_accepts_gzip(request)))
+    return _gzip_response(response, request, FORMATS[fmt][2])
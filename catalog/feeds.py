@@ -0,0 +1,265 @@
+"""Sitemap and merchant feed shards, built by streaming the catalog and cached gzipped on disk.
+
+Products are split into shards by primary key (pk // SHARD_SIZE), so a product
+never moves between shards and each sitemap shard stays under the 50,000 URL
+limit. Every shard has a token per kind of feed in CACHE_DIR/<kind>-<shard>.stamp;
+the sitemap and the merchant feeds have separate tokens because a sitemap holds
+no prices or stock. Built files carry the token they were built under, and a
+product change writes a new token. The next request then misses and rebuilds
+only that shard. A change that lands while a shard is being built also gets a
+new token, so the half-stale file is never served.
+"""
+import csv
+import gzip
+import io
+import os
+import uuid
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+from django.urls import reverse
+
+from .models import Product, ProductImage
+
+
+DEFAULTS = {
+    # Absolute URLs in the feeds are built on this, not on the request's host
+    'BASE_URL': 'http://localhost:8000',
+    'CACHE_DIR': None,
+    # Sitemap protocol limit is 50,000 URLs per file
+    'SHARD_SIZE': 50000,
+    'CHUNK_SIZE': 2000,
+    'CURRENCY': 'INR',
+}
+
+
+def feed_setting(name):
+    return getattr(settings, 'FEEDS', {}).get(name, DEFAULTS[name])
+
+
+def cache_dir() -> Path:
+    return Path(feed_setting('CACHE_DIR') or Path(settings.BASE_DIR) / 'feed_cache')
+
+
+def shard_of(product_id: int) -> int:
+    return product_id // feed_setting('SHARD_SIZE')
+
+
+def shards():
+    """Shard numbers that contain at least one active product."""
+    return list(
+        Product.objects.filter(is_active=True)
+        .annotate(shard=F('pk') / feed_setting('SHARD_SIZE'))
+        .order_by('shard').values_list('shard', flat=True).distinct()
+    )
+
+
+def shard_products(shard: int):
+    """Active products of a shard with their primary image, streamed in chunks."""
+    size = feed_setting('SHARD_SIZE')
+    image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('-is_primary', '-created_at')
+    return (
+        Product.objects.filter(is_active=True, pk__gte=shard * size, pk__lt=(shard + 1) * size)
+        .order_by('pk')
+        .annotate(primary_image=Subquery(image.values('image')[:1]))
+        .values_list(
+            'pk', 'name', 'slug', 'description', 'mrp', 'sale_price', 'effective_price', 'stock_quantity',
+            'category__name', 'thumbnail', 'primary_image',
+        )
+        .iterator(chunk_size=feed_setting('CHUNK_SIZE'))
+    )
+
+
+class _Links:
+    """Absolute product and image URLs without a reverse() per product."""
+
+    def __init__(self):
+        base = feed_setting('BASE_URL').rstrip('/')
+        marker = 'feed-slug-marker'
+        self.product_prefix, self.product_suffix = (
+            base + reverse('catalog:product_detail', kwargs={'slug': marker})
+        ).split(marker)
+        media = settings.MEDIA_URL
+        self.media = media if media.startswith(('http://', 'https://')) else base + '/' + media.lstrip('/')
+
+    def product(self, slug):
+        return f'{self.product_prefix}{slug}{self.product_suffix}'
+
+    def image(self, thumbnail, primary_image):
+        name = primary_image or thumbnail
+        return self.media + name if name else ''
+
+
+def _chunked(lines, size=256):
+    """Join lines into larger byte chunks so the gzip writer isn't called per line."""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield ''.join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def sitemap_shard(shard):
+    links = _Links()
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for _, _, slug, *_ in shard_products(shard):
+        yield f'<url><loc>{escape(links.product(slug))}</loc></url>\n'
+    yield '</urlset>\n'
+
+
+def _money(value):
+    return f"{value:.2f} {feed_setting('CURRENCY')}"
+
+
+def _merchant_rows(shard):
+    links = _Links()
+    for pk, name, slug, description, mrp, sale_price, _, stock, category, thumbnail, image in shard_products(shard):
+        yield {
+            'id': pk,
+            'title': name,
+            'description': ' '.join((description or name).split())[:5000],
+            'link': links.product(slug),
+            'image_link': links.image(thumbnail, image),
+            'availability': 'in_stock' if stock > 0 else 'out_of_stock',
+            'price': _money(mrp),
+            'sale_price': _money(sale_price) if sale_price is not None else '',
+            'product_type': category,
+        }
+
+
+MERCHANT_COLUMNS = [
+    'id', 'title', 'description', 'link', 'image_link', 'availability', 'price', 'sale_price', 'product_type',
+]
+
+
+def merchant_csv_shard(shard):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in _merchant_rows(shard):
+        writer.writerow([row[column] for column in MERCHANT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def merchant_xml_shard(shard):
+    for row in _merchant_rows(shard):
+        fields = ''.join(
+            f'<g:{column}>{escape(str(row[column]))}</g:{column}>'
+            for column in MERCHANT_COLUMNS if row[column] != ''
+        )
+        yield f'<item>{fields}</item>\n'
+
+
+# format: (shard lines, file extension, content type)
+FORMATS = {
+    'sitemap': (sitemap_shard, 'xml', 'application/xml'),
+    'merchant-csv': (merchant_csv_shard, 'csv', 'text/csv'),
+    'merchant-xml': (merchant_xml_shard, 'xml', 'application/xml'),
+}
+
+# Merchant feeds are one document: shards are gzip members between these
+MERCHANT_HEADERS = {
+    'merchant-csv': (','.join(MERCHANT_COLUMNS) + '\r\n', ''),
+    'merchant-xml': (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0"><channel>\n'
+        '<title>Masala Story</title>\n',
+        '</channel></rss>\n',
+    ),
+}
+
+
+# Token kinds: the sitemap only changes with slugs and active flags, the merchant feeds with any field
+KINDS = ('sitemap', 'merchant')
+
+
+def kind_of(fmt) -> str:
+    return 'sitemap' if fmt == 'sitemap' else 'merchant'
+
+
+def _stamp_path(kind, shard) -> Path:
+    return cache_dir() / f'{kind}-{shard}.stamp'
+
+
+def shard_token(fmt, shard) -> str:
+    try:
+        return _stamp_path(kind_of(fmt), shard).read_text()
+    except FileNotFoundError:
+        return '0'
+
+
+def invalidate_shard(shard, kinds=KINDS) -> None:
+    """Give the shard new tokens; its cached files of those kinds stop being served."""
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    for kind in kinds:
+        tmp = directory / f'{kind}-{shard}.stamp.{uuid.uuid4().hex}'
+        tmp.write_text(uuid.uuid4().hex)
+        os.replace(tmp, _stamp_path(kind, shard))
+
+
+def invalidate_all(kinds=KINDS) -> None:
+    directory = cache_dir()
+    cached = {int(path.stem.rsplit('-', 1)[1]) for path in directory.glob('*-*.stamp')}
+    cached |= {int(path.name.split('.')[0].rsplit('-', 2)[1]) for path in directory.glob('*.gz')}
+    for shard in cached:
+        invalidate_shard(shard, kinds)
+
+
+def _path(fmt, shard, token) -> Path:
+    return cache_dir() / f'{fmt}-{shard}-{token}.{FORMATS[fmt][1]}.gz'
+
+
+def shard_file(fmt, shard) -> Path:
+    """Path of the gzipped shard for the current token, built first if missing."""
+    lines, extension, _ = FORMATS[fmt]
+    path = _path(fmt, shard, shard_token(fmt, shard))
+    if path.exists():
+        return path
+
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f'.{path.name}.{uuid.uuid4().hex}'
+    with gzip.open(tmp, 'wb', compresslevel=6) as out:
+        for chunk in _chunked(lines(shard)):
+            out.write(chunk)
+    os.replace(tmp, path)
+    # A concurrent builder may have finished the file for a newer token meanwhile; keep
+    # that one and our own, which the caller is about to open
+    keep = {path, _path(fmt, shard, shard_token(fmt, shard))}
+    for stale in directory.glob(f'{fmt}-{shard}-*.{extension}.gz'):
+        if stale not in keep:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def open_shard(fmt, shard, attempts=3):
+    """The gzipped shard opened for reading.
+
+    Another builder can remove a superseded file between shard_file() returning
+    its path and the open; the token has moved on by then, so build again.
+    """
+    for attempt in range(attempts):
+        try:
+            return open(shard_file(fmt, shard), 'rb')
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+
+def build_all(formats=None) -> int:
+    """Build every missing shard file; returns how many were built."""
+    built = 0
+    for shard in shards():
+        for fmt in formats or FORMATS:
+            if not _path(fmt, shard, shard_token(fmt, shard)).exists():
+                shard_file(fmt, shard)
+                built += 1
+    return built
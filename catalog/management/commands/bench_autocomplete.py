@@ -0,0 +1,43 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.models import Product
+from catalog.search_index import index
+
+
+class Command(BaseCommand):
+    help = "Benchmark autocomplete prefix lookups against the in-memory index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lookups", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index.build()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        names = list(Product.objects.filter(is_active=True).values_list("name", flat=True)) or ["spice"]
+        rng = random.Random(options["seed"])
+        prefixes = []
+        for _ in range(options["lookups"]):
+            word = rng.choice(rng.choice(names).lower().split() or ["spice"])
+            prefixes.append(word[: rng.randint(1, max(1, len(word)))])
+
+        timings = []
+        started = time.perf_counter()
+        for prefix in prefixes:
+            t0 = time.perf_counter()
+            index.lookup(prefix)
+            timings.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1e6
+        p99 = timings[int(len(timings) * 0.99)] * 1e6
+        self.stdout.write(f"Index built in {build_ms:.1f} ms over {len(names)} products")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(prefixes) / elapsed:,.0f} lookups/s  p50 {p50:.1f} µs  p99 {p99:.1f} µs"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from catalog.feeds import FORMATS, KINDS, build_all, invalidate_all, kind_of
+
+
+class Command(BaseCommand):
+    help = "Build the gzipped sitemap and merchant feed shards that are missing or out of date"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="formats", action="append", choices=list(FORMATS))
+        parser.add_argument("--force", action="store_true", help="Rebuild every shard")
+
+    def handle(self, *args, **options):
+        if options["force"]:
+            formats = options["formats"]
+            invalidate_all(sorted({kind_of(fmt) for fmt in formats}) if formats else KINDS)
+        built = build_all(options["formats"])
+        self.stdout.write(self.style.SUCCESS(f"Built {built} feed shard files"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from catalog.price_history import WINDOW_DAYS, refresh_price_lows
+
+
+class Command(BaseCommand):
+    help = "Recompute every product's lowest price over the last 30 days from the price history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=WINDOW_DAYS)
+
+    def handle(self, *args, **options):
+        updated = refresh_price_lows(batch_size=options["batch_size"], days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the {options['days']}-day low of {updated} products"))
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from catalog.models import Product
+from catalog.related import TOP_K, dirty_product_ids, rebuild_co_purchases, refresh_related
+
+
+class Command(BaseCommand):
+    help = "Recompute related products whose co-purchase or wishlist data changed (every product with --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Recount co-purchases from stored orders and rebuild neighbours for every active product",
+        )
+        parser.add_argument(
+            "--max-age-hours", type=float, default=None,
+            help="Also refresh neighbours older than this (picks up catalog edits and removals)",
+        )
+        parser.add_argument("--limit", type=int, default=None, help="Refresh at most this many products per run")
+        parser.add_argument("--top-k", type=int, default=TOP_K)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            pairs = rebuild_co_purchases()
+            self.stdout.write(f"Recounted {pairs} co-purchase pairs")
+            product_ids = list(Product.objects.filter(is_active=True).order_by("pk").values_list("pk", flat=True))
+        else:
+            max_age = options["max_age_hours"]
+            product_ids = dirty_product_ids(
+                max_age=timedelta(hours=max_age) if max_age is not None else None, limit=options["limit"],
+            )
+
+        if not product_ids:
+            self.stdout.write("Related products are up to date")
+            return
+
+        written = refresh_related(product_ids, top_k=options["top_k"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(product_ids)} products; stored {written} neighbours"))
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def seed_price_history(apps, schema_editor):
+    """Start each product's history at its current price, which is also its 30-day low so far."""
+    Product = apps.get_model('catalog', 'Product')
+    PriceHistory = apps.get_model('catalog', 'PriceHistory')
+    rows = Product.objects.order_by('pk').values_list('pk', 'effective_price')
+    PriceHistory.objects.bulk_create(
+        (PriceHistory(product_id=pk, price=price) for pk, price in rows.iterator()),
+        batch_size=1000,
+    )
+    Product.objects.update(lowest_price_30d=F('effective_price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_product_lowest_price_30d_pricehistory'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_price_history, migrations.RunPython.noop),
+    ]
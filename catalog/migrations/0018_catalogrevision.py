@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0017_copurchase'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 from django.templatetags.static import static
 from django.conf import settings
@@ -13,6 +16,9 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name'], name='category_name_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -61,6 +67,34 @@ class Product(models.Model):
     stock_quantity = models.PositiveIntegerField(default=0)
     mrp = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     sale_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Stored so listings can filter and sort on the price shoppers actually pay via an index
+    effective_price = models.GeneratedField(
+        expression=Coalesce('sale_price', 'mrp'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
+    # Lowest effective price of the last 30 days, refreshed by refresh_price_lows
+    lowest_price_30d = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # product_list always filters is_active, optionally by category, and sorts
+            # by name or price; partial indexes keep inactive rows out entirely
+            models.Index(fields=['name'], condition=Q(is_active=True), name='product_active_name_idx'),
+            models.Index(fields=['effective_price'], condition=Q(is_active=True), name='product_active_price_idx'),
+            models.Index(fields=['category', 'name'], condition=Q(is_active=True), name='product_cat_active_name_idx'),
+            models.Index(
+                fields=['category', 'effective_price'],
+                condition=Q(is_active=True),
+                name='product_cat_active_price_idx',
+            ),
+            # on_sale=1 only ever touches discounted rows
+            models.Index(
+                fields=['effective_price'],
+                condition=Q(is_active=True, sale_price__isnull=False),
+                name='product_on_sale_price_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -71,6 +105,44 @@ class Product(models.Model):
     def get_effective_price(self):
         return self.sale_price if self.sale_price is not None else self.mrp
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save can tell whether the price changed (see record_price_change)
+        if 'mrp' in field_names and 'sale_price' in field_names:
+            instance._loaded_price = instance.get_effective_price()
+        # And whether it sold out or came back (see invalidate_catalog_caches)
+        if 'stock_quantity' in field_names:
+            instance._loaded_stock = instance.stock_quantity
+        return instance
+
+    @property
+    def is_lowest_price_30d(self) -> bool:
+        """On sale at (or below) the lowest price of the last 30 days."""
+        return (
+            self.sale_price is not None
+            and self.lowest_price_30d is not None
+            and self.get_effective_price() <= self.lowest_price_30d
+        )
+
+
+class PriceHistory(models.Model):
+    """A product's effective price from changed_at until its next row; written only on change."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_history')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-changed_at']
+        verbose_name_plural = 'Price history'
+        indexes = [
+            models.Index(fields=['product', '-changed_at'], name='price_history_product_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product} ₹{self.price} from {self.changed_at:%Y-%m-%d}"
+
 
 class ProductVariant(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='variants')
@@ -132,6 +204,9 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ('product', 'user')
+        indexes = [
+            models.Index(fields=['product', '-created_at'], name='review_product_recent_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} - {self.product.name} ({self.rating} stars)"
@@ -140,3 +215,48 @@ class Review(models.Model):
         """Return HTML for star rating display"""
         stars = '★' * self.rating + '☆' * (5 - self.rating)
         return stars
+
+
+class RelatedProduct(models.Model):
+    """Precomputed top-K neighbours of a product, rebuilt by refresh_related_products."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='related_product_rank_uniq'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} → {self.related_id} (#{self.rank})"
+
+
+class CoPurchase(models.Model):
+    """Orders containing both products; stored in both directions so either side is an indexed lookup."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchases')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'other'], name='co_purchase_pair_uniq'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} + {self.other_id} ×{self.count}"
+
+
+class CatalogRevision(models.Model):
+    """Single row counting committed catalog writes; the catalog API's ETags are built on it."""
+
+    revision = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"Catalog revision {self.revision}"
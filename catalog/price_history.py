@@ -0,0 +1,51 @@
+"""Rolling lowest price per product, precomputed from PriceHistory.
+
+A product's lowest price over the window is the minimum of the prices that
+started inside it and the price already in effect when it opened. Both come
+from the (product, -changed_at) index. The result is written to
+Product.lowest_price_30d so listings can show the badge without a query.
+"""
+from datetime import timedelta
+
+from django.db.models import Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from core.db import serialized_write
+from .cache import bump_catalog_version
+from .models import PriceHistory, Product
+from .revision import bump_revision
+
+
+WINDOW_DAYS = 30
+
+
+def lowest_price_expression(since):
+    history = PriceHistory.objects.filter(product=OuterRef('pk'))
+    in_window = Subquery(
+        history.filter(changed_at__gte=since).order_by().values('product').annotate(low=Min('price')).values('low')
+    )
+    carried_in = Subquery(history.filter(changed_at__lt=since).order_by('-changed_at').values('price')[:1])
+    # LEAST is NULL if either side is; each side falls back to the other
+    return Least(Coalesce(in_window, carried_in), Coalesce(carried_in, in_window))
+
+
+def refresh_price_lows(batch_size: int = 5000, days: int = WINDOW_DAYS) -> int:
+    """Recompute lowest_price_30d for every product, batch_size products per UPDATE."""
+    since = timezone.now() - timedelta(days=days)
+    pks = Product.objects.order_by('pk').values_list('pk', flat=True)
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(pks.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+        with serialized_write():
+            updated += Product.objects.filter(pk__gte=batch[0], pk__lte=last_pk).update(
+                lowest_price_30d=lowest_price_expression(since),
+            )
+            bump_revision()
+    # One bump for the whole run; the badge shows on cached listing and detail pages
+    bump_catalog_version()
+    return updated
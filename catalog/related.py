@@ -0,0 +1,247 @@
+"""Offline similarity scoring for the "Related Products" strip on product_detail.
+
+Scores combine shared category, co-purchases from orders, co-wishlisting and
+shared description terms. The top-K neighbours per product are stored in
+RelatedProduct so the detail page reads one indexed row set.
+
+Co-purchase counts are kept in CoPurchase, incremented at checkout, so a
+refresh only rescores products whose pairs or wishlists changed after their
+neighbours were computed, and never decodes sessions. A full rebuild
+recounts them from the orders stored in sessions.
+"""
+import heapq
+import re
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+
+from cart.models import WishlistItem
+from cart.session_keys import ORDERS_KEY
+from core.db import serialized_write
+from .models import CoPurchase, Product, RelatedProduct
+
+
+TOP_K = 8
+
+CATEGORY_WEIGHT = 1.0
+CO_PURCHASE_WEIGHT = 3.0
+CO_WISHLIST_WEIGHT = 1.5
+TERM_WEIGHT = 2.0
+
+# Terms shared by more than this fraction of products carry no signal
+MAX_TERM_DOC_FRACTION = 0.5
+
+_WORD_RE = re.compile(r'[a-z]{3,}')
+_STOPWORDS = frozenset('''
+    and the for with from this that your our are has have its into per best most very
+    all any but can each more such than then them they will rich fresh premium
+'''.split())
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD_RE.findall((text or '').lower()) if w not in _STOPWORDS}
+
+
+def _pairs(product_ids):
+    ids = sorted(set(product_ids))
+    return combinations(ids, 2)
+
+
+def _directed(pairs):
+    for a, b in pairs:
+        yield a, b
+        yield b, a
+
+
+def record_co_purchases(product_ids) -> None:
+    """Count one order's products as bought together.
+
+    Call inside the checkout's serialized_write() block, like
+    analytics.rollups.record_order, so no other writer can insert the same pair
+    between the UPDATE and the INSERT.
+    """
+    ids = sorted({pid for pid in product_ids if pid})
+    if len(ids) < 2:
+        return
+    pairs = CoPurchase.objects.filter(product_id__in=ids, other_id__in=ids)
+    existing = set(pairs.values_list('product_id', 'other_id'))
+    pairs.update(count=F('count') + 1, updated_at=timezone.now())
+    CoPurchase.objects.bulk_create([
+        CoPurchase(product_id=a, other_id=b, count=1)
+        for a, b in _directed(_pairs(ids)) if (a, b) not in existing
+    ])
+
+
+def rebuild_co_purchases(chunk_size: int = 500) -> int:
+    """Recount CoPurchase from every order stored in a live session; returns pairs stored."""
+    counts = Counter()
+    store = SessionStore()
+    sessions = Session.objects.filter(expire_date__gt=timezone.now()).values_list('session_data', flat=True)
+    for data in sessions.iterator(chunk_size=chunk_size):
+        for order in store.decode(data).get(ORDERS_KEY) or []:
+            counts.update(_pairs(item.get('product_id') for item in order.get('items', []) if item.get('product_id')))
+    known = set(Product.objects.filter(pk__in={pid for pair in counts for pid in pair}).values_list('pk', flat=True))
+    rows = []
+    for (a, b), count in counts.items():
+        if a in known and b in known:
+            rows.append(CoPurchase(product_id=a, other_id=b, count=count))
+            rows.append(CoPurchase(product_id=b, other_id=a, count=count))
+    with serialized_write():
+        CoPurchase.objects.all().delete()
+        CoPurchase.objects.bulk_create(rows, batch_size=chunk_size)
+    return len(rows)
+
+
+def co_purchase_counts(product_ids):
+    """{product_id: {other_id: orders}} for the given products."""
+    neighbours = defaultdict(dict)
+    rows = CoPurchase.objects.filter(product_id__in=product_ids).values_list('product_id', 'other_id', 'count')
+    for pid, other, count in rows:
+        neighbours[pid][other] = count
+    return neighbours
+
+
+def co_wishlist_counts(product_ids):
+    """{product_id: {other_id: wishlists}}, read only from wishlists holding one of the products."""
+    wishlists = WishlistItem.objects.filter(product_id__in=product_ids).values('wishlist_id')
+    items = (
+        WishlistItem.objects.filter(wishlist_id__in=wishlists)
+        .order_by('wishlist_id').values_list('wishlist_id', 'product_id')
+    )
+    wanted = set(product_ids)
+    neighbours = defaultdict(Counter)
+    for _, rows in groupby(items.iterator(chunk_size=2000), key=lambda row: row[0]):
+        for a, b in _directed(_pairs(product_id for _, product_id in rows)):
+            if a in wanted:
+                neighbours[a][b] += 1
+    return neighbours
+
+
+class _Catalog:
+    """Category and scoring terms of every active product, loaded once per refresh.
+
+    Category and term candidates need the whole active catalog (term document
+    frequencies included); co-occurrence is only read for the products scored.
+    """
+
+    def __init__(self):
+        rows = Product.objects.filter(is_active=True).values_list('id', 'category_id', 'name', 'description')
+        self.category_of = {}
+        self.terms_of = {}
+        self.by_category = defaultdict(set)
+        by_term = defaultdict(set)
+        for pid, category_id, name, description in rows.iterator(chunk_size=2000):
+            self.category_of[pid] = category_id
+            self.terms_of[pid] = _terms(f'{name} {description}')
+            self.by_category[category_id].add(pid)
+            for term in self.terms_of[pid]:
+                by_term[term].add(pid)
+        max_df = max(2, int(len(self.category_of) * MAX_TERM_DOC_FRACTION))
+        self.by_term = {term: ids for term, ids in by_term.items() if len(ids) <= max_df}
+
+
+def score_products(product_ids, top_k: int = TOP_K, catalog=None):
+    """Return {product_id: [(score, related_id), ...]} for the given products."""
+    product_ids = list(product_ids)
+    catalog = catalog or _Catalog()
+    category_of, terms_of = catalog.category_of, catalog.terms_of
+    by_category, by_term = catalog.by_category, catalog.by_term
+
+    purchased_with = co_purchase_counts(product_ids)
+    wishlisted_with = co_wishlist_counts(product_ids)
+
+    results = {}
+    for pid in product_ids:
+        if pid not in category_of:
+            results[pid] = []
+            continue
+        own_terms = terms_of[pid] & by_term.keys()
+        candidates = set(by_category[category_of[pid]])
+        candidates.update(purchased_with.get(pid, ()))
+        candidates.update(wishlisted_with.get(pid, ()))
+        for term in own_terms:
+            candidates.update(by_term[term])
+        candidates.discard(pid)
+
+        scored = []
+        for other in candidates:
+            if other not in category_of:
+                continue
+            score = CATEGORY_WEIGHT if category_of[other] == category_of[pid] else 0.0
+            score += CO_PURCHASE_WEIGHT * purchased_with.get(pid, {}).get(other, 0)
+            score += CO_WISHLIST_WEIGHT * wishlisted_with.get(pid, {}).get(other, 0)
+            other_terms = terms_of[other] & by_term.keys()
+            union = own_terms | other_terms
+            if union:
+                score += TERM_WEIGHT * len(own_terms & other_terms) / len(union)
+            if score > 0:
+                scored.append((score, other))
+        # Ties broken by lower id so reruns are stable
+        results[pid] = heapq.nlargest(top_k, scored, key=lambda s: (s[0], -s[1]))
+    return results
+
+
+def _computed_at(product_ref):
+    # Every row of a product's set is written together; rank 0 is one unique-index lookup
+    return Subquery(RelatedProduct.objects.filter(product=OuterRef(product_ref), rank=0).values('computed_at')[:1])
+
+
+def dirty_product_ids(max_age=None, limit=None):
+    """Active products whose neighbours are missing or predate new co-occurrence data.
+
+    A product is dirty when it has no neighbours yet (products that scored none
+    are retried every run), when one of its CoPurchase
+    pairs was counted after its neighbours were computed, or when a wishlist
+    holding it gained an item since then. Removals (wishlist deletions, expired
+    sessions) are not tracked; pass max_age to also refresh sets older than that.
+    """
+    active = Product.objects.filter(is_active=True)
+    dirty = set(active.filter(related_entries__isnull=True).values_list('pk', flat=True))
+    dirty.update(
+        CoPurchase.objects.filter(product__is_active=True)
+        .annotate(computed_at=_computed_at('product'))
+        .filter(updated_at__gt=F('computed_at'))
+        .values_list('product_id', flat=True)
+    )
+    newer_item = WishlistItem.objects.filter(wishlist_id=OuterRef('wishlist_id'), added_at__gt=OuterRef('computed_at'))
+    dirty.update(
+        WishlistItem.objects.filter(product__is_active=True)
+        .annotate(computed_at=_computed_at('product'))
+        .filter(Exists(newer_item))
+        .values_list('product_id', flat=True)
+    )
+    if max_age is not None:
+        cutoff = timezone.now() - max_age
+        dirty.update(
+            active.annotate(computed_at=_computed_at('pk'))
+            .filter(computed_at__lt=cutoff)
+            .values_list('pk', flat=True)
+        )
+    dirty = sorted(dirty)
+    return dirty[:limit] if limit else dirty
+
+
+def refresh_related(product_ids, top_k: int = TOP_K, batch_size: int = 500) -> int:
+    """Recompute and store neighbours for product_ids; returns rows written."""
+    product_ids = list(product_ids)
+    catalog = _Catalog()
+    written = 0
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        scored = score_products(batch, top_k=top_k, catalog=catalog)
+        entries = [
+            RelatedProduct(product_id=pid, related_id=other, rank=rank, score=score)
+            for pid in batch
+            for rank, (score, other) in enumerate(scored[pid])
+        ]
+        # Swap each batch atomically so the detail page never sees a half-written set
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=batch).delete()
+            RelatedProduct.objects.bulk_create(entries)
+        written += len(entries)
+    return written
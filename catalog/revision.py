@@ -0,0 +1,31 @@
+"""The catalog revision behind the API's ETags, persisted in the database.
+
+Unlike the cached catalog version, the revision is bumped in the same
+transaction as the write it counts, including checkout's stock decrements.
+Every worker reads the same row, and it survives restarts and cache flushes,
+so a tag handed out once is never matched by different data.
+"""
+import time
+
+from django.db.models import F
+
+from .models import CatalogRevision
+
+
+REVISION_PK = 1
+
+
+def current_revision() -> int:
+    revision = CatalogRevision.objects.filter(pk=REVISION_PK).values_list('revision', flat=True).first()
+    return revision or 0
+
+
+def bump_revision() -> None:
+    revisions = CatalogRevision.objects.filter(pk=REVISION_PK)
+    if revisions.update(revision=F('revision') + 1):
+        return
+    # First write, or the row was deleted: start from the clock, as catalog.cache does,
+    # so a recreated row can't repeat a revision clients still hold tags for
+    _, created = CatalogRevision.objects.get_or_create(pk=REVISION_PK, defaults={'revision': time.time_ns()})
+    if not created:
+        revisions.update(revision=F('revision') + 1)
@@ -0,0 +1,125 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.urls import reverse
+
+from .cache import catalog_version
+from .models import Category, Product
+
+
+# How often a worker checks whether another process changed the catalog. Local
+# saves are applied right away by upsert/remove, but only a full rebuild moves the
+# index to a new version, since the bump that came with them may also cover
+# changes made in other workers.
+VERSION_CHECK_INTERVAL = 30
+
+
+def _keys(name: str):
+    """Index the full name plus every word start, so "pep" finds "Black Pepper"."""
+    name = (name or '').lower().strip()
+    words = name.split()
+    keys = {name}
+    for i in range(1, len(words)):
+        keys.add(' '.join(words[i:]))
+    return keys
+
+
+class PrefixIndex:
+    """Sorted-array prefix index over active product and category names.
+
+    Lookups are a bisect plus a short forward walk, with no database access.
+    Entries are (key, kind, id) tuples kept sorted; payloads live in a dict so an
+    update only has to touch that object's own keys.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = []
+        self._payloads = {}
+        self._keys_by_object = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def build(self):
+        # Read first: a bump that lands while the rows load must still trigger the next rebuild
+        version = catalog_version()
+        entries = []
+        payloads = {}
+        keys_by_object = {}
+        for pk, name, slug in Category.objects.values_list('pk', 'name', 'slug'):
+            self._collect(entries, payloads, keys_by_object, 'category', pk, name, slug)
+        for pk, name, slug in Product.objects.filter(is_active=True).values_list('pk', 'name', 'slug'):
+            self._collect(entries, payloads, keys_by_object, 'product', pk, name, slug)
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._payloads = payloads
+            self._keys_by_object = keys_by_object
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def _collect(self, entries, payloads, keys_by_object, kind, pk, name, slug):
+        keys = _keys(name)
+        for key in keys:
+            entries.append((key, kind, pk))
+        payloads[(kind, pk)] = {'type': kind, 'label': name, 'url': self._url(kind, slug)}
+        keys_by_object[(kind, pk)] = keys
+
+    def _url(self, kind, slug):
+        if kind == 'product':
+            return reverse('catalog:product_detail', kwargs={'slug': slug})
+        return f"{reverse('catalog:product_list')}?category={slug}"
+
+    def _ensure_fresh(self):
+        if self._version is None:
+            self.build()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if catalog_version() != self._version:
+            self.build()
+
+    def remove(self, kind, pk):
+        with self._lock:
+            for key in self._keys_by_object.pop((kind, pk), ()):
+                i = bisect_left(self._entries, (key, kind, pk))
+                if i < len(self._entries) and self._entries[i] == (key, kind, pk):
+                    del self._entries[i]
+            self._payloads.pop((kind, pk), None)
+
+    def upsert(self, kind, pk, name, slug):
+        with self._lock:
+            if self._version is None:
+                return  # not built yet; the first lookup loads everything
+            self.remove(kind, pk)
+            keys = _keys(name)
+            for key in keys:
+                insort(self._entries, (key, kind, pk))
+            self._payloads[(kind, pk)] = {'type': kind, 'label': name, 'url': self._url(kind, slug)}
+            self._keys_by_object[(kind, pk)] = keys
+
+    def lookup(self, prefix: str, limit: int = 8):
+        prefix = (prefix or '').lower().strip()
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self._entries
+            i = bisect_left(entries, (prefix,))
+            while i < len(entries) and len(results) < limit:
+                key, kind, pk = entries[i]
+                if not key.startswith(prefix):
+                    break
+                if (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    results.append(self._payloads[(kind, pk)])
+                i += 1
+        return results
+
+
+index = PrefixIndex()
@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feeds
+from .cache import bump_catalog_version
+from .models import Category, PriceHistory, Product, ProductImage, ProductVariant, Review
+from .revision import bump_revision
+from .search_index import index as search_index
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+# Images and reviews show on product_detail, which the anonymous page cache stores
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog_caches(sender, instance, update_fields=None, **kwargs):
+    # Checkout decrements stock on every order line; flushing facets and every
+    # cached page for that would make the caches useless on a busy day. Pages
+    # show the new stock level once their entry expires (PAGE_CACHE TIMEOUT),
+    # except when the product sells out or comes back, which shows at once.
+    if sender is Product:
+        sold_out_or_back = availability_changed(instance)
+        if stock_only(update_fields) and not sold_out_or_back:
+            return
+    bump_catalog_version()
+
+
+def availability_changed(product) -> bool:
+    """Whether a save moved the product between in stock and sold out; True if unknown."""
+    loaded = getattr(product, '_loaded_stock', None)
+    if hasattr(product.stock_quantity, 'resolve_expression'):
+        # Saved as F('stock_quantity') + n (inventory.ledger); read back what was stored
+        product.refresh_from_db(fields=['stock_quantity'])
+    product._loaded_stock = product.stock_quantity
+    return loaded is None or (loaded > 0) != (product.stock_quantity > 0)
+
+
+# Every resource the catalog API serves, stock included; runs inside the writer's transaction
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_api_revision(sender, **kwargs):
+    bump_revision()
+
+
+def stock_only(update_fields) -> bool:
+    return update_fields is not None and set(update_fields) <= {'stock_quantity'}
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    if stock_only(update_fields):
+        return
+    if instance.is_active:
+        search_index.upsert('product', instance.pk, instance.name, instance.slug)
+    else:
+        search_index.remove('product', instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, **kwargs):
+    search_index.upsert('category', instance.pk, instance.name, instance.slug)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def unindex(sender, instance, **kwargs):
+    search_index.remove('product' if sender is Product else 'category', instance.pk)
+
+
+# Feed shards are rebuilt from the database, so only invalidate once the change is committed
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_feed_shard(sender, instance, update_fields=None, **kwargs):
+    product_id = instance.pk if sender is Product else instance.product_id
+    # Sitemaps hold only product URLs: checkout's stock decrements and images leave them alone
+    kinds = ('merchant',) if sender is ProductImage or stock_only(update_fields) else feeds.KINDS
+    transaction.on_commit(lambda: feeds.invalidate_shard(feeds.shard_of(product_id), kinds))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_feeds(sender, **kwargs):
+    # Category names appear in every merchant feed row
+    transaction.on_commit(lambda: feeds.invalidate_all(('merchant',)))
+
+
+@receiver(post_save, sender=Product)
+def record_price_change(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'mrp', 'sale_price'} & set(update_fields):
+        return
+    price = instance.get_effective_price()
+    if created or price != getattr(instance, '_loaded_price', None):
+        PriceHistory.objects.create(product=instance, price=price)
+        instance._loaded_price = price
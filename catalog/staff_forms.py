@@ -0,0 +1,10 @@
+from django import forms
+
+from .models import Product
+
+
+# Product Form for admin actions; imported by the staff views on first use only
+class ProductForm(forms.ModelForm):
+    class Meta:
+        model = Product
+        fields = ['name', 'slug', 'category', 'description', 'is_active', 'thumbnail', 'stock_quantity', 'mrp', 'sale_price']
@@ -1,3 +1,431 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import itertools
+import re
+import tempfile
+from unittest import mock
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from cart.models import Wishlist, WishlistItem
+from cart.session_keys import ORDERS_KEY
+from core.models import User
+from . import feeds, related, search_index
+from .cache import VERSION_KEY, bump_catalog_version, catalog_version
+from .facets import compute_facets, get_facets
+from .models import Category, CatalogRevision, CoPurchase, PriceHistory, Product, RelatedProduct, Review
+from .price_history import refresh_price_lows
+from .views import filter_products
+
+
+FULL_SCAN = re.compile(r'\bSCAN catalog_\w+$', re.MULTILINE)
+
+
+class ListingQueryPlanTests(TestCase):
+    """Every catalog listing query must be served by an index, never a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, _ = Category.objects.get_or_create(slug='whole-spices', defaults={'name': 'Whole Spices'})
+        cls.product = Product.objects.create(
+            name='Cumin Seeds', slug='cumin-seeds', category=cls.category, mrp=169, sale_price=149,
+        )
+
+    def assertNoFullScan(self, queryset, label):
+        plan = queryset.explain()
+        match = FULL_SCAN.search(plan)
+        self.assertIsNone(match, f'{label} falls back to a full scan:\n{plan}')
+
+    def test_product_list_filters_and_sorts(self):
+        combos = itertools.product(
+            ['', 'cumin'],                 # q
+            ['', 'whole-spices'],          # category
+            ['', '1'],                     # on_sale
+            [('', ''), ('100', '500')],    # price_min / price_max
+            ['name', 'price', '-price'],   # sort
+        )
+        for q, category, on_sale, (price_min, price_max), sort in combos:
+            params = {
+                'q': q, 'category': category, 'on_sale': on_sale,
+                'price_min': price_min, 'price_max': price_max, 'sort': sort,
+            }
+            self.assertNoFullScan(filter_products(params), f'product_list {params}')
+
+    def test_category_list(self):
+        self.assertNoFullScan(Category.objects.all(), 'category list')
+
+    def test_reviews_per_product(self):
+        self.assertNoFullScan(Review.objects.filter(product=self.product), 'product reviews')
+
+    def test_effective_price_is_persisted(self):
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(product.effective_price, 149)
+        Product.objects.filter(pk=product.pk).update(sale_price=None)
+        self.assertEqual(Product.objects.get(pk=product.pk).effective_price, 169)
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.blends = Category.objects.create(name='Facet Blends', slug='facet-blends')
+        cls.seeds = Category.objects.create(name='Facet Seeds', slug='facet-seeds')
+        cls.products = [
+            Product.objects.create(name='Facet Chaat', slug='facet-chaat', category=cls.blends, mrp=90),
+            Product.objects.create(name='Facet Garam', slug='facet-garam', category=cls.blends, mrp=250, sale_price=180),
+            Product.objects.create(name='Facet Ajwain', slug='facet-ajwain', category=cls.seeds, mrp=320),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_come_from_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets({'q': 'facet', 'category': 'facet-blends'})
+        # Other categories keep their counts; everything else honours the category
+        self.assertEqual(facets['categories'], {'facet-blends': 2, 'facet-seeds': 1})
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['on_sale'], 1)
+        self.assertEqual([band['count'] for band in facets['price_bands']], [1, 1, 0, 0])
+
+    def test_stock_only_saves_keep_the_cached_counts(self):
+        product = self.products[0]
+        product.stock_quantity = 5
+        product.save(update_fields=['stock_quantity'])
+        get_facets({'q': 'facet'})
+        version = catalog_version()
+        product.stock_quantity = 3
+        product.save(update_fields=['stock_quantity'])
+        self.assertEqual(catalog_version(), version)
+        product.sale_price = 80
+        product.save()
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual(get_facets({'q': 'facet'})['on_sale'], 2)
+
+    def test_selling_out_or_restocking_bumps_the_version(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.stock_quantity = 1
+        product.save(update_fields=['stock_quantity'])
+        version = catalog_version()
+        product.stock_quantity = 0
+        product.save(update_fields=['stock_quantity'])
+        self.assertNotEqual(catalog_version(), version)
+        version = catalog_version()
+        product.stock_quantity = 5
+        product.save(update_fields=['stock_quantity'])
+        self.assertNotEqual(catalog_version(), version)
+
+    def test_a_lost_version_is_never_reissued(self):
+        version = catalog_version()
+        cache.delete(VERSION_KEY)
+        self.assertGreater(catalog_version(), version)
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Index Peppercorns', slug='index-peppercorns')
+        cls.pepper = Product.objects.create(name='Black Pepper', slug='black-pepper', category=cls.category, mrp=100)
+
+    def setUp(self):
+        self.index = search_index.PrefixIndex()
+        self.index.build()
+
+    def labels(self, prefix):
+        return [row['label'] for row in self.index.lookup(prefix)]
+
+    def test_lookup_matches_every_word_start(self):
+        self.assertIn('Black Pepper', self.labels('pep'))
+        self.assertIn('Black Pepper', self.labels('BLACK p'))
+        self.assertIn('Index Peppercorns', self.labels('peppercorn'))
+        self.assertEqual(self.labels('lack'), [])
+        self.assertEqual(len(self.index.lookup('pe', limit=1)), 1)
+
+    def test_upsert_and_remove_touch_only_their_object(self):
+        self.index.upsert('product', self.pepper.pk, 'Long Pepper', 'long-pepper')
+        self.assertEqual(self.labels('black'), [])
+        self.assertEqual(self.index.lookup('long')[0]['url'], '/products/long-pepper/')
+        self.index.remove('product', self.pepper.pk)
+        self.assertEqual(self.labels('long'), [])
+        self.assertIn('Index Peppercorns', self.labels('pep'))
+
+    def test_a_local_upsert_does_not_absorb_another_workers_bump(self):
+        # Another worker renames a product and bumps the version; this worker then applies its own save
+        Product.objects.filter(pk=self.pepper.pk).update(name='Tellicherry Pepper')
+        bump_catalog_version()
+        self.index.upsert('category', self.category.pk, 'Index Peppercorns', 'index-peppercorns')
+        with mock.patch.object(search_index, 'VERSION_CHECK_INTERVAL', 0):
+            self.assertEqual(self.labels('tellicherry'), ['Tellicherry Pepper'])
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(FEEDS={
+            'BASE_URL': 'https://shop.example', 'CACHE_DIR': directory.name, 'SHARD_SIZE': 3,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        category = Category.objects.first()
+        self.products = [
+            Product.objects.create(
+                name=f'Blend {i}', slug=f'blend-{i}', category=category, mrp=100 + i, stock_quantity=i,
+            )
+            for i in range(5)
+        ]
+        self.shard = feeds.shard_of(self.products[0].pk)
+
+    def test_sitemap_index_lists_each_shard(self):
+        body = b''.join(self.client.get('/sitemap.xml').streaming_content).decode()
+        for shard in {feeds.shard_of(p.pk) for p in self.products}:
+            self.assertIn(f'https://shop.example/sitemap-products-{shard}.xml', body)
+
+    def test_shard_is_served_pre_gzipped(self):
+        response = self.client.get(f'/sitemap-products-{self.shard}.xml', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertIn(f'https://shop.example/products/{self.products[0].slug}/', body)
+
+        plain = self.client.get(f'/sitemap-products-{self.shard}.xml')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(b''.join(plain.streaming_content).decode(), body)
+
+    def test_only_the_changed_shard_is_rebuilt(self):
+        self.assertEqual(feeds.build_all(['sitemap']), len(feeds.shards()))
+        other = next(p for p in self.products if feeds.shard_of(p.pk) != self.shard)
+        other_file = feeds.shard_file('sitemap', feeds.shard_of(other.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].name = 'Renamed'
+            self.products[0].save()
+
+        self.assertEqual(feeds.build_all(['sitemap']), 1)
+        self.assertEqual(feeds.shard_file('sitemap', feeds.shard_of(other.pk)), other_file)
+
+    def test_merchant_feeds_cover_the_catalog(self):
+        response = self.client.get('/feeds/merchant.csv', HTTP_ACCEPT_ENCODING='gzip')
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b''.join(response.streaming_content)).decode())))
+        blends = {row['id']: row for row in rows if row['title'].startswith('Blend')}
+        self.assertEqual(len(blends), 5)
+        self.assertEqual(blends[str(self.products[0].pk)]['availability'], 'out_of_stock')
+        self.assertEqual(blends[str(self.products[1].pk)]['price'], '101.00 INR')
+
+        xml = b''.join(self.client.get('/feeds/merchant.xml').streaming_content).decode()
+        self.assertTrue(xml.rstrip().endswith('</channel></rss>'))
+        self.assertEqual(xml.count('<item>'), Product.objects.filter(is_active=True).count())
+
+    def test_stock_only_saves_keep_the_sitemap(self):
+        feeds.build_all()
+        sitemap = feeds.shard_file('sitemap', self.shard)
+        merchant = feeds.shard_file('merchant-csv', self.shard)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].stock_quantity = 7
+            self.products[0].save(update_fields=['stock_quantity'])
+
+        self.assertEqual(feeds.shard_file('sitemap', self.shard), sitemap)
+        self.assertNotEqual(feeds.shard_file('merchant-csv', self.shard), merchant)
+
+    def test_a_stale_builder_keeps_the_file_for_the_newer_token(self):
+        old_token = feeds.shard_token('sitemap', self.shard)
+        feeds.invalidate_shard(self.shard)
+        current = feeds.shard_file('sitemap', self.shard)
+        # A builder that read the old token finishes after the current file was built
+        with mock.patch.object(feeds, 'shard_token', side_effect=[old_token, feeds.shard_token('sitemap', self.shard)]):
+            stale = feeds.shard_file('sitemap', self.shard)
+        self.assertNotEqual(stale, current)
+        self.assertTrue(current.exists())
+        self.assertTrue(stale.exists())
+
+    def test_a_removed_shard_file_is_rebuilt_on_open(self):
+        path = feeds.shard_file('sitemap', self.shard)
+        with mock.patch.object(feeds, 'shard_file', side_effect=[path.with_name('gone.xml.gz'), path]):
+            with feeds.open_shard('sitemap', self.shard) as stream:
+                self.assertIn(self.products[0].slug.encode(), gzip.decompress(stream.read()))
+
+    def test_many_shards_stream_every_product(self):
+        category = Category.objects.first()
+        Product.objects.bulk_create(
+            Product(name=f'Bulk {i}', slug=f'bulk-{i}', category=category, mrp=50, stock_quantity=1)
+            for i in range(300)
+        )
+        active = Product.objects.filter(is_active=True).count()
+        self.assertGreater(len(feeds.shards()), 100)
+        self.assertEqual(feeds.build_all(['sitemap', 'merchant-csv']), 2 * len(feeds.shards()))
+
+        sitemaps = b''.join(
+            gzip.decompress(feeds.shard_file('sitemap', shard).read_bytes()) for shard in feeds.shards()
+        )
+        self.assertEqual(sitemaps.count(b'<url>'), active)
+        response = self.client.get('/feeds/merchant.csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), active)
+
+
+class CatalogApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.first()
+        cls.products = [
+            Product.objects.create(
+                name=f'Masala {i}', slug=f'masala-{i}', category=cls.category, mrp=100 + i, stock_quantity=5,
+            )
+            for i in range(5)
+        ]
+        user = User.objects.create_user(username='critic', password='x')
+        Review.objects.create(product=cls.products[0], user=user, rating=4)
+
+    def get(self, path, **headers):
+        return self.client.get(f'/products/api/{path}', **headers)
+
+    def test_sparse_fields_and_batch_ids_in_one_query(self):
+        ids = ','.join(str(p.pk) for p in self.products[:3])
+        # The row query plus the catalog revision behind the ETag
+        with self.assertNumQueries(2):
+            response = self.get(f'products/?ids={ids}&fields=id,name,url')
+        data = response.json()['data']
+        self.assertEqual([row['id'] for row in data], [p.pk for p in self.products[:3]])
+        self.assertEqual(data[0], {'id': self.products[0].pk, 'name': 'Masala 0', 'url': '/products/masala-0/'})
+
+    def test_cursor_pagination_walks_every_row(self):
+        seen = []
+        url = 'products/?fields=id&limit=2'
+        while url:
+            body = self.get(url).json()
+            seen.extend(row['id'] for row in body['data'])
+            url = body['next'] and body['next'].split('/products/api/', 1)[1]
+        self.assertEqual(seen, sorted(Product.objects.filter(is_active=True).values_list('pk', flat=True)))
+
+    def test_etag_revalidation_reads_only_the_revision_until_the_catalog_changes(self):
+        etag = self.get('products/')['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get('products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.products[1].save()
+        self.assertEqual(self.get('products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_follows_the_database_not_the_cache(self):
+        etag = self.get('products/')['ETag']
+        # A restarted or different worker starts with nothing cached
+        cache.clear()
+        self.assertEqual(self.get('products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Checkout's stock decrement changes the stock field the API serves
+        self.products[1].stock_quantity = 4
+        self.products[1].save(update_fields=['stock_quantity'])
+        self.assertEqual(self.get('products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.get('products/')['ETag']
+        # A write committed by another process, with no signal in this one
+        CatalogRevision.objects.update(revision=F('revision') + 1)
+        self.assertEqual(self.get('products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_review_summaries_and_errors(self):
+        row = self.get(f'review-summaries/?ids={self.products[0].pk}&fields=product,count,average,stars_4').json()
+        self.assertEqual(row['data'], [{'product': self.products[0].pk, 'count': 1, 'average': 4.0, 'stars_4': 1}])
+        self.assertEqual(self.get('products/?fields=name,secret').status_code, 400)
+        self.assertEqual(self.get('products/?cursor=nonsense').status_code, 400)
+        self.assertEqual(self.get('orders/').status_code, 404)
+
+
+class PriceHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.first()
+        cls.product = Product.objects.create(
+            name='Garam Masala', slug='garam-masala', category=cls.category, mrp=200, stock_quantity=10,
+        )
+
+    def prices(self):
+        return list(PriceHistory.objects.filter(product=self.product).values_list('price', flat=True))
+
+    def test_rows_are_written_only_when_the_price_changes(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock_quantity = 4
+        product.save()
+        product.description = 'Warming blend'
+        product.save(update_fields=['description'])
+        self.assertEqual(self.prices(), [Decimal('200')])
+
+        product.sale_price = 180
+        product.save()
+        product.save()
+        self.assertEqual(self.prices(), [Decimal('180'), Decimal('200')])
+
+    def test_refresh_includes_the_price_carried_into_the_window(self):
+        PriceHistory.objects.filter(product=self.product).update(changed_at=timezone.now() - timedelta(days=45))
+        self.assertEqual(refresh_price_lows(), Product.objects.count())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.lowest_price_30d, 200)
+        self.assertFalse(self.product.is_lowest_price_30d)
+
+        self.product.sale_price = 170
+        self.product.save()
+        PriceHistory.objects.create(product=self.product, price=150, changed_at=timezone.now() - timedelta(days=50))
+        refresh_price_lows()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.lowest_price_30d, 170)
+        self.assertTrue(self.product.is_lowest_price_30d)
+
+    def test_badge_renders_from_the_product_row(self):
+        Product.objects.filter(pk=self.product.pk).update(sale_price=180, lowest_price_30d=180)
+        response = self.client.get('/products/', {'q': 'garam'})
+        self.assertContains(response, 'Lowest in 30 days')
+        response = self.client.get(f'/products/{self.product.slug}/')
+        self.assertContains(response, 'Lowest price in the last 30 days')
+
+
+class RelatedProductTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.spices = Category.objects.create(name='Related Spices', slug='related-spices')
+        cls.teas = Category.objects.create(name='Related Teas', slug='related-teas')
+        cls.cumin, cls.coriander, cls.fennel = [
+            Product.objects.create(name=name, slug=name.lower(), category=cls.spices, mrp=100)
+            for name in ('Cumin', 'Coriander', 'Fennel')
+        ]
+        cls.chai, cls.green_tea = [
+            Product.objects.create(name=name, slug=name.lower().replace(' ', '-'), category=cls.teas, mrp=100)
+            for name in ('Chai', 'Green Tea')
+        ]
+
+    def neighbours(self, product):
+        return list(RelatedProduct.objects.filter(product=product).values_list('related_id', flat=True))
+
+    def test_co_purchases_outrank_a_shared_category(self):
+        related.record_co_purchases([self.cumin.pk, self.chai.pk])
+        related.record_co_purchases([self.chai.pk, self.cumin.pk, self.cumin.pk])
+        self.assertEqual(CoPurchase.objects.get(product=self.chai, other=self.cumin).count, 2)
+        self.assertEqual(CoPurchase.objects.get(product=self.cumin, other=self.chai).count, 2)
+
+        scored = related.score_products([self.cumin.pk])[self.cumin.pk]
+        self.assertEqual([pid for _, pid in scored], [self.chai.pk, self.coriander.pk, self.fennel.pk])
+
+    def test_refresh_only_rescores_products_with_new_data(self):
+        related.refresh_related(related.dirty_product_ids())
+        self.assertEqual(related.dirty_product_ids(), [])
+
+        related.record_co_purchases([self.coriander.pk, self.chai.pk])
+        self.assertEqual(related.dirty_product_ids(), [self.coriander.pk, self.chai.pk])
+        related.refresh_related(related.dirty_product_ids())
+        self.assertEqual(self.neighbours(self.chai), [self.coriander.pk, self.green_tea.pk])
+
+        user = User.objects.create_user(username='collector', password='x')
+        wishlist = Wishlist.objects.create(user=user)
+        WishlistItem.objects.create(wishlist=wishlist, product=self.fennel, seen_price=100)
+        WishlistItem.objects.create(wishlist=wishlist, product=self.chai, seen_price=100)
+        self.assertEqual(related.dirty_product_ids(), [self.fennel.pk, self.chai.pk])
+
+    def test_full_rebuild_recounts_orders_from_sessions(self):
+        session = SessionStore()
+        session[ORDERS_KEY] = [{'items': [{'product_id': self.fennel.pk}, {'product_id': self.chai.pk}]}]
+        session.create()
+        call_command('refresh_related_products', '--all', stdout=io.StringIO())
+        self.assertEqual(CoPurchase.objects.get(product=self.fennel, other=self.chai).count, 1)
+        self.assertIn(self.fennel.pk, self.neighbours(self.chai))
@@ -1,12 +1,20 @@
+from django.conf import settings
 from django.urls import path
-from .views import product_list, product_detail, add_product, update_product, delete_product
+from . import api
+from .views import product_list, product_detail, add_product, update_product, delete_product, autocomplete
+
+if settings.ASYNC_VIEWS:
+    from .async_views import product_list, product_detail  # noqa: F811
 
 
 urlpatterns = [
     path('', product_list, name='product_list'),
+    path('autocomplete/', autocomplete, name='autocomplete'),
     path('add/', add_product, name='add_product'),
     path('update/<int:pk>/', update_product, name='update_product'),
     path('delete/<int:pk>/', delete_product, name='delete_product'),
+    # Read-only JSON API; must come before the product slug route
+    path('api/<slug:resource>/', api.resource_list, name='api_list'),
     path('<slug:slug>/', product_detail, name='product_detail'),
 ]
 
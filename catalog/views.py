@@ -1,21 +1,25 @@
 from django.db.models import Q, Avg
-from django.db.models.functions import Coalesce
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from .models import Product, Category, Review
+from .facets import get_facets
 from .forms import ReviewForm
-from django import forms
+from .search_index import index as search_index
+from core.db import serialized_write
+from inventory.ledger import record_stock_edit
 
 
-def product_list(request):
+def filter_products(params):
+    """Build the product_list queryset for a dict of GET parameters."""
     products = Product.objects.filter(is_active=True).select_related('category')
-    q = request.GET.get('q')
-    category_slug = request.GET.get('category')
-    sort = request.GET.get('sort', 'name')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    on_sale = request.GET.get('on_sale')
+    q = params.get('q')
+    category_slug = params.get('category')
+    sort = params.get('sort', 'name')
+    price_min = params.get('price_min')
+    price_max = params.get('price_max')
+    on_sale = params.get('on_sale')
 
     if q:
         products = products.filter(Q(name__icontains=q) | Q(description__icontains=q))
@@ -23,41 +27,67 @@ def product_list(request):
         products = products.filter(category__slug=category_slug)
     if on_sale == '1':
         products = products.filter(sale_price__isnull=False)
-    # Annotate effective price for filtering/sorting
-    products = products.annotate(eff_price=Coalesce('sale_price', 'mrp'))
+    # Filter/sort on the stored effective price so the listing indexes apply
     if price_min:
-        products = products.filter(eff_price__gte=price_min)
+        products = products.filter(effective_price__gte=price_min)
     if price_max:
-        products = products.filter(eff_price__lte=price_max)
+        products = products.filter(effective_price__lte=price_max)
 
     # Sorting
     if sort == 'price':
-        products = products.order_by('eff_price')
+        products = products.order_by('effective_price')
     elif sort == '-price':
-        products = products.order_by('-eff_price')
+        products = products.order_by('-effective_price')
     else:
         products = products.order_by('name')
+    return products
+
 
-    categories = Category.objects.all()
-    return render(request, 'catalog/product_list.html', {'products': products, 'categories': categories})
+def apply_facets(request, categories, facets):
+    """Attach facet counts to the category objects and build price-band links."""
+    for c in categories:
+        c.facet_count = facets['categories'].get(c.slug, 0)
+    for band in facets['price_bands']:
+        params = request.GET.copy()
+        params['price_min'] = band['min'] if band['min'] is not None else ''
+        params['price_max'] = f"{band['max'] - 0.01:.2f}" if band['max'] is not None else ''
+        band['query'] = params.urlencode()
+
+
+def product_list(request):
+    products = filter_products(request.GET)
+    facets = get_facets(request.GET)
+    categories = list(Category.objects.all())
+    apply_facets(request, categories, facets)
+    context = {
+        'products': products,
+        'categories': categories,
+        'facets': facets,
+        'active_category': request.GET.get('category'),
+    }
+    return render(request, 'catalog/product_list.html', context)
+
+def autocomplete(request):
+    """Typeahead suggestions for the header search box, served from the in-memory index."""
+    results = search_index.lookup(request.GET.get('q', ''), limit=8)
+    return JsonResponse({'results': results})
 
 # Admin privilege check
 def is_admin(user):
     return user.is_authenticated and user.is_staff
 
-# Product Form for admin actions
-class ProductForm(forms.ModelForm):
-    class Meta:
-        model = Product
-        fields = ['name', 'slug', 'category', 'description', 'is_active', 'thumbnail', 'stock_quantity', 'mrp', 'sale_price']
-
 # Add Product (Admin only)
 @user_passes_test(is_admin)
 def add_product(request):
+    from .staff_forms import ProductForm
+
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            with serialized_write():
+                form.save()
+                if 'stock_quantity' in form.changed_data:
+                    record_stock_edit(form.instance, form.initial.get('stock_quantity', 0), f'staff {request.user}')
             messages.success(request, 'Product added successfully.')
             return redirect('product_list')
     else:
@@ -67,11 +97,16 @@ def add_product(request):
 # Update Product (Admin only)
 @user_passes_test(is_admin)
 def update_product(request, pk):
+    from .staff_forms import ProductForm
+
     product = get_object_or_404(Product, pk=pk)
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            form.save()
+            with serialized_write():
+                form.save()
+                if 'stock_quantity' in form.changed_data:
+                    record_stock_edit(form.instance, form.initial.get('stock_quantity', 0), f'staff {request.user}')
             messages.success(request, 'Product updated successfully.')
             return redirect('product_list')
     else:
@@ -105,7 +140,18 @@ def product_detail(request, slug):
     # Ensure thumbnail appears first if set and not already in images
     if product.thumbnail and not any(img.image.name == product.thumbnail.name for img in images):
         images.insert(0, type('Thumb', (), {'image': product.thumbnail, 'alt_text': product.name})())
-    related = Product.objects.filter(is_active=True, category=product.category).exclude(pk=product.pk)[:8]
+    # Neighbours are precomputed by refresh_related_products; fall back to the
+    # same category until the batch job has covered this product
+    related = [
+        entry.related
+        for entry in product.related_entries.filter(related__is_active=True).select_related('related__category')[:8]
+    ]
+    if not related:
+        related = (
+            Product.objects.filter(is_active=True, category=product.category)
+            .exclude(pk=product.pk)
+            .select_related('category')[:8]
+        )
     
     # Get reviews for this product
     reviews = product.reviews.all()
@@ -122,20 +168,23 @@ def product_detail(request, slug):
         
         form = ReviewForm(request.POST)
         if form.is_valid():
-            # Check if user already reviewed this product
-            existing_review = Review.objects.filter(product=product, user=request.user).first()
+            with serialized_write():
+                # Check if user already reviewed this product
+                existing_review = Review.objects.filter(product=product, user=request.user).first()
+                if existing_review:
+                    # Update existing review
+                    existing_review.rating = form.cleaned_data['rating']
+                    existing_review.text = form.cleaned_data['text']
+                    existing_review.save()
+                else:
+                    # Create new review
+                    review = form.save(commit=False)
+                    review.product = product
+                    review.user = request.user
+                    review.save()
             if existing_review:
-                # Update existing review
-                existing_review.rating = form.cleaned_data['rating']
-                existing_review.text = form.cleaned_data['text']
-                existing_review.save()
                 messages.success(request, 'Your review has been updated successfully!')
             else:
-                # Create new review
-                review = form.save(commit=False)
-                review.product = product
-                review.user = request.user
-                review.save()
                 messages.success(request, 'Thank you for your review!')
             
             return redirect('catalog:product_detail', slug=product.slug)
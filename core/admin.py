@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 
-from .models import User
+from .models import RequestProfile, User
 
 
 @admin.register(User)
@@ -26,4 +30,59 @@ class UserAdmin(DjangoUserAdmin):
     search_fields = ("username", "first_name", "last_name", "email")
     ordering = ("username",)
 
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "method", "path", "view_name", "duration_ms", "status_code", "query_count", "download_link")
+    list_filter = ("view_name", "method", "status_code")
+    search_fields = ("path", "user_agent")
+    date_hierarchy = "created_at"
+    readonly_fields = (
+        "path", "view_name", "method", "status_code", "duration_ms", "user_agent", "sample_count",
+        "created_at", "download_link", "top_frames", "query_log",
+    )
+    exclude = ("queries", "stacks")
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_requestprofile_download",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(profile.stacks, content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="profile-{profile.pk}.folded"'
+        return response
+
+    @admin.display(description="Queries")
+    def query_count(self, obj):
+        return len(obj.queries)
+
+    @admin.display(description="Flame graph")
+    def download_link(self, obj):
+        url = reverse("admin:core_requestprofile_download", args=[obj.pk])
+        return format_html('<a href="{}">profile-{}.folded</a>', url, obj.pk)
+
+    @admin.display(description="Hottest frames (self samples)")
+    def top_frames(self, obj):
+        leaf_counts = {}
+        for line in obj.stacks.splitlines():
+            stack, _, count = line.rpartition(" ")
+            leaf = stack.rsplit(";", 1)[-1]
+            leaf_counts[leaf] = leaf_counts.get(leaf, 0) + int(count)
+        top = sorted(leaf_counts.items(), key=lambda item: item[1], reverse=True)[:15]
+        return format_html_join("", "<div><code>{}</code> — {}</div>", top)
+
+    @admin.display(description="Query log")
+    def query_log(self, obj):
+        return format_html_join("", "<div><code>{}</code> ({} ms)</div>", ((q["sql"], q["ms"]) for q in obj.queries))
+
 # Register your models here.
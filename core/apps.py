@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .metrics import instrument_connection
+
+        connection_created.connect(instrument_connection, dispatch_uid='core.metrics.instrument_connection')
+
+        from . import checks  # noqa: F401
+
+        from django.conf import settings
+        if settings.WARM_TEMPLATES:
+            from .template_warmup import warm_templates
+            warm_templates()
@@ -0,0 +1,10 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+from catalog.models import Category, Product
+
+
+async def home(request):
+    categories = [c async for c in Category.objects.all()[:8]]
+    featured = [p async for p in Product.objects.filter(is_active=True).select_related('category')[:6]]
+    return await sync_to_async(render)(request, 'home.html', {"categories": categories, "featured": featured})
@@ -0,0 +1,13 @@
+from django.core.checks import Error, Tags, register
+
+from .template_warmup import warm_templates
+
+
+@register(Tags.templates)
+def check_templates_compile(app_configs, **kwargs):
+    """Every template under TEMPLATES DIRS must compile."""
+    _, errors, _ = warm_templates()
+    return [
+        Error(f'Template {name} does not compile: {exc}', id='core.E001')
+        for name, exc in errors
+    ]
@@ -1,11 +1,29 @@
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from catalog.cache import catalog_version
 from catalog.models import Category
 
 
-def nav_categories(request):
+NAV_CATEGORIES_TIMEOUT = 60 * 60
+
+
+def nav_category_list():
+    """The header's category links, cached until the catalog version moves."""
+    key = f'core:nav_categories:{catalog_version()}'
+    cats = cache.get(key)
+    if cats is None:
+        cats = list(Category.objects.all().order_by('name')[:10])
+        cache.set(key, cats, NAV_CATEGORIES_TIMEOUT)
+    return cats
+
+
+def _nav_categories():
     try:
-        cats = Category.objects.all().order_by('name')[:10]
+        return nav_category_list()
     except Exception:
-        cats = []
-    return {"categories": cats}
+        return []
 
 
+def nav_categories(request):
+    return {"categories": SimpleLazyObject(_nav_categories)}
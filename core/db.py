@@ -0,0 +1,29 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+_write_lock = threading.RLock()
+
+
+@contextmanager
+def serialized_write(using=None):
+    """Run a block of writes in one transaction, one writer per process at a time.
+
+    SQLite only allows a single writer; queueing writers here instead of letting
+    them race for the file lock keeps checkouts and reviews from hitting busy errors.
+    The lock is per process: gunicorn workers still contend for the file lock, and
+    there the IMMEDIATE transaction mode and the busy timeout do the queueing.
+
+    Inside an outer transaction the lock is not taken. That transaction already
+    holds SQLite's write lock, and waiting on a thread that is itself waiting for
+    the file would stall both until the busy timeout.
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _write_lock:
+        with transaction.atomic(using=using):
+            yield
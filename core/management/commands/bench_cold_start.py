@@ -0,0 +1,87 @@
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _get(port, path, timeout):
+    """Seconds until the first response byte of GET path, retrying while nothing listens."""
+    request = f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode()
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=timeout) as sock:
+                started = time.perf_counter()
+                sock.sendall(request)
+                if not sock.recv(1):
+                    raise OSError('connection closed')
+                first_byte = time.perf_counter()
+                while sock.recv(65536):
+                    pass
+                return first_byte, first_byte - started
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.01)
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start time to first byte of gunicorn with and without preloading'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/products/')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--port', type=int, default=8766)
+
+    def handle(self, *args, **options):
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('gunicorn is not installed (pip install gunicorn)')
+
+        runs = options['runs']
+        for mode in ('cold', 'preload'):
+            spawn, first, second = [], [], []
+            for _ in range(runs):
+                a, b, c = self._run(mode == 'preload', options)
+                spawn.append(a)
+                first.append(b)
+                second.append(c)
+            self.stdout.write(
+                f'{mode:>8}: spawn to first byte {statistics.median(spawn) * 1000:7.1f} ms  '
+                f'first request {statistics.median(first) * 1000:6.1f} ms  '
+                f'second request {statistics.median(second) * 1000:6.1f} ms  (median of {runs})'
+            )
+
+    def _run(self, preload, options):
+        port = options['port']
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'spice_shop.settings'))
+        env.pop('SPICE_SHOP_ASYNC_VIEWS', None)
+        env['SPICE_SHOP_PRELOAD'] = '1' if preload else '0'
+        # Cold workers also skip the boot-time template warm-up so the baseline is a plain lazy start
+        env['SPICE_SHOP_WARM_TEMPLATES'] = '1' if preload else '0'
+        # A cached page from an earlier run would hide the cold render being measured
+        env['SPICE_SHOP_PAGE_CACHE'] = '0'
+        env['SPICE_SHOP_BIND'] = f'127.0.0.1:{port}'
+        env['WEB_CONCURRENCY'] = str(options['workers'])
+        spawned = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning',
+             'spice_shop.wsgi:application'],
+            cwd=str(settings.BASE_DIR), env=env, start_new_session=True,
+        )
+        try:
+            first_byte, first = _get(port, options['path'], timeout=30)
+            _, second = _get(port, options['path'], timeout=5)
+            return first_byte - spawned, first, second
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
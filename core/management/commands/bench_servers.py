@@ -0,0 +1,131 @@
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+SERVERS = {
+    # Async views under uvicorn (spice_shop/asgi.py enables SPICE_SHOP_ASYNC_VIEWS)
+    'uvicorn': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'spice_shop.asgi:application',
+        '--port', str(port), '--workers', str(workers), '--no-access-log', '--log-level', 'warning',
+    ],
+    # Sync views under gunicorn sync workers
+    'gunicorn': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'spice_shop.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--worker-class', 'sync',
+        '--log-level', 'warning',
+    ],
+}
+
+
+async def _worker(host, port, path, deadline, latencies, errors):
+    request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n'.encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            close = False
+            for line in head.split(b'\r\n')[1:]:
+                name, _, value = line.partition(b':')
+                if name.lower() == b'content-length':
+                    length = int(value)
+                elif name.lower() == b'connection' and value.strip().lower() == b'close':
+                    close = True
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            errors.append(1)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def _load(host, port, path, connections, seconds):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(
+        _worker(host, port, path, deadline, latencies, errors) for _ in range(connections)
+    ))
+    return latencies, len(errors)
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent-connection throughput of uvicorn (async views) and gunicorn sync workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+        parser.add_argument('--path', default='/products/')
+        parser.add_argument('--connections', type=int, nargs='+', default=[10, 50, 200])
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        for server in options['servers']:
+            try:
+                __import__(server)
+            except ImportError:
+                raise CommandError(f'{server} is not installed (pip install {server})')
+
+        for server in options['servers']:
+            self._bench(server, options)
+
+    def _bench(self, server, options):
+        port = options['port']
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'spice_shop.settings'))
+        env.pop('SPICE_SHOP_ASYNC_VIEWS', None)
+        # Anonymous catalog GETs would otherwise be page cache hits under both servers
+        env['SPICE_SHOP_PAGE_CACHE'] = '0'
+        process = subprocess.Popen(
+            SERVERS[server](port, options['workers']), cwd=str(settings.BASE_DIR), env=env,
+            start_new_session=True,
+        )
+        try:
+            self._wait_until_ready(port, process)
+            for connections in options['connections']:
+                latencies, errors = asyncio.run(
+                    _load('127.0.0.1', port, options['path'], connections, options['seconds'])
+                )
+                latencies.sort()
+                count = len(latencies)
+                rps = count / options['seconds']
+                p50 = latencies[count // 2] * 1000 if count else 0
+                p99 = latencies[int(count * 0.99)] * 1000 if count else 0
+                self.stdout.write(
+                    f'{server:>9} {connections:>4} conns: {rps:8.1f} req/s  p50 {p50:7.1f} ms  '
+                    f'p99 {p99:7.1f} ms  {errors} errors'
+                )
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+
+    def _wait_until_ready(self, port, process, timeout=20):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'server exited with code {process.returncode}')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError('server did not start listening in time')
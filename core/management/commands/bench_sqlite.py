@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent SQLite read/write throughput with the default and tuned connection profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--rows", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for profile in ("default", "tuned"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                self._prepare(path, options["rows"])
+                reads, writes, errors = self._run(path, profile, options)
+            seconds = options["seconds"]
+            self.stdout.write(
+                f"{profile:>8}: {reads / seconds:10.0f} reads/s  {writes / seconds:8.0f} writes/s  "
+                f"{errors} locked errors"
+            )
+
+    def _prepare(self, path, rows):
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER)")
+        conn.executemany(
+            "INSERT INTO product (id, name, stock) VALUES (?, ?, ?)",
+            ((i, f"product-{i}", 1000) for i in range(1, rows + 1)),
+        )
+        conn.commit()
+        conn.close()
+
+    def _connect(self, path, profile):
+        if profile == "default":
+            # Mirrors Django's stock SQLite settings: rollback journal, deferred transactions
+            return sqlite3.connect(path, timeout=5, check_same_thread=False)
+        conn = sqlite3.connect(path, timeout=settings.DATABASES["default"]["OPTIONS"].get("timeout", 5),
+                               isolation_level="IMMEDIATE", check_same_thread=False)
+        for pragma in settings.SQLITE_TUNING_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _run(self, path, profile, options):
+        rows = options["rows"]
+        deadline = time.perf_counter() + options["seconds"]
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        counts_lock = threading.Lock()
+        # The tuned profile also queues writers in-process, like core.db.serialized_write
+        write_lock = threading.Lock() if profile == "tuned" else None
+
+        def reader(seed):
+            conn = self._connect(path, profile)
+            done = errors = 0
+            i = seed
+            while time.perf_counter() < deadline:
+                i = (i * 7919 + 1) % rows + 1
+                try:
+                    conn.execute("SELECT name, stock FROM product WHERE id = ?", (i,)).fetchone()
+                    done += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+            conn.close()
+            with counts_lock:
+                counts["reads"] += done
+                counts["errors"] += errors
+
+        def writer(seed):
+            conn = self._connect(path, profile)
+            done = errors = 0
+            i = seed
+            while time.perf_counter() < deadline:
+                i = (i * 104729 + 3) % rows + 1
+                try:
+                    if write_lock is not None:
+                        with write_lock:
+                            self._write(conn, i, profile)
+                    else:
+                        self._write(conn, i, profile)
+                    done += 1
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    errors += 1
+            conn.close()
+            with counts_lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(options["readers"])]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(options["writers"])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return counts["reads"], counts["writes"], counts["errors"]
+
+    def _write(self, conn, product_id, profile):
+        # Read-then-write, like a checkout decrementing stock. The read is inside the
+        # transaction: deferred by default, so it may fail to upgrade to a write lock;
+        # IMMEDIATE when tuned, so no other writer can change the row in between.
+        conn.execute("BEGIN" if profile == "default" else "BEGIN IMMEDIATE")
+        stock = conn.execute("SELECT stock FROM product WHERE id = ?", (product_id,)).fetchone()[0]
+        conn.execute("UPDATE product SET stock = ? WHERE id = ?", (max(stock - 1, 0), product_id))
+        conn.commit()
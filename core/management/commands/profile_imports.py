@@ -0,0 +1,52 @@
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+PROJECT_PACKAGES = ('spice_shop', 'core', 'accounts', 'catalog', 'inventory', 'cart', 'notifications')
+
+# What a worker does before it can serve: configure Django, import every app and URLconf
+BOOT = 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns'
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us)] from python -X importtime stderr."""
+    rows = []
+    for line in output.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Boot Django in a fresh interpreter under -X importtime and report the slowest project imports'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument('--all', action='store_true', help='Include third-party and stdlib modules')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT],
+            cwd=str(settings.BASE_DIR), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        rows = parse_importtime(result.stderr)
+        total = sum(self_us for _, self_us, _ in rows)
+        if not options['all']:
+            rows = [row for row in rows if row[0].split('.')[0] in PROJECT_PACKAGES]
+        project = sum(self_us for _, self_us, _ in rows)
+
+        self.stdout.write(f'{len(rows)} modules, {project / 1000:.1f} ms self time of {total / 1000:.1f} ms total')
+        for title, column in (('self', 1), ('cumulative', 2)):
+            self.stdout.write(f'\nSlowest by {title} time:')
+            for row in sorted(rows, key=lambda row: row[column], reverse=True)[:options['top']]:
+                self.stdout.write(f'  {row[column] / 1000:8.2f} ms  {row[0]}')
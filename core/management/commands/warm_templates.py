@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_warmup import project_template_names, warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every project template and report failures. Workers do the same at boot when "
+        "WARM_TEMPLATES is on; run this in CI or a deploy step to catch broken templates early."
+    )
+    # The template system check compiles everything too; skip it so the timing is cold
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        names = project_template_names()
+        compiled, errors, seconds = warm_templates(names)
+        for name, exc in errors:
+            self.stderr.write(f"{name}: {exc}")
+        if errors:
+            raise CommandError(f"{len(errors)} of {len(names)} templates failed to compile")
+        self.stdout.write(self.style.SUCCESS(f"Compiled {compiled} templates in {seconds * 1000:.0f} ms"))
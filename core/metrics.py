@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 8192, 32768, 65536, 131072, 262144, 524288, 1048576)
+
+# name: (help text, buckets)
+METRICS = {
+    'request_duration_seconds': ('Wall time spent handling the request', LATENCY_BUCKETS),
+    'request_db_seconds': ('Time spent executing SQL', LATENCY_BUCKETS),
+    'request_queries': ('SQL statements executed', QUERY_BUCKETS),
+    'request_duplicate_queries': ('SQL statements repeated with identical parameters', QUERY_BUCKETS),
+    'request_template_seconds': ('Time spent rendering templates', LATENCY_BUCKETS),
+    'response_size_bytes': ('Response body size', SIZE_BUCKETS),
+}
+
+METRIC_PREFIX = 'spice_shop_'
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            running += n
+            yield bound, running
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-th observation (an upper estimate)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, running in self.cumulative():
+            if running >= target:
+                return bound if bound != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Registry:
+    """Per-view histograms for every metric in METRICS, shared by all threads of a worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view: str, values: dict) -> None:
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                histograms = self._views[view] = {name: Histogram(buckets) for name, (_, buckets) in METRICS.items()}
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                view: {name: _copy(h) for name, h in histograms.items()}
+                for view, histograms in self._views.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+
+def _copy(histogram):
+    clone = Histogram(histogram.buckets)
+    clone.counts = list(histogram.counts)
+    clone.sum = histogram.sum
+    clone.count = histogram.count
+    return clone
+
+
+def _format_bound(bound) -> str:
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def render_prometheus(snapshot: dict) -> str:
+    lines = []
+    for name, (help_text, _) in METRICS.items():
+        metric = METRIC_PREFIX + name
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for view in sorted(snapshot):
+            h = snapshot[view][name]
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, running in h.cumulative():
+                lines.append(f'{metric}_bucket{{view="{label}",le="{_format_bound(bound)}"}} {running}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {h.sum}')
+            lines.append(f'{metric}_count{{view="{label}"}} {h.count}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestStats:
+    """Counters for the request currently being handled."""
+
+    __slots__ = ('db_seconds', 'queries', 'seen_queries', 'duplicates', 'template_seconds')
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.seen_queries = set()
+        self.duplicates = 0
+        self.template_seconds = 0.0
+
+    def record_query(self, sql, params, elapsed) -> None:
+        self.db_seconds += elapsed
+        self.queries += 1
+        key = (sql, repr(params))
+        if key in self.seen_queries:
+            self.duplicates += 1
+        else:
+            self.seen_queries.add(key)
+
+
+current_stats = ContextVar('current_request_stats', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, params, time.perf_counter() - started)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """connection_created handler: time every statement for the request in current_stats.
+
+    The stats live in a context variable, so queries run by the async ORM's worker
+    thread are still credited to the request that awaited them.
+    """
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+registry = Registry()
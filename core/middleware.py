@@ -0,0 +1,216 @@
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+from . import page_cache
+from .metrics import RequestStats, current_stats, registry
+from .profiling import fold, profiler_setting, sampler
+from .querycheck import NPlusOneError, inspect_queries, inspection_setting, logger as querycheck_logger
+
+
+class RequestMetricsMiddleware:
+    """Record wall, DB and template time, query counts and response size per URL name.
+
+    Sits first in MIDDLEWARE so the wall time covers every other middleware. SQL
+    timing comes from the per-connection wrapper installed by core.metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self._observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self._observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def _observe(self, request, response, stats, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        size = len(response.content) if not response.streaming else 0
+        registry.observe(view, {
+            'request_duration_seconds': elapsed,
+            'request_db_seconds': stats.db_seconds,
+            'request_queries': stats.queries,
+            'request_duplicate_queries': stats.duplicates,
+            'request_template_seconds': stats.template_seconds,
+            'response_size_bytes': size,
+        })
+
+
+class SlowRequestProfilerMiddleware:
+    """Stack-sample a fraction of requests and keep the profile of any that turn out slow.
+
+    Profiles are stored as RequestProfile rows with the URL, query log and user
+    agent, and can be downloaded from the admin as folded stacks.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            # Stack sampling follows threads; under ASGI the event loop thread is
+            # shared by every in-flight request, so async requests are not profiled
+            return self.get_response(request)
+        if random.random() >= profiler_setting('SAMPLE_RATE'):
+            return self.get_response(request)
+
+        queries = []
+        max_queries = profiler_setting('MAX_QUERIES')
+
+        def log_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                if len(queries) < max_queries:
+                    queries.append({'sql': sql, 'ms': round((time.perf_counter() - started) * 1000, 3)})
+
+        thread_id = threading.get_ident()
+        sampler.start(thread_id)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(log_query))
+                response = self.get_response(request)
+        finally:
+            counts = sampler.stop(thread_id)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        if duration_ms >= profiler_setting('THRESHOLD_MS'):
+            self._store(request, response, duration_ms, queries, counts)
+        return response
+
+    def _store(self, request, response, duration_ms, queries, counts):
+        from .models import RequestProfile
+
+        match = getattr(request, 'resolver_match', None)
+        RequestProfile.objects.create(
+            path=request.get_full_path()[:500],
+            view_name=match.view_name if match else '',
+            method=request.method,
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
+            queries=queries,
+            stacks=fold(counts),
+            sample_count=sum(counts.values()),
+        )
+
+
+class QueryInspectionMiddleware:
+    """Development/staging aid: report statements repeated per request (N+1 patterns).
+
+    Each finding names the template line or project frame that issued the
+    queries. Enabled by QUERY_INSPECTION['ENABLED']; with RAISE set the request
+    fails instead of logging, so smoke tests catch new patterns.
+    """
+
+    def __init__(self, get_response):
+        if not inspection_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with inspect_queries() as report:
+            response = self.get_response(request)
+        findings = report.n_plus_one()
+        if findings:
+            message = f'N+1 queries on {request.path}:\n' + report.format(findings)
+            if inspection_setting('RAISE'):
+                raise NPlusOneError(message)
+            querycheck_logger.warning(message)
+            response['X-Repeated-Queries'] = str(sum(count for _, count, _ in findings))
+        return response
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve anonymous GETs of the catalog pages from the full-page cache.
+
+    Sits after the session, CSRF, auth and messages middleware. Those only
+    install lazy objects on the way in, so a hit never loads a session, runs a
+    context processor or renders a template, and a fresh CSRF cookie is still
+    set on the way out.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        match = page_cache.cacheable_request(request)
+        if match is None:
+            return self.get_response(request)
+        key = page_cache.cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            return self._hit(request, match, entry)
+        response = self.get_response(request)
+        if page_cache.storable(response):
+            cache.set(key, page_cache.freeze(response), page_cache.page_cache_setting('TIMEOUT'))
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    async def __acall__(self, request):
+        match = page_cache.cacheable_request(request)
+        if match is None:
+            return await self.get_response(request)
+        key = await page_cache.acache_key(request)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return self._hit(request, match, entry)
+        response = await self.get_response(request)
+        if page_cache.storable(response):
+            await cache.aset(key, page_cache.freeze(response), page_cache.page_cache_setting('TIMEOUT'))
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    def _hit(self, request, match, entry):
+        # Lets the metrics middleware file the hit under the view's name
+        request.resolver_match = match
+        response = HttpResponse(page_cache.thaw(request, entry), content_type=entry['content_type'])
+        response['X-Page-Cache'] = 'HIT'
+        return response
@@ -10,4 +10,30 @@ class User(AbstractUser):
     def __str__(self) -> str:
         return self.get_username()
 
+
+class RequestProfile(models.Model):
+    """Stack samples captured for a request that went over the slow-request threshold."""
+
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    user_agent = models.CharField(max_length=500, blank=True)
+    # [{"sql": ..., "ms": ...}, ...] in execution order
+    queries = models.JSONField(default=list, blank=True)
+    # Folded stacks ("frame;frame;frame count" per line), as read by flamegraph.pl and speedscope
+    stacks = models.TextField(blank=True)
+    sample_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['view_name', '-created_at'], name='profile_view_recent_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
 # Create your models here.
@@ -0,0 +1,100 @@
+"""Full-page cache for anonymous GETs of the catalog pages.
+
+Only requests without session, messages or auth cookies are served from or
+stored in the cache. For those visitors the personalised parts of the layout
+(empty badges, the login link) are the same for everyone. The one per-visitor
+value, the CSRF token in forms, is punched out of the stored HTML and filled in
+with a fresh token on every hit.
+
+Keys include the catalog version, so a product or category change invalidates
+every page at once. Pages and the version live in the shared default cache, so an
+edit made through one worker invalidates the pages every other worker serves.
+"""
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.urls import Resolver404, resolve
+
+from catalog.cache import acatalog_version, catalog_version
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'VIEWS': ['home', 'catalog:product_list', 'catalog:product_detail'],
+    'TIMEOUT': 300,
+    # Query parameters that never change the page (campaign tracking)
+    'IGNORED_PARAMS': ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid'],
+}
+
+
+def page_cache_setting(name):
+    return getattr(settings, 'PAGE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+CSRF_PLACEHOLDER = b'__page_cache_csrf_token__'
+_CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+# Cookie set by django.contrib.messages' CookieStorage
+MESSAGES_COOKIE = 'messages'
+
+
+def cacheable_request(request):
+    """The resolved match if this request may be served from the page cache, else None."""
+    if request.method not in ('GET', 'HEAD') or not page_cache_setting('ENABLED'):
+        return None
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or MESSAGES_COOKIE in request.COOKIES:
+        return None
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    if match.view_name not in page_cache_setting('VIEWS'):
+        return None
+    return match
+
+
+def normalized_query(request) -> str:
+    ignored = set(page_cache_setting('IGNORED_PARAMS'))
+    params = sorted(
+        (key, value.strip()) for key, value in parse_qsl(request.META.get('QUERY_STRING', ''))
+        if value.strip() and key not in ignored
+    )
+    return urlencode(params)
+
+
+def _key(request, version) -> str:
+    raw = f'{request.get_host()}|{request.path}|{normalized_query(request)}'
+    return f'pagecache:{version}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def cache_key(request) -> str:
+    return _key(request, catalog_version())
+
+
+async def acache_key(request) -> str:
+    return _key(request, await acatalog_version())
+
+
+def storable(response) -> bool:
+    if response.status_code != 200 or response.streaming:
+        return False
+    if 'private' in response.get('Cache-Control', '') or 'no-store' in response.get('Cache-Control', ''):
+        return False
+    # A view that set its own cookies is personalised; the CSRF cookie is handled separately
+    return all(name == settings.CSRF_COOKIE_NAME for name in response.cookies)
+
+
+def freeze(response) -> dict:
+    content = _CSRF_INPUT_RE.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+    return {'content': content, 'content_type': response['Content-Type']}
+
+
+def thaw(request, entry: dict) -> bytes:
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+    return content
@@ -0,0 +1,72 @@
+"""Warm per-process caches in the master before workers fork.
+
+With gunicorn's preload_app the master imports the project once and forks
+workers from it, so anything built here (compiled URL regexes, the cached
+template loader, the search index, LocMem cache entries) is shared copy-on-write
+instead of being rebuilt by every worker on its first request. Database
+connections opened while warming are closed again so no socket crosses a fork.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+from .template_warmup import warm_templates
+
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_patterns(resolver):
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += _compile_patterns(pattern)
+    return count
+
+
+def warm_urls():
+    """Import every URLconf, compile every pattern and build the reverse lookups."""
+    resolver = get_resolver()
+    count = _compile_patterns(resolver)
+    resolver.reverse_dict
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+    return count
+
+
+def warm_catalog():
+    """Fill the nav category cache and the autocomplete index."""
+    from catalog.search_index import index
+    from core.context_processors import nav_category_list
+
+    nav_category_list()
+    index.build()
+
+
+def warm():
+    """Run every warm-up step; a failing step is logged and skipped, never fatal."""
+    steps = [
+        ('urls', warm_urls),
+        ('templates', warm_templates),
+        ('catalog', warm_catalog),
+    ]
+    timings = {}
+    try:
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.exception('Preload step %s failed', name)
+            timings[name] = time.perf_counter() - started
+    finally:
+        connections.close_all()
+    logger.info(
+        'Preloaded %s',
+        ', '.join(f'{name} in {seconds * 1000:.0f} ms' for name, seconds in timings.items()),
+    )
+    return timings
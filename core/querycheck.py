@@ -0,0 +1,140 @@
+import logging
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    # A statement shape repeated this many times with different parameters is an N+1
+    'THRESHOLD': 3,
+    # Raise NPlusOneError instead of logging (tests, staging smoke runs)
+    'RAISE': False,
+    # Origins ("file:line") of known, accepted repeats
+    'ALLOW': [],
+}
+
+
+def inspection_setting(name):
+    return getattr(settings, 'QUERY_INSPECTION', {}).get(name, DEFAULTS[name])
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """Statement shape with literals and IN-list lengths erased."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+# Instrumentation frames that sit between the caller and the cursor
+_INTERNAL_FILES = {os.path.abspath(__file__), os.path.abspath(metrics.__file__)}
+
+
+def _origin():
+    """Template line or project frame that triggered the current query."""
+    base = str(settings.BASE_DIR) + os.sep
+    view_frame = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        if view_frame is None and code.co_filename.startswith(base) and code.co_filename not in _INTERNAL_FILES:
+            view_frame = f'{code.co_filename[len(base):]}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return view_frame or 'unknown'
+
+
+def _cache_tables():
+    """Tables of database-backed caches; their lookups repeat by design, one per cache key."""
+    return tuple(
+        f'"{config["LOCATION"]}"' for config in settings.CACHES.values()
+        if config['BACKEND'].endswith('.DatabaseCache')
+    )
+
+
+class QueryReport:
+    def __init__(self):
+        self.counts = Counter()
+        self.params = defaultdict(set)
+        self.origins = defaultdict(Counter)
+        self.ignored_tables = _cache_tables()
+
+    def record(self, sql, params):
+        if self.ignored_tables and any(table in sql for table in self.ignored_tables):
+            return
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        self.params[key].add(repr(params))
+        self.origins[key][_origin()] += 1
+
+    def n_plus_one(self, threshold=None):
+        """[(fingerprint, count, origins)] for shapes repeated with varying parameters."""
+        threshold = threshold or inspection_setting('THRESHOLD')
+        allowed = inspection_setting('ALLOW')
+        found = []
+        for key, count in self.counts.items():
+            if count < threshold or len(self.params[key]) < 2:
+                continue
+            origins = self.origins[key]
+            if all(origin in allowed for origin in origins):
+                continue
+            found.append((key, count, origins))
+        return sorted(found, key=lambda item: item[1], reverse=True)
+
+    def format(self, findings) -> str:
+        lines = []
+        for key, count, origins in findings:
+            lines.append(f'{count}x {key}')
+            for origin, n in origins.most_common():
+                lines.append(f'    {n}x from {origin}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def inspect_queries():
+    """Collect a QueryReport for every statement run inside the block."""
+    report = QueryReport()
+
+    def wrapper(execute, sql, params, many, context):
+        report.record(sql, params)
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+        yield report
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold=None):
+    with inspect_queries() as report:
+        yield report
+    findings = report.n_plus_one(threshold)
+    if findings:
+        raise NPlusOneError('Repeated queries detected:\n' + report.format(findings))
@@ -1,3 +1,396 @@
-from django.test import TestCase
+import copy
+import importlib
+import io
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve
+
+from accounts.models import Address
+from cart.services import add_to_wishlist
+from catalog import cache as catalog_cache
+from catalog.models import Category, Product, Review
+from .checks import check_templates_compile
+from .context_processors import nav_category_list
+from .db import serialized_write
+from .metrics import registry
+from .models import RequestProfile, User
+from .preload import warm
+from .profiling import StackSampler
+from .querycheck import NPlusOneError, assert_no_n_plus_one, fingerprint
+
+
+class FingerprintTests(TestCase):
+    def test_parameters_and_in_lists_are_erased(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = %s'),
+            fingerprint("SELECT  *  FROM t WHERE id IN (%s) AND name = 'x'"),
+        )
+
+    def test_repeated_lookups_are_reported_with_their_origin(self):
+        categories = list(Category.objects.all()[:3])
+        with self.assertRaisesMessage(NPlusOneError, 'core/tests.py'):
+            with assert_no_n_plus_one(threshold=3):
+                for category in categories:
+                    Category.objects.get(pk=category.pk)
+
+
+class PageQueryTests(TestCase):
+    """Pages must not issue one query per listed object; add select_related/prefetch_related instead."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='shopper', password='x')
+        categories = list(Category.objects.all())
+        products = [
+            Product.objects.create(
+                name=f'Spice {i}', slug=f'spice-{i}', category=categories[i % len(categories)],
+                mrp=100 + i, sale_price=90 + i if i % 2 else None, stock_quantity=10,
+            )
+            for i in range(10)
+        ]
+        cls.product = products[0]
+        for i in range(4):
+            reviewer = User.objects.create_user(username=f'reviewer-{i}', password='x')
+            Review.objects.create(product=cls.product, user=reviewer, rating=4, text='Good')
+            Address.objects.create(
+                user=cls.user, full_name='Shopper', phone_number='9999999999', line1=f'{i} Spice Street',
+                city='Kochi', state='Kerala', postal_code='682001',
+            )
+        cls.cart = {str(p.pk): 1 for p in products[:5]}
+        add_to_wishlist(cls.user, [p.pk for p in products[5:]])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['cart_items'] = self.cart
+        session.save()
+
+    def assertNoRepeatedQueries(self, url):
+        with assert_no_n_plus_one(threshold=3):
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, url)
+
+    def test_home(self):
+        self.assertNoRepeatedQueries('/')
+
+    def test_product_list(self):
+        self.assertNoRepeatedQueries('/products/')
+
+    def test_product_detail(self):
+        self.assertNoRepeatedQueries(f'/products/{self.product.slug}/')
+
+    def test_profile(self):
+        self.assertNoRepeatedQueries('/accounts/profile/')
+
+    def test_cart_and_wishlist(self):
+        self.assertNoRepeatedQueries('/cart/')
+        self.assertNoRepeatedQueries('/cart/wishlist/')
+        self.assertNoRepeatedQueries('/cart/payment/')
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(
+            name='Cached Spice', slug='cached-spice', category=Category.objects.first(), mrp=100,
+        )
+        self.url = f'/products/{self.product.slug}/'
+
+    def test_second_anonymous_hit_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'MISS')
+        # Only the catalog version and the page entry, both from the database cache table
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Cached Spice')
+
+    def test_cached_forms_get_a_fresh_csrf_token(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'page_cache_csrf_token')
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_tracking_parameters_share_an_entry(self):
+        self.client.get('/products/?q=spice&utm_source=mail')
+        self.assertEqual(self.client.get('/products/?utm_campaign=x&q=spice')['X-Page-Cache'], 'HIT')
+
+    def test_product_change_invalidates(self):
+        self.client.get(self.url)
+        self.product.mrp = 120
+        self.product.save()
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'MISS')
+
+    def test_product_change_through_another_cache_connection_invalidates(self):
+        self.client.get(self.url)
+        # Another worker bumps the version through its own connection to the shared cache;
+        # a per-process LocMemCache would leave this worker's pages stale
+        other_worker = caches.create_connection('default')
+        self.assertNotIsInstance(other_worker, LocMemCache)
+        with mock.patch.object(catalog_cache, 'cache', other_worker):
+            self.product.mrp = 120
+            self.product.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, '120')
+
+    def test_selling_out_shows_at_once(self):
+        Product.objects.filter(pk=self.product.pk).update(stock_quantity=2)
+        cache.clear()
+        self.assertContains(self.client.get(self.url), 'In stock: 2')
+        # Checkout decrements stock with a stock-only save
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock_quantity = 1
+        product.save(update_fields=['stock_quantity'])
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'HIT')
+        product.stock_quantity = 0
+        product.save(update_fields=['stock_quantity'])
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'In stock: 0')
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.force_login(User.objects.create_user(username='shopper', password='x'))
+        self.client.get(self.url)
+        self.assertNotIn('X-Page-Cache', self.client.get(self.url))
+
+
+class PreloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_fills_the_nav_category_cache(self):
+        warm()
+        # The catalog version and the cached list, both from the database cache table
+        with self.assertNumQueries(2):
+            nav_category_list()
+
+    def test_new_category_refreshes_the_nav(self):
+        nav_category_list()
+        Category.objects.create(name='Aaa Blends', slug='aaa-blends')
+        self.assertEqual(nav_category_list()[0].slug, 'aaa-blends')
+
+
+@override_settings(METRICS_TOKEN='scrape-me')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_each_request_is_observed_under_its_view_name(self):
+        self.client.get('/products/')
+        self.client.get('/products/')
+        histograms = registry.snapshot()['catalog:product_list']
+        self.assertEqual(histograms['request_duration_seconds'].count, 2)
+        self.assertGreater(histograms['request_queries'].sum, 0)
+        self.assertGreater(histograms['response_size_bytes'].sum, 0)
+
+    def test_loopback_alone_does_not_open_the_endpoint(self):
+        # Behind a proxy on the same host every request arrives from 127.0.0.1
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    def test_token_or_staff_login_reads_the_metrics(self):
+        self.client.get('/products/')
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'spice_shop_request_duration_seconds_count{view="catalog:product_list"} 1')
+
+        self.client.force_login(User.objects.create_user(username='ops', password='x', is_staff=True))
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_an_empty_token_never_matches(self):
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+def _spin_for_sampler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class SlowRequestProfilerTests(TestCase):
+    @override_settings(SLOW_REQUEST_PROFILER={'INTERVAL_MS': 1})
+    def test_sampler_folds_the_registered_threads_stacks(self):
+        sampler = StackSampler()
+        stop = threading.Event()
+        worker = threading.Thread(target=_spin_for_sampler, args=(stop,))
+        worker.start()
+        try:
+            sampler.start(worker.ident)
+            time.sleep(0.05)
+            counts = sampler.stop(worker.ident)
+        finally:
+            stop.set()
+            worker.join()
+        self.assertTrue(counts)
+        stack = counts.most_common(1)[0][0]
+        self.assertIn('_spin_for_sampler (core/tests.py:', stack.split(';')[-1])
+        self.assertTrue(stack.startswith('_bootstrap ('), stack)
+
+    @override_settings(SLOW_REQUEST_PROFILER={'SAMPLE_RATE': 1, 'THRESHOLD_MS': 0, 'INTERVAL_MS': 1})
+    def test_slow_requests_are_stored_and_downloadable(self):
+        self.client.get('/products/')
+        profile = RequestProfile.objects.get()
+        self.assertEqual((profile.view_name, profile.status_code), ('catalog:product_list', 200))
+        self.assertTrue(profile.queries)
+
+        self.client.force_login(User.objects.create_superuser(username='ops', password='x'))
+        response = self.client.get(f'/admin/core/requestprofile/{profile.pk}/download/')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="profile-{profile.pk}.folded"')
+        self.assertEqual(response.content.decode(), profile.stacks)
+
+
+def _reload_app_urls():
+    # The app URLconfs pick sync or async views when imported, and the root
+    # URLconf's include() resolvers keep the patterns they first loaded
+    import cart.urls
+    import catalog.urls
+    import spice_shop.urls
+    importlib.reload(catalog.urls)
+    importlib.reload(cart.urls)
+    importlib.reload(spice_shop.urls)
+    clear_url_caches()
+
+
+class AsyncViewTests(TestCase):
+    """The ASGI routes (settings.ASYNC_VIEWS) render what the sync views render."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered first so it runs after the override is undone
+        cls.addClassCleanup(_reload_app_urls)
+        cls.enterClassContext(override_settings(ASYNC_VIEWS=True))
+        _reload_app_urls()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name='Async Sambar Powder', slug='async-sambar-powder', category=Category.objects.first(),
+            mrp=150, sale_price=120, stock_quantity=8,
+        )
+        Product.objects.filter(pk=cls.product.pk).update(lowest_price_30d=120)
+        cls.user = User.objects.create_user(username='async-shopper', password='x')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_async_views_are_routed(self):
+        self.assertEqual(resolve('/products/').func.__module__, 'catalog.async_views')
+        self.assertEqual(resolve('/cart/wishlist/').func.__module__, 'cart.async_views')
+
+    async def test_product_list_and_detail(self):
+        response = await self.async_client.get('/products/', {'q': 'sambar'})
+        self.assertContains(response, 'Async Sambar Powder')
+        self.assertContains(response, 'Lowest in 30 days')
+
+        response = await self.async_client.get(f'/products/{self.product.slug}/')
+        self.assertContains(response, 'In stock: 8')
+        self.assertContains(response, 'Lowest price in the last 30 days')
+
+    async def test_review_posts_through_the_sync_view(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            f'/products/{self.product.slug}/', {'submit_review': '1', 'rating': 5, 'text': 'Tangy and fresh'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Review.objects.filter(product=self.product, user=self.user).aexists())
+
+    async def test_cart_and_wishlist_pages(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(f'/cart/add/{self.product.pk}/', {'qty': 2})
+        self.assertRedirects(response, '/cart/', fetch_redirect_response=False)
+        response = await self.async_client.get('/cart/')
+        self.assertContains(response, 'Async Sambar Powder')
+
+        await self.async_client.get(f'/cart/wishlist/add/{self.product.pk}/')
+        response = await self.async_client.get('/cart/wishlist/')
+        self.assertContains(response, 'Async Sambar Powder')
+        await self.async_client.get(f'/cart/wishlist/move-to-cart/{self.product.pk}/')
+        response = await self.async_client.get('/cart/wishlist/')
+        self.assertNotContains(response, 'Async Sambar Powder')
+
+
+class TemplateWarmupTests(TestCase):
+    def template_dir(self, **templates):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name, source in templates.items():
+            with open(os.path.join(directory.name, f'{name}.html'), 'w') as fh:
+                fh.write(source)
+        config = copy.deepcopy(settings.TEMPLATES)
+        config[0]['DIRS'] = [directory.name]
+        return override_settings(TEMPLATES=config)
+
+    def test_project_templates_pass_the_check(self):
+        self.assertEqual(check_templates_compile(None), [])
+
+    def test_broken_template_fails_the_check(self):
+        with self.template_dir(good='{{ name }}', broken='{% if %}'):
+            errors = check_templates_compile(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        self.assertIn('broken.html', errors[0].msg)
+
+    def test_warm_templates_command(self):
+        with self.template_dir(good='{{ name }}', other='{% load static %}'):
+            out = io.StringIO()
+            call_command('warm_templates', stdout=out)
+        self.assertIn('Compiled 2 templates', out.getvalue())
+
+    def test_warm_templates_command_fails_on_a_broken_template(self):
+        with self.template_dir(good='{{ name }}', broken='{% endblock %}'):
+            err = io.StringIO()
+            with self.assertRaisesMessage(CommandError, '1 of 2 templates failed to compile'):
+                call_command('warm_templates', stdout=io.StringIO(), stderr=err)
+        self.assertIn('broken.html', err.getvalue())
+
+
+class SerializedWriteTests(TransactionTestCase):
+    # Categories come from data migrations; put them back for the TestCases
+    serialized_rollback = True
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Serialized Spice', slug='serialized-spice', category=Category.objects.first(), mrp=100,
+            stock_quantity=100,
+        )
+
+    def test_nested_blocks_do_not_deadlock(self):
+        def nested():
+            with serialized_write():
+                with serialized_write():
+                    Product.objects.filter(pk=self.product.pk).update(name='Nested')
+            connection.close()
+
+        thread = threading.Thread(target=nested)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).name, 'Nested')
+
+    def test_concurrent_read_modify_writes_lose_no_updates(self):
+        def buyer():
+            for _ in range(10):
+                with serialized_write():
+                    product = Product.objects.get(pk=self.product.pk)
+                    product.stock_quantity -= 1
+                    product.save(update_fields=['stock_quantity'])
+            connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 60)
 
-# Create your tests here.
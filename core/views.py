@@ -1,13 +1,53 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 from catalog.models import Product, Category
+from .metrics import registry, render_prometheus
 
 
 def home(request):
     categories = Category.objects.all()[:8]
-    featured = Product.objects.filter(is_active=True)[:6]
+    featured = Product.objects.filter(is_active=True).select_related('category')[:6]
     return render(request, 'home.html', {"categories": categories, "featured": featured})
 
 def contact(request):
     return render(request, 'contact.html')
 
+
+def _metrics_token_ok(request) -> bool:
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, offered = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(offered.encode(), token.encode())
+
+
+def metrics(request):
+    """Prometheus text exposition of this worker's per-view request histograms."""
+    if not (request.user.is_staff or _metrics_token_ok(request)):
+        return HttpResponseForbidden()
+    body = render_prometheus(registry.snapshot())
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def metrics_dashboard(request):
+    rows = []
+    for view, histograms in sorted(registry.snapshot().items()):
+        duration = histograms['request_duration_seconds']
+        rows.append({
+            'view': view,
+            'count': duration.count,
+            'mean_ms': duration.mean * 1000,
+            'p95_ms': duration.quantile(0.95) * 1000,
+            'db_ms': histograms['request_db_seconds'].mean * 1000,
+            'template_ms': histograms['request_template_seconds'].mean * 1000,
+            'queries': histograms['request_queries'].mean,
+            'duplicates': histograms['request_duplicate_queries'].mean,
+            'size_kb': histograms['response_size_bytes'].mean / 1024,
+        })
+    rows.sort(key=lambda r: r['mean_ms'] * r['count'], reverse=True)
+    return render(request, 'core/metrics_dashboard.html', {'rows': rows})
+
 # Create your views here.
@@ -0,0 +1,21 @@
+# gunicorn -c gunicorn.conf.py spice_shop.wsgi:application
+import os
+
+bind = os.environ.get('SPICE_SHOP_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+# WAL and the other SQLite pragmas in settings.SQLITE_TUNING_PRAGMAS
+os.environ.setdefault('SPICE_SHOP_SQLITE_TUNING', '1')
+
+# Import the project once in the master and fork workers from it; spice_shop/wsgi.py
+# warms URL, template and catalog caches before the fork when SPICE_SHOP_PRELOAD is set
+preload_app = os.environ.get('SPICE_SHOP_PRELOAD', '1') == '1'
+if preload_app:
+    os.environ['SPICE_SHOP_PRELOAD'] = '1'
+
+
+def post_fork(server, worker):
+    # Preloading closes its connections, but never let a worker inherit a parent's socket
+    from django.db import connections
+
+    connections.close_all()
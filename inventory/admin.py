@@ -1,6 +1,8 @@
+from django import forms
 from django.contrib import admin
 
-from .models import StockItem
+from .ledger import apply_movement
+from .models import StockForecast, StockItem, StockMovement, StockSnapshot
 
 
 @admin.register(StockItem)
@@ -8,4 +10,68 @@ class StockItemAdmin(admin.ModelAdmin):
     list_display = ("variant", "quantity_available", "updated_at")
     search_fields = ("variant__sku", "variant__product__name")
 
-# Register your models here.
+
+class StockMovementForm(forms.ModelForm):
+    class Meta:
+        model = StockMovement
+        fields = ("product", "kind", "quantity", "note")
+
+    def clean(self):
+        cleaned = super().clean()
+        product, quantity = cleaned.get("product"), cleaned.get("quantity")
+        if product is not None and quantity is not None and product.stock_quantity + quantity < 0:
+            raise forms.ValidationError(f"Only {product.stock_quantity} of {product} in stock.")
+        return cleaned
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """Movements can be added (restocks, returns, write-offs) but never edited or deleted."""
+
+    form = StockMovementForm
+    list_display = ("created_at", "product", "kind", "quantity", "reference")
+    list_filter = ("kind",)
+    search_fields = ("product__name", "reference")
+    raw_id_fields = ("product",)
+    date_hierarchy = "created_at"
+
+    def save_model(self, request, obj, form, change):
+        movement = apply_movement(
+            obj.product, obj.kind, obj.quantity, reference=f"admin {request.user}", note=obj.note,
+        )
+        obj.pk = movement.pk
+
+    def has_change_permission(self, request, obj=None):
+        return obj is None and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("product", "quantity", "through_movement_id", "taken_at")
+    search_fields = ("product__name",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockForecast)
+class StockForecastAdmin(admin.ModelAdmin):
+    list_display = (
+        "product", "status", "stock_on_hand", "daily_velocity", "days_to_stockout", "stockout_date",
+        "reorder_quantity", "computed_at",
+    )
+    list_filter = ("status", "product__category", ("days_to_stockout", admin.EmptyFieldListFilter))
+    search_fields = ("product__name",)
+    list_select_related = ("product",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
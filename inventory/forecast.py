@@ -0,0 +1,161 @@
+"""Sales velocity, days-to-stockout and reorder quantities for the whole catalog.
+
+Daily unit sales come from the analytics rollups (one row per product and day
+sold), are scattered into a products × days NumPy matrix a chunk of products at
+a time, and every statistic is computed for the whole chunk with array
+operations; no Python loop runs per product or per day.
+"""
+import math
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from analytics.models import DailyProductSales
+from catalog.models import Product
+from core.db import serialized_write
+from .models import StockForecast
+
+
+DEFAULTS = {
+    # Days of sales history considered
+    'WINDOW_DAYS': 365,
+    # Age in days at which a day's sales count half as much as today's
+    'HALF_LIFE_DAYS': 28,
+    # Days between placing a purchase order and the stock arriving
+    'LEAD_TIME_DAYS': 14,
+    # Days of demand a reorder should cover once it arrives
+    'COVER_DAYS': 30,
+    # Standard deviations of lead-time demand held as safety stock (1.65 ≈ 95% service level)
+    'SAFETY_Z': 1.65,
+    # Products per matrix; bounds memory at CHUNK_SIZE × WINDOW_DAYS floats
+    'CHUNK_SIZE': 5000,
+}
+
+
+def forecast_setting(name):
+    return getattr(settings, 'STOCK_FORECAST', {}).get(name, DEFAULTS[name])
+
+
+def day_weights(window: int, half_life: float):
+    """Exponential decay weights, oldest day first, summing to 1."""
+    ages = np.arange(window - 1, -1, -1, dtype=np.float64)
+    weights = 0.5 ** (ages / half_life)
+    return weights / weights.sum()
+
+
+def forecast(sales, stock, *, half_life=None, lead_time=None, cover=None, safety_z=None) -> dict:
+    """Forecast every row of a products × days sales matrix (oldest day first).
+
+    Returns arrays keyed by StockForecast field name; days_to_stockout is inf
+    for products with no demand.
+    """
+    half_life = half_life or forecast_setting('HALF_LIFE_DAYS')
+    lead_time = lead_time or forecast_setting('LEAD_TIME_DAYS')
+    cover = cover or forecast_setting('COVER_DAYS')
+    safety_z = forecast_setting('SAFETY_Z') if safety_z is None else safety_z
+    stock = np.asarray(stock, dtype=np.float64)
+
+    weights = day_weights(sales.shape[1], half_life)
+    velocity = sales @ weights
+    variance = np.maximum((sales * sales) @ weights - velocity * velocity, 0.0)
+    safety_stock = safety_z * np.sqrt(variance * lead_time)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_to_stockout = np.where(velocity > 0, stock / velocity, np.inf)
+    reorder_point = np.ceil(velocity * lead_time + safety_stock)
+    reorder_quantity = np.maximum(np.ceil(velocity * (lead_time + cover) + safety_stock - stock), 0)
+
+    status = np.full(stock.shape, StockForecast.OK, dtype=object)
+    status[stock <= reorder_point] = StockForecast.LOW
+    status[days_to_stockout <= lead_time] = StockForecast.CRITICAL
+    status[stock <= 0] = StockForecast.OUT
+    return {
+        'daily_velocity': velocity,
+        'units_sold': sales.sum(axis=1),
+        'days_to_stockout': days_to_stockout,
+        'reorder_point': reorder_point,
+        'reorder_quantity': reorder_quantity,
+        'status': status,
+    }
+
+
+def sales_matrix(product_ids, start: date, window: int):
+    """products × days float matrix of units sold, rows in product_ids order."""
+    product_ids = np.asarray(product_ids)
+    matrix = np.zeros((len(product_ids), window), dtype=np.float64)
+    if not len(product_ids):
+        return matrix
+    rows = (
+        DailyProductSales.objects
+        .filter(product_id__gte=int(product_ids[0]), product_id__lte=int(product_ids[-1]), day__gte=start)
+        .values_list('product_id', 'day', 'units')
+    )
+    triples = np.array(
+        [(pk, (day - start).days, units) for pk, day, units in rows.iterator(chunk_size=10000)], dtype=np.int64,
+    ).reshape(-1, 3)
+    if len(triples):
+        index = np.searchsorted(product_ids, triples[:, 0])
+        known = (index < len(product_ids)) & (product_ids[np.minimum(index, len(product_ids) - 1)] == triples[:, 0])
+        known &= triples[:, 1] < window
+        np.add.at(matrix, (index[known], triples[known, 1]), triples[known, 2])
+    return matrix
+
+
+def _forecast_rows(product_ids, result, stock, today, now):
+    for i, pk in enumerate(product_ids):
+        days = float(result['days_to_stockout'][i])
+        finite = math.isfinite(days)
+        yield StockForecast(
+            product_id=int(pk),
+            status=result['status'][i],
+            stock_on_hand=int(stock[i]),
+            daily_velocity=float(result['daily_velocity'][i]),
+            units_sold=int(result['units_sold'][i]),
+            days_to_stockout=days if finite else None,
+            stockout_date=today + timedelta(days=int(days)) if finite and days < 3650 else None,
+            reorder_point=int(result['reorder_point'][i]),
+            reorder_quantity=int(result['reorder_quantity'][i]),
+            computed_at=now,
+        )
+
+
+def run_forecast(chunk_size=None) -> dict:
+    """Forecast every active product and upsert StockForecast; returns counts and timings."""
+    chunk_size = chunk_size or forecast_setting('CHUNK_SIZE')
+    window = forecast_setting('WINDOW_DAYS')
+    today = timezone.localdate()
+    start = today - timedelta(days=window - 1)
+    now = timezone.now()
+    fields = [f.name for f in StockForecast._meta.concrete_fields if f.name not in ('id', 'product')]
+    stats = {'products': 0, 'load_seconds': 0.0, 'compute_seconds': 0.0, 'write_seconds': 0.0}
+
+    products = Product.objects.filter(is_active=True).order_by('pk').values_list('pk', 'stock_quantity')
+    last_pk = 0
+    while True:
+        started = time.perf_counter()
+        chunk = list(products.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        product_ids = np.array([pk for pk, _ in chunk], dtype=np.int64)
+        stock = np.array([quantity for _, quantity in chunk], dtype=np.float64)
+        sales = sales_matrix(product_ids, start, window)
+        loaded = time.perf_counter()
+        result = forecast(sales, stock)
+        computed = time.perf_counter()
+        with serialized_write():
+            StockForecast.objects.bulk_create(
+                _forecast_rows(product_ids, result, stock, today, now),
+                batch_size=1000, update_conflicts=True, unique_fields=['product'], update_fields=fields,
+            )
+        stats['load_seconds'] += loaded - started
+        stats['compute_seconds'] += computed - loaded
+        stats['write_seconds'] += time.perf_counter() - computed
+        stats['products'] += len(chunk)
+
+    # Products that were deactivated keep no stale forecast
+    StockForecast.objects.filter(computed_at__lt=now).delete()
+    return stats
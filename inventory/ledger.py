@@ -0,0 +1,97 @@
+"""Stock movement ledger: append-only movements, periodic snapshots, reconstruction.
+
+A product's ledger stock is its latest snapshot plus the sum of the movements
+recorded after it. The (product, id) index turns that sum into a short range
+scan no matter how long the history grows, and snapshot_stock keeps the scanned
+range short.
+"""
+from django.db.models import Exists, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from catalog.models import Product
+from .models import StockMovement, StockSnapshot
+
+
+def record_movements(movements) -> None:
+    """Append movements whose stock_quantity change the caller has already made.
+
+    Checkout collects one movement per line and writes them here in a single
+    INSERT inside its transaction.
+    """
+    StockMovement.objects.bulk_create(movements)
+
+
+def apply_movement(product, kind, quantity, reference='', note=''):
+    """Change a product's stock_quantity by quantity and record why, atomically with the caller."""
+    # save() rather than update() so the catalog signals refresh cached pages and feeds
+    product.stock_quantity = F('stock_quantity') + quantity
+    product.save(update_fields=['stock_quantity'])
+    product.refresh_from_db(fields=['stock_quantity'])
+    return StockMovement.objects.create(
+        product=product, kind=kind, quantity=quantity, reference=reference[:100], note=note[:255],
+    )
+
+
+def record_stock_edit(product, old_quantity, reference='') -> None:
+    """Record a stock_quantity typed into a product form as a restock or an adjustment."""
+    delta = int(product.stock_quantity or 0) - int(old_quantity or 0)
+    if delta:
+        kind = StockMovement.RESTOCK if delta > 0 else StockMovement.ADJUSTMENT
+        StockMovement.objects.create(product=product, kind=kind, quantity=delta, reference=reference[:100])
+
+
+def with_ledger_stock(products, upto=None):
+    """Annotate products with ledger_quantity (and the snapshot it starts from).
+
+    upto caps the movements counted, so a snapshot run sees one consistent
+    point in the ledger while checkouts keep appending.
+    """
+    snapshot = StockSnapshot.objects.filter(product=OuterRef('pk')).order_by('-through_movement_id')
+    movements = StockMovement.objects.filter(product=OuterRef('pk'), id__gt=OuterRef('snapshot_through'))
+    if upto is not None:
+        movements = movements.filter(id__lte=upto)
+    delta = movements.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return products.annotate(
+        snapshot_quantity=Coalesce(Subquery(snapshot.values('quantity')[:1]), Value(0)),
+        snapshot_through=Coalesce(Subquery(snapshot.values('through_movement_id')[:1]), Value(0)),
+        ledger_quantity=F('snapshot_quantity') + Coalesce(Subquery(delta, output_field=IntegerField()), Value(0)),
+    )
+
+
+def ledger_stock(product_ids) -> dict:
+    """{product_id: stock reconstructed from the ledger}."""
+    rows = with_ledger_stock(Product.objects.filter(pk__in=product_ids)).values_list('pk', 'ledger_quantity')
+    return dict(rows)
+
+
+def take_snapshots(batch_size: int = 1000) -> int:
+    """Snapshot every product that has movements after its latest snapshot; returns how many."""
+    upto = StockMovement.objects.aggregate(last=Max('id'))['last']
+    if upto is None:
+        return 0
+    pending = StockMovement.objects.filter(product=OuterRef('pk'), id__gt=OuterRef('snapshot_through'), id__lte=upto)
+    products = (
+        with_ledger_stock(Product.objects.order_by('pk'), upto=upto)
+        .filter(Exists(pending))
+        .values_list('pk', 'ledger_quantity')
+    )
+    taken = 0
+    last_pk = 0
+    while True:
+        rows = list(products.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            return taken
+        last_pk = rows[-1][0]
+        StockSnapshot.objects.bulk_create([
+            StockSnapshot(product_id=pk, quantity=quantity, through_movement_id=upto) for pk, quantity in rows
+        ])
+        taken += len(rows)
+
+
+def mismatches():
+    """Products whose stock_quantity disagrees with the ledger, found in one query over the catalog."""
+    return (
+        with_ledger_stock(Product.objects.order_by('pk'))
+        .exclude(ledger_quantity=F('stock_quantity'))
+        .values_list('pk', 'name', 'stock_quantity', 'ledger_quantity')
+    )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import Product
+from core.db import serialized_write
+from inventory.ledger import mismatches
+from inventory.models import StockMovement
+
+
+class Command(BaseCommand):
+    help = "Compare every product's stock_quantity with the stock movement ledger in one pass"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true",
+            help="Record adjustment movements that bring the ledger in line with stock_quantity",
+        )
+
+    def handle(self, *args, **options):
+        found = list(mismatches().iterator(chunk_size=2000))
+        for pk, name, stock, ledger in found:
+            self.stdout.write(f"#{pk} {name}: stock_quantity {stock}, ledger {ledger} ({stock - ledger:+d})")
+        if not found:
+            self.stdout.write(self.style.SUCCESS(f"Ledger matches stock_quantity for all {Product.objects.count()} products"))
+            return
+        if not options["fix"]:
+            raise CommandError(f"{len(found)} products disagree with the ledger")
+        with serialized_write():
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    product_id=pk, kind=StockMovement.ADJUSTMENT, quantity=stock - ledger,
+                    reference="reconcile_stock", note="Reconciled against stock_quantity",
+                )
+                for pk, _, stock, ledger in found
+            ], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"Recorded {len(found)} adjustments"))
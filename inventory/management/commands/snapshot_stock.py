@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Snapshot the ledger stock of every product with movements since its last snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        taken = take_snapshots(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Took {taken} stock snapshots"))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def snapshot_opening_stock(apps, schema_editor):
+    """Start every product's ledger from its current stock_quantity."""
+    Product = apps.get_model('catalog', 'Product')
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    rows = Product.objects.order_by('pk').values_list('pk', 'stock_quantity')
+    StockSnapshot.objects.bulk_create(
+        (StockSnapshot(product_id=pk, quantity=stock, through_movement_id=0) for pk, stock in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stockmovement_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(snapshot_opening_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_relatedproduct'),
+        ('inventory', '0003_opening_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('out', 'Out of stock'), ('critical', 'Runs out within lead time'), ('low', 'Reorder soon'), ('ok', 'OK')], max_length=10)),
+                ('stock_on_hand', models.PositiveIntegerField()),
+                ('daily_velocity', models.FloatField()),
+                ('units_sold', models.PositiveIntegerField(help_text='Units sold in the forecast window')),
+                ('days_to_stockout', models.FloatField(blank=True, null=True)),
+                ('stockout_date', models.DateField(blank=True, null=True)),
+                ('reorder_point', models.PositiveIntegerField()),
+                ('reorder_quantity', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='catalog.product')),
+            ],
+            options={
+                'ordering': ['days_to_stockout'],
+                'indexes': [models.Index(fields=['status', 'days_to_stockout'], name='stock_forecast_status_idx')],
+            },
+        ),
+    ]
@@ -9,4 +9,95 @@ class StockItem(models.Model):
     def __str__(self) -> str:
         return f"{self.variant.sku} — {self.quantity_available} available"
 
-# Create your models here.
+
+class StockMovement(models.Model):
+    """Append-only record of one change to a product's stock_quantity.
+
+    quantity is signed: sales are negative, restocks and returns positive.
+    Rows are never updated or deleted; a correction is another movement.
+    """
+
+    SALE = 'sale'
+    RESTOCK = 'restock'
+    ADJUSTMENT = 'adjustment'
+    RETURN = 'return'
+    KIND_CHOICES = [
+        (SALE, 'Sale'),
+        (RESTOCK, 'Restock'),
+        (ADJUSTMENT, 'Adjustment'),
+        (RETURN, 'Return'),
+    ]
+
+    product = models.ForeignKey('catalog.Product', on_delete=models.CASCADE, related_name='stock_movements')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    # Order id, admin username or command name that caused the movement
+    reference = models.CharField(max_length=100, blank=True)
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # Stock is rebuilt by summing one product's movements after its last snapshot
+            models.Index(fields=['product', 'id'], name='stock_movement_product_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.quantity:+d} {self.product}"
+
+
+class StockSnapshot(models.Model):
+    """A product's ledger stock including every movement up to through_movement_id."""
+
+    product = models.ForeignKey('catalog.Product', on_delete=models.CASCADE, related_name='stock_snapshots')
+    quantity = models.IntegerField()
+    # 0 for the opening balance taken before the ledger existed
+    through_movement_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-through_movement_id']
+        indexes = [
+            models.Index(fields=['product', '-through_movement_id'], name='stock_snapshot_latest_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product}: {self.quantity} through #{self.through_movement_id}"
+
+
+class StockForecast(models.Model):
+    """Latest replenishment forecast for a product, rewritten by forecast_stock."""
+
+    OK = 'ok'
+    LOW = 'low'
+    CRITICAL = 'critical'
+    OUT = 'out'
+    STATUS_CHOICES = [
+        (OUT, 'Out of stock'),
+        (CRITICAL, 'Runs out within lead time'),
+        (LOW, 'Reorder soon'),
+        (OK, 'OK'),
+    ]
+
+    product = models.OneToOneField('catalog.Product', on_delete=models.CASCADE, related_name='forecast')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    stock_on_hand = models.PositiveIntegerField()
+    # Units per day, recent days weighted more heavily
+    daily_velocity = models.FloatField()
+    units_sold = models.PositiveIntegerField(help_text='Units sold in the forecast window')
+    # Null when the product hasn't sold in the window
+    days_to_stockout = models.FloatField(null=True, blank=True)
+    stockout_date = models.DateField(null=True, blank=True)
+    reorder_point = models.PositiveIntegerField()
+    reorder_quantity = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['days_to_stockout']
+        indexes = [
+            models.Index(fields=['status', 'days_to_stockout'], name='stock_forecast_status_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product}: {self.get_status_display()}"
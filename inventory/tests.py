@@ -1,3 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Address
+from analytics.models import DailyProductSales
+from catalog.models import Category, Product
+from core.models import User
+from .ledger import apply_movement, ledger_stock, take_snapshots
+from .models import StockForecast, StockMovement, StockSnapshot
+
+try:
+    import numpy as np
+
+    from .forecast import forecast, run_forecast
+except ImportError:
+    np = None
+
+
+class StockLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.first()
+        cls.cumin = Product.objects.create(name='Cumin', slug='cumin-ledger', category=category, mrp=80)
+        cls.clove = Product.objects.create(name='Clove', slug='clove-ledger', category=category, mrp=90)
+        for product in (cls.cumin, cls.clove):
+            apply_movement(product, StockMovement.RESTOCK, 20)
+
+    def test_checkout_records_sale_movements(self):
+        user = User.objects.create_user(username='buyer', password='x')
+        Address.objects.create(
+            user=user, full_name='Buyer', phone_number='9999999999', line1='1 Spice Street',
+            city='Kochi', state='Kerala', postal_code='682001',
+        )
+        self.client.force_login(user)
+        session = self.client.session
+        session['cart_items'] = {str(self.cumin.pk): 3, str(self.clove.pk): 5}
+        session.save()
+
+        self.client.post('/cart/payment/', {'card_number': '4111111111111111', 'expiry': '12/99', 'cvv': '123'})
+
+        sales = StockMovement.objects.filter(kind=StockMovement.SALE)
+        self.assertEqual(sorted(sales.values_list('quantity', flat=True)), [-5, -3])
+        self.assertEqual(ledger_stock([self.cumin.pk, self.clove.pk]), {self.cumin.pk: 17, self.clove.pk: 15})
+
+    def test_stock_is_snapshot_plus_later_movements(self):
+        self.assertEqual(take_snapshots(), 2)
+        self.assertEqual(take_snapshots(), 0)
+
+        apply_movement(self.cumin, StockMovement.SALE, -4)
+        apply_movement(self.cumin, StockMovement.RETURN, 1)
+        self.assertEqual(ledger_stock([self.cumin.pk]), {self.cumin.pk: 17})
+
+        self.assertEqual(take_snapshots(), 1)
+        snapshot = StockSnapshot.objects.filter(product=self.cumin).first()
+        self.assertEqual(snapshot.quantity, 17)
+        self.assertEqual(ledger_stock([self.cumin.pk, self.clove.pk]), {self.cumin.pk: 17, self.clove.pk: 20})
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Product.objects.filter(pk=self.clove.pk).update(stock_quantity=12)
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_stock', stdout=StringIO())
+        call_command('reconcile_stock', '--fix', stdout=StringIO())
+
+        adjustment = StockMovement.objects.get(kind=StockMovement.ADJUSTMENT)
+        self.assertEqual((adjustment.product_id, adjustment.quantity), (self.clove.pk, -8))
+        out = StringIO()
+        call_command('reconcile_stock', stdout=out)
+        self.assertIn('Ledger matches', out.getvalue())
+
+    def test_admin_stock_edit_is_recorded_as_restock(self):
+        admin_user = User.objects.create_superuser(username='admin', password='x')
+        self.client.force_login(admin_user)
+        response = self.client.post(f'/admin/catalog/product/{self.cumin.pk}/change/', {
+            'name': 'Cumin', 'slug': 'cumin-ledger', 'category': self.cumin.category_id, 'is_active': 'on',
+            'stock_quantity': 30, 'mrp': '80.00', 'sale_price': '',
+            'images-TOTAL_FORMS': 0, 'images-INITIAL_FORMS': 0,
+        })
+        self.assertEqual(response.status_code, 302)
+        restock = StockMovement.objects.filter(product=self.cumin).first()
+        self.assertEqual((restock.kind, restock.quantity), (StockMovement.RESTOCK, 10))
+        self.assertEqual(ledger_stock([self.cumin.pk]), {self.cumin.pk: 30})
+
+
+@skipUnless(np, 'numpy is not installed')
+class StockForecastTests(TestCase):
+    def test_forecast_flags_fast_sellers(self):
+        sales = np.array([[2.0] * 60, [0.0] * 60, [0.0] * 59 + [1.0]])
+        result = forecast(sales, [20, 5, 0], half_life=28, lead_time=14, cover=30, safety_z=0)
+        self.assertAlmostEqual(result['daily_velocity'][0], 2.0)
+        self.assertAlmostEqual(result['days_to_stockout'][0], 10.0)
+        self.assertEqual(list(result['status']), [StockForecast.CRITICAL, StockForecast.OK, StockForecast.OUT])
+        self.assertEqual(result['reorder_quantity'][0], 2 * 44 - 20)
+        self.assertEqual(result['reorder_quantity'][1], 0)
+
+    def test_run_forecast_reads_daily_rollups(self):
+        category = Category.objects.first()
+        saffron = Product.objects.create(name='Saffron', slug='saffron-forecast', category=category, stock_quantity=30)
+        idle = Product.objects.create(name='Mace', slug='mace-forecast', category=category, stock_quantity=30)
+        today = timezone.localdate()
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(
+                day=today - timedelta(days=age), product=saffron, product_name='Saffron', category=category,
+                category_name=category.name, orders=1, units=3, revenue=300,
+            )
+            for age in range(90)
+        ])
+
+        stats = run_forecast(chunk_size=1)
 
-# Create your tests here.
+        self.assertEqual(stats['products'], Product.objects.filter(is_active=True).count())
+        fast = StockForecast.objects.get(product=saffron)
+        self.assertEqual(fast.status, StockForecast.CRITICAL)
+        self.assertEqual(fast.units_sold, 270)
+        # Older, empty days of the window still carry a little weight, so a bit over 30 / 3
+        self.assertTrue(10 < fast.days_to_stockout < 14)
+        self.assertGreater(fast.reorder_quantity, 0)
+        slow = StockForecast.objects.get(product=idle)
+        self.assertIsNone(slow.days_to_stockout)
+        self.assertEqual(slow.status, StockForecast.OK)
@@ -0,0 +1,39 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.mailer import Mailer
+from notifications.marketing import campaign_recipients, send_campaign
+
+
+class Command(BaseCommand):
+    help = "Send a marketing campaign to every opted-in user"
+
+    def add_arguments(self, parser):
+        parser.add_argument("template", nargs="?", default="marketing_newsletter",
+                            help="Template name under templates/notifications/")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--rate", type=float, default=None, help="Messages per second (0 = unthrottled)")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many recipients")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the recipients")
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Start from the first recipient instead of resuming an unfinished send",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            self.stdout.write(f"{campaign_recipients().count()} opted-in recipients")
+            return
+        started = time.perf_counter()
+        with Mailer(rate=options["rate"]) as mailer:
+            sent = send_campaign(
+                options["template"], mailer, batch_size=options["batch_size"], limit=options["limit"],
+                restart=options["restart"],
+            )
+        elapsed = time.perf_counter() - started
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent} messages in {elapsed:.1f}s ({sent / elapsed if elapsed else 0:.0f}/s), peak RSS {peak_mb:.0f} MB"
+        ))
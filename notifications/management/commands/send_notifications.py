@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from notifications.mailer import Mailer
+from notifications.outbox import send_due_notifications, send_wishlist_alerts
+
+
+class Command(BaseCommand):
+    help = "Send due order/shipping notifications and wishlist alert digests over one SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--rate", type=float, default=None, help="Messages per second (0 = unthrottled)")
+
+    def handle(self, *args, **options):
+        with Mailer(rate=options["rate"]) as mailer:
+            notifications = send_due_notifications(mailer, batch_size=options["batch_size"])
+            digests = send_wishlist_alerts(mailer, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {notifications} notifications and {digests} wishlist digests"))
@@ -0,0 +1,33 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from notifications.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = "Run a local SMTP stand-in that accepts and counts messages (EMAIL_PORT should point at it)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+        parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between progress lines")
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options["host"], options["port"], keep=0)
+        try:
+            asyncio.run(self._run(sink, options["report_every"]))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"{sink.message_count} messages to {sink.recipient_count} recipients "
+                          f"over {sink.connection_count} connections")
+
+    async def _run(self, sink, every):
+        await sink.serve()
+        self.stdout.write(f"Listening on {sink.host}:{sink.port}")
+        last = -1
+        while True:
+            await asyncio.sleep(every)
+            if sink.message_count != last:
+                last = sink.message_count
+                self.stdout.write(f"{sink.message_count} messages over {sink.connection_count} connections")
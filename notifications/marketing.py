@@ -0,0 +1,72 @@
+"""Marketing sends to every opted-in user in bounded memory.
+
+Recipients are read in primary-key batches of a few columns, never as model
+instances or one big result set. The campaign template is rendered once and
+only the per-recipient placeholders are filled for each message.
+
+Progress is saved after every batch. A run that stops early, on an SMTP error
+or at --limit, resumes after the last batch that went out instead of mailing
+the first recipients again; only the batch that was in flight can repeat.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils.html import escape
+
+from catalog.models import Product
+from .mailer import BatchTemplates, PersonalizedBody, build_message, notification_setting
+from .models import CampaignProgress
+
+
+def campaign_recipients():
+    return (
+        get_user_model().objects
+        .filter(marketing_opt_in=True, is_active=True)
+        .exclude(email='')
+        .order_by('pk')
+    )
+
+
+def campaign_context() -> dict:
+    products = Product.objects.filter(is_active=True, sale_price__isnull=False).order_by('-id')[:6]
+    return {'products': list(products)}
+
+
+def send_campaign(name: str, mailer, batch_size=None, limit=None, restart=False) -> int:
+    """Send the campaign templates notifications/<name>*.txt|html to opted-in users.
+
+    Resumes an unfinished send of the same campaign unless restart is set;
+    returns how many messages this run sent.
+    """
+    progress, _ = CampaignProgress.objects.get_or_create(name=name)
+    if restart:
+        progress.last_pk = progress.sent = 0
+        progress.save(update_fields=['last_pk', 'sent', 'updated_at'])
+    batch_size = batch_size or notification_setting('BATCH_SIZE')
+    subject, text, html = BatchTemplates(name).render(campaign_context())
+    text_body = PersonalizedBody(text)
+    html_body = PersonalizedBody(html) if html else None
+
+    recipients = campaign_recipients().values_list('pk', 'email', 'first_name', 'username')
+    sent = 0
+    last_pk = progress.last_pk
+    while limit is None or sent < limit:
+        size = batch_size if limit is None else min(batch_size, limit - sent)
+        rows = list(recipients.filter(pk__gt=last_pk)[:size])
+        if not rows:
+            # Finished; the next send of this campaign starts from the first recipient
+            progress.delete()
+            break
+        last_pk = rows[-1][0]
+        messages = []
+        for _, email, first_name, username in rows:
+            name_field = first_name or username
+            messages.append(build_message(
+                email, subject, text_body.fill(first_name=name_field),
+                html_body.fill(first_name=escape(name_field)) if html_body else None,
+            ))
+        mailer.send(messages)
+        sent += len(messages)
+        CampaignProgress.objects.filter(pk=progress.pk).update(
+            last_pk=last_pk, sent=F('sent') + len(messages),
+        )
+    return sent
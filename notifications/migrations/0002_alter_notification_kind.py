@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('order_confirmation', 'Order confirmation'), ('shipping_eta', 'Shipping ETA'), ('abandoned_cart', 'Abandoned cart reminder')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Notification(models.Model):
+    """Outbox row for a transactional email, drained in batches by send_notifications."""
+
+    ORDER_CONFIRMATION = 'order_confirmation'
+    SHIPPING_ETA = 'shipping_eta'
+    ABANDONED_CART = 'abandoned_cart'
+    KIND_CHOICES = [
+        (ORDER_CONFIRMATION, 'Order confirmation'),
+        (SHIPPING_ETA, 'Shipping ETA'),
+        (ABANDONED_CART, 'Abandoned cart reminder'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    # Template context; must stay JSON-serializable
+    context = models.JSONField(default=dict, blank=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['send_after'], condition=models.Q(sent_at__isnull=True), name='notification_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} for {self.user}"
+
+
+class CampaignProgress(models.Model):
+    """High-water mark of a campaign send that hasn't finished; recipients up to last_pk were mailed."""
+
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.PositiveBigIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Campaign progress'
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.sent} sent, up to user {self.last_pk}"
@@ -0,0 +1,111 @@
+"""Queue transactional emails in the Notification outbox and drain it in batches."""
+import smtplib
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from cart.models import WishlistAlert
+from .mailer import BatchTemplates, notification_setting
+from .models import Notification
+
+
+# Shipping ETA mails go out the morning before the expected arrival
+ETA_SEND_TIME = time(9, 0)
+
+
+def queue_order_notifications(user, order: dict) -> None:
+    """Queue the confirmation now and the shipping ETA for the day before arrival_date."""
+    arrival = date.fromisoformat(order['arrival_date'])
+    eta_at = timezone.make_aware(datetime.combine(arrival - timedelta(days=1), ETA_SEND_TIME))
+    Notification.objects.bulk_create([
+        Notification(user=user, kind=Notification.ORDER_CONFIRMATION, context={'order': order}),
+        Notification(
+            user=user, kind=Notification.SHIPPING_ETA, send_after=eta_at,
+            context={'order': {key: order[key] for key in ('id', 'arrival_date', 'total')}},
+        ),
+    ])
+
+
+def _record_failure(pks, error) -> None:
+    Notification.objects.filter(pk__in=pks).update(attempts=F('attempts') + 1, last_error=str(error)[:500])
+
+
+def send_due_notifications(mailer, batch_size=None) -> int:
+    """Send every due outbox row through mailer; returns the number sent.
+
+    Rows are read in primary-key batches; within a batch each kind's templates
+    are loaded once and its messages go out in one send_messages() call.
+    """
+    batch_size = batch_size or notification_setting('BATCH_SIZE')
+    now = timezone.now()
+    due = Notification.objects.filter(
+        sent_at__isnull=True, send_after__lte=now, attempts__lt=notification_setting('MAX_ATTEMPTS'),
+    ).select_related('user').order_by('pk')
+
+    sent = 0
+    last_pk = 0
+    while True:
+        batch = list(due.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        by_kind = defaultdict(list)
+        for notification in batch:
+            by_kind[notification.kind].append(notification)
+
+        for kind, rows in by_kind.items():
+            deliverable = [n for n in rows if n.user.email]
+            undeliverable = [n.pk for n in rows if not n.user.email]
+            if undeliverable:
+                Notification.objects.filter(pk__in=undeliverable).update(
+                    attempts=notification_setting('MAX_ATTEMPTS'), last_error='User has no email address',
+                )
+            if not deliverable:
+                continue
+            templates = BatchTemplates(kind)
+            messages = [templates.message(n.user.email, {'user': n.user, **n.context}) for n in deliverable]
+            pks = [n.pk for n in deliverable]
+            try:
+                mailer.send(messages)
+            except (smtplib.SMTPException, OSError) as exc:
+                _record_failure(pks, exc)
+                continue
+            Notification.objects.filter(pk__in=pks).update(sent_at=timezone.now(), attempts=F('attempts') + 1)
+            sent += len(pks)
+    return sent
+
+
+def send_wishlist_alerts(mailer, batch_size=None) -> int:
+    """Send one digest per user covering all of their unsent WishlistAlert rows."""
+    batch_size = batch_size or notification_setting('BATCH_SIZE')
+    pending = WishlistAlert.objects.filter(sent_at__isnull=True)
+    users = pending.order_by('user_id').values_list('user_id', flat=True).distinct()
+
+    sent = 0
+    last_user = 0
+    while True:
+        user_ids = list(users.filter(user_id__gt=last_user)[:batch_size])
+        if not user_ids:
+            break
+        last_user = user_ids[-1]
+        alerts_by_user = defaultdict(list)
+        for alert in pending.filter(user_id__in=user_ids).select_related('user', 'product').order_by('user_id', 'pk'):
+            alerts_by_user[alert.user_id].append(alert)
+
+        templates = BatchTemplates('wishlist_alerts')
+        messages, alert_pks = [], []
+        for alerts in alerts_by_user.values():
+            user = alerts[0].user
+            alert_pks.extend(alert.pk for alert in alerts)
+            if user.email:
+                messages.append(templates.message(user.email, {'user': user, 'alerts': alerts}))
+        try:
+            mailer.send(messages)
+        except (smtplib.SMTPException, OSError):
+            # Alerts stay unsent and are picked up by the next run
+            continue
+        WishlistAlert.objects.filter(pk__in=alert_pks).update(sent_at=timezone.now())
+        sent += len(messages)
+    return sent
@@ -0,0 +1,96 @@
+"""A minimal local SMTP server that accepts and counts messages.
+
+Stands in for a real relay in tests and load runs, so the SMTP path (one pooled
+connection, batching, throttling) can be exercised without sending mail.
+"""
+import asyncio
+import threading
+
+
+class SMTPSink:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, keep: int = 100):
+        self.host = host
+        self.port = port
+        # Only the last `keep` messages are retained, so large runs stay small
+        self.keep = keep
+        self.messages = []
+        self.message_count = 0
+        self.recipient_count = 0
+        self.connection_count = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def _handle(self, reader, writer):
+        self.connection_count += 1
+        writer.write(b'220 smtp-sink ESMTP\r\n')
+        recipients = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command == b'EHLO':
+                writer.write(b'250-smtp-sink\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n')
+            elif command in (b'HELO', b'NOOP'):
+                writer.write(b'250 OK\r\n')
+            elif command in (b'MAIL', b'RSET'):
+                recipients = []
+                writer.write(b'250 OK\r\n')
+            elif command == b'RCPT':
+                recipients.append(line[8:].strip().decode(errors='replace'))
+                writer.write(b'250 OK\r\n')
+            elif command == b'DATA':
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                await writer.drain()
+                data = []
+                while True:
+                    chunk = await reader.readline()
+                    if chunk in (b'.\r\n', b''):
+                        break
+                    data.append(chunk)
+                self._store(recipients, b''.join(data))
+                recipients = []
+                writer.write(b'250 OK queued\r\n')
+            elif command == b'QUIT':
+                writer.write(b'221 Bye\r\n')
+                await writer.drain()
+                break
+            else:
+                writer.write(b'502 Command not implemented\r\n')
+            await writer.drain()
+        writer.close()
+
+    def _store(self, recipients, data: bytes) -> None:
+        self.message_count += 1
+        self.recipient_count += len(recipients)
+        if self.keep:
+            self.messages.append((recipients, data.decode('utf-8', errors='replace')))
+            del self.messages[:-self.keep]
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def start(self) -> 'SMTPSink':
+        """Serve from a background thread; returns once the port is bound."""
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self.serve())
+        self._thread = threading.Thread(target=self._loop.run_forever, name='smtp-sink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
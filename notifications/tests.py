@@ -0,0 +1,155 @@
+import smtplib
+from datetime import date, timedelta
+
+from django.test import TestCase, override_settings
+
+from catalog.models import Category, Product
+from core.models import User
+from .mailer import BatchTemplates, Mailer
+from .marketing import send_campaign
+from .models import CampaignProgress, Notification
+from .outbox import queue_order_notifications, send_due_notifications
+from .smtp_sink import SMTPSink
+
+
+class SMTPSinkTestCase(TestCase):
+    """Runs every test against a local SMTP stand-in through Django's SMTP backend."""
+
+    def setUp(self):
+        self.sink = SMTPSink().start()
+        self.addCleanup(self.sink.stop)
+        settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST=self.sink.host, EMAIL_PORT=self.sink.port, EMAIL_USE_TLS=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class OutboxTests(SMTPSinkTestCase):
+    def _order(self, order_id):
+        return {
+            'id': order_id, 'ordered_at': '2026-01-01T10:00:00', 'total': 250.0, 'paid': True,
+            'arrival_date': (date.today() + timedelta(days=7)).isoformat(),
+            'items': [{'product_id': 1, 'name': 'Cardamom', 'quantity': 2, 'price': 125.0, 'line_total': 250.0}],
+        }
+
+    def test_due_notifications_share_one_connection(self):
+        user = User.objects.create_user(username='buyer', email='buyer@example.com', password='x')
+        for order_id in range(5):
+            queue_order_notifications(user, self._order(order_id))
+
+        with Mailer(rate=0) as mailer:
+            sent = send_due_notifications(mailer, batch_size=2)
+
+        # Only the confirmations are due; the ETA mails wait for the day before arrival
+        self.assertEqual(sent, 5)
+        self.assertEqual(self.sink.message_count, 5)
+        self.assertEqual(self.sink.connection_count, 1)
+        self.assertIn('Cardamom', self.sink.messages[0][1])
+        self.assertEqual(Notification.objects.filter(sent_at__isnull=True, kind=Notification.SHIPPING_ETA).count(), 5)
+
+    def test_users_without_email_are_not_retried(self):
+        user = User.objects.create_user(username='no-mail', password='x')
+        queue_order_notifications(user, self._order(1))
+        with Mailer(rate=0) as mailer:
+            self.assertEqual(send_due_notifications(mailer), 0)
+        with Mailer(rate=0) as mailer:
+            self.assertEqual(send_due_notifications(mailer), 0)
+        self.assertEqual(self.sink.message_count, 0)
+
+
+class PlainTextEscapingTests(TestCase):
+    """Subjects and text bodies are text/plain; HTML escaping would show up literally."""
+
+    def setUp(self):
+        self.user = User(username='dsouza', first_name="D'Souza")
+
+    def test_order_confirmation(self):
+        order = {
+            'id': 7, 'total': 120.0, 'arrival_date': '2026-01-08',
+            'items': [{'name': 'Salt & Pepper', 'quantity': 1, 'line_total': 120.0}],
+        }
+        subject, text, html = BatchTemplates('order_confirmation').render({'user': self.user, 'order': order})
+        self.assertIn("Hi D'Souza,", text)
+        self.assertIn('1 × Salt & Pepper', text)
+        self.assertNotIn('&amp;', text)
+        self.assertIsNone(html)
+
+    def test_abandoned_cart_subject(self):
+        cart = {'items': [{'name': 'Salt & Pepper', 'quantity': 1, 'line_total': 1}], 'item_count': 1, 'total': 1}
+        subject, text, _ = BatchTemplates('abandoned_cart').render({'user': self.user, 'cart': cart})
+        self.assertEqual(subject, 'Salt & Pepper is still in your cart')
+        self.assertIn("Hi D'Souza,", text)
+
+    def test_wishlist_alerts(self):
+        product = Product(name="Kashmiri Mirch & Methi")
+        alert = {'product': product, 'kind': 'price_drop', 'new_price': 90, 'old_price': 100}
+        _, text, _ = BatchTemplates('wishlist_alerts').render({'user': self.user, 'alerts': [alert]})
+        self.assertIn('Kashmiri Mirch & Methi: now ₹90 (was ₹100)', text)
+
+    def test_html_parts_are_still_escaped(self):
+        product = Product(name='Salt & Pepper', mrp=100, sale_price=90)
+        _, text, html = BatchTemplates('marketing_newsletter').render({'products': [product]})
+        self.assertIn('Salt & Pepper', text)
+        self.assertIn('Salt &amp; Pepper', html)
+
+
+class FailingMailer(Mailer):
+    """Delivers the first fail_after batches, then raises like a dropped SMTP server."""
+
+    def __init__(self, fail_after, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def send(self, messages):
+        if not self.fail_after:
+            raise smtplib.SMTPException('451 try again later')
+        self.fail_after -= 1
+        return super().send(messages)
+
+
+class MarketingTests(SMTPSinkTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.first()
+        Product.objects.create(name='Saffron', slug='saffron', category=category, mrp=500, sale_price=450)
+        for i in range(7):
+            User.objects.create_user(
+                username=f'user-{i}', email=f'user-{i}@example.com', first_name=f'Name{i}',
+                marketing_opt_in=i != 0,
+            )
+
+    def recipients(self):
+        return sorted(data.split('To: ', 1)[1].split('\n', 1)[0].strip() for _, data in self.sink.messages)
+
+    def test_campaign_reaches_opted_in_users_in_batches(self):
+        with Mailer(rate=0) as mailer:
+            sent = send_campaign('marketing_newsletter', mailer, batch_size=4)
+
+        self.assertEqual(sent, 6)
+        self.assertEqual(self.sink.message_count, 6)
+        self.assertEqual(self.sink.connection_count, 1)
+        bodies = '\n'.join(data for _, data in self.sink.messages)
+        self.assertIn('Hi Name6,', bodies)
+        self.assertNotIn('Name0', bodies)
+        self.assertIn('Saffron', bodies)
+        self.assertFalse(CampaignProgress.objects.exists())
+
+    def test_a_failed_campaign_resumes_after_the_last_batch_sent(self):
+        with self.assertRaises(smtplib.SMTPException):
+            with FailingMailer(fail_after=1, rate=0) as mailer:
+                send_campaign('marketing_newsletter', mailer, batch_size=2)
+        self.assertEqual(self.sink.message_count, 2)
+        self.assertEqual(CampaignProgress.objects.get(name='marketing_newsletter').sent, 2)
+
+        with Mailer(rate=0) as mailer:
+            self.assertEqual(send_campaign('marketing_newsletter', mailer, batch_size=2), 4)
+        self.assertEqual(self.recipients(), [f'user-{i}@example.com' for i in range(1, 7)])
+        self.assertFalse(CampaignProgress.objects.exists())
+
+    def test_restart_mails_everyone_again(self):
+        with Mailer(rate=0) as mailer:
+            send_campaign('marketing_newsletter', mailer, batch_size=2, limit=2)
+            self.assertEqual(send_campaign('marketing_newsletter', mailer, batch_size=2, restart=True), 6)
+        self.assertEqual(self.sink.message_count, 8)
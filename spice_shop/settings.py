@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,25 +43,39 @@ INSTALLED_APPS = [
     'catalog',
     'inventory',
     'cart',
+    'notifications',
+    'analytics',
 ]
 
 MIDDLEWARE = [
+    # First, so its wall time covers the rest of the stack
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.SlowRequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Before SessionMiddleware, so it sees the saved session's key on the way out
+    'cart.middleware.BadgeCookieMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # After session/CSRF/auth/messages so hits still get their CSRF cookie
+    'core.middleware.AnonymousPageCacheMiddleware',
+    'core.middleware.QueryInspectionMiddleware',
 ]
 
 ROOT_URLCONF = 'spice_shop.urls'
 
+# The cached loader is configured explicitly so a deployment that inherits
+# DEBUG = True still keeps compiled templates in memory (runserver's autoreloader
+# resets it when a template changes). APP_DIRS must be off when loaders are set;
+# app_directories covers the same templates.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to the request metrics
+        'BACKEND': 'core.template_backend.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
@@ -69,27 +84,116 @@ TEMPLATES = [
                 'core.context_processors.nav_categories',
                 'cart.context_processors.cart_summary',
             ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Compile every project template in AppConfig.ready so a fresh worker's first
+# request doesn't pay for parsing (see core.template_warmup)
+WARM_TEMPLATES = os.environ.get('SPICE_SHOP_WARM_TEMPLATES', '0' if DEBUG else '1') == '1'
+
 WSGI_APPLICATION = 'spice_shop.wsgi.application'
 
+# Route catalog, cart and wishlist URLs to their async views. spice_shop/asgi.py turns
+# this on; under WSGI the sync views are used so requests don't hop through an event loop.
+ASYNC_VIEWS = os.environ.get('SPICE_SHOP_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Production tuning: WAL lets readers run alongside the single writer, NORMAL
+# sync is safe under WAL and skips an fsync per commit. journal_mode=WAL is
+# stored in the database file, so it is only applied when SPICE_SHOP_SQLITE_TUNING
+# is set (gunicorn.conf.py sets it); manage.py runs leave the tracked db.sqlite3 alone.
+SQLITE_TUNING_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+]
+SQLITE_TUNING = os.environ.get('SPICE_SHOP_SQLITE_TUNING') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN so writers queue on the busy timeout
+            # instead of failing when a read transaction upgrades to a write.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
+if SQLITE_TUNING:
+    DATABASES['default']['OPTIONS']['init_command'] = ';'.join(SQLITE_TUNING_PRAGMAS) + ';'
+
+# Shared by every worker process: the catalog version, page and facet caches,
+# auth throttles and idempotency keys must agree across gunicorn workers and
+# outlive restarts, which a per-process LocMemCache can't do. Redis when
+# SPICE_SHOP_REDIS_URL is set; otherwise a table in the main database (created
+# by core's migrations), whose add() is atomic under IMMEDIATE transactions.
+if os.environ.get('SPICE_SHOP_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['SPICE_SHOP_REDIS_URL'],
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'spice_shop_cache',
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        },
+    }
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Preferred hasher first: argon2 when argon2-cffi is installed, else scrypt. Both
+# are memory-hard and cheaper per login than PBKDF2 at Django's default cost.
+# Older hashes still verify and are rehashed with the first entry on login.
+try:
+    import argon2  # noqa: F401
+    _PREFERRED_HASHER = 'django.contrib.auth.hashers.Argon2PasswordHasher'
+except ImportError:
+    _PREFERRED_HASHER = 'django.contrib.auth.hashers.ScryptPasswordHasher'
+_PREFERRED_HASHER = os.environ.get('PASSWORD_HASHER', _PREFERRED_HASHER)
+
+PASSWORD_HASHERS = [_PREFERRED_HASHER] + [
+    hasher for hasher in (
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    )
+    if hasher != _PREFERRED_HASHER
+]
+
+# Sliding-window limits on auth attempts: scope -> (attempts, period in seconds)
+AUTH_THROTTLE = {
+    'login_ip': (30, 300),
+    'login_username': (10, 300),
+    'signup_ip': (10, 3600),
+}
+
+# Reverse proxies (addresses or CIDR ranges) in front of the app, and the META
+# header they put the client address in (e.g. HTTP_X_FORWARDED_FOR). The per-IP
+# throttles read the client from that header only when REMOTE_ADDR is one of them.
+TRUSTED_PROXIES = [proxy for proxy in os.environ.get('SPICE_SHOP_TRUSTED_PROXIES', '').split(',') if proxy]
+CLIENT_IP_HEADER = os.environ.get('SPICE_SHOP_CLIENT_IP_HEADER', 'HTTP_X_FORWARDED_FOR')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -132,8 +236,71 @@ LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'accounts:profile'
 LOGOUT_REDIRECT_URL = 'home'
 
-# Email (console backend for development)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Request metrics: scrapers send "Authorization: Bearer <METRICS_TOKEN>" to read
+# /metrics/ without a staff login; empty means staff only. Not an IP allow-list:
+# behind a reverse proxy on the same host every request comes from loopback.
+METRICS_TOKEN = os.environ.get('SPICE_SHOP_METRICS_TOKEN', '')
+
+# Slow-request profiler: stack-sample SAMPLE_RATE of requests, store those over THRESHOLD_MS
+SLOW_REQUEST_PROFILER = {
+    'THRESHOLD_MS': 500,
+    'SAMPLE_RATE': 0.05,
+    'INTERVAL_MS': 5,
+}
+
+# Full-page cache for anonymous catalog pages (see core.page_cache)
+PAGE_CACHE = {
+    # Benchmarks turn it off so they time the views rather than cache hits
+    'ENABLED': os.environ.get('SPICE_SHOP_PAGE_CACHE', '1') == '1',
+    'VIEWS': ['home', 'catalog:product_list', 'catalog:product_detail'],
+    'TIMEOUT': 300,
+}
+
+# N+1 query detector (development/staging only)
+QUERY_INSPECTION = {
+    'ENABLED': DEBUG,
+    'THRESHOLD': 3,
+    'RAISE': False,
+}
+
+# Email (console backend for development). Point EMAIL_BACKEND at
+# django.core.mail.backends.smtp.EmailBackend and EMAIL_PORT at a running
+# `manage.py smtp_sink` to exercise the real SMTP path locally.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Masala Story <no-reply@localhost>')
+
+# Outbound notification batching (see notifications.mailer)
+NOTIFICATIONS = {
+    'BATCH_SIZE': 500,
+    # Messages per second across the pooled SMTP connection; 0 disables throttling
+    'RATE_PER_SECOND': 50,
+    'MAX_ATTEMPTS': 5,
+}
+
+# Sitemaps and merchant feeds (catalog.feeds); shards are cached gzipped under CACHE_DIR
+FEEDS = {
+    'BASE_URL': os.environ.get('SPICE_SHOP_BASE_URL', 'http://localhost:8000'),
+    'CACHE_DIR': BASE_DIR / 'feed_cache',
+    'SHARD_SIZE': 50000,
+}
+
+# Abandoned-cart reminders (cart.abandoned, run by find_abandoned_carts)
+ABANDONED_CARTS = {
+    'IDLE_HOURS': 24,
+    'LOOKBACK_HOURS': 72,
+    'BATCH_SIZE': 500,
+}
+
+# Replenishment forecast (inventory.forecast, run by forecast_stock)
+STOCK_FORECAST = {
+    'WINDOW_DAYS': 365,
+    'HALF_LIFE_DAYS': 28,
+    'LEAD_TIME_DAYS': 14,
+    'COVER_DAYS': 30,
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
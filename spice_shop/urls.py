@@ -16,17 +16,27 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from core.views import home, contact
+from core.views import home, contact, metrics, metrics_dashboard
+from catalog import feed_views
 from django.conf import settings
 from django.conf.urls.static import static
 
+if settings.ASYNC_VIEWS:
+    from core.async_views import home  # noqa: F811
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include(('accounts.urls', 'accounts'), namespace='accounts')),
     path('products/', include(('catalog.urls', 'catalog'), namespace='catalog')),
     path('cart/', include(('cart.urls', 'cart'), namespace='cart')),
+    path('analytics/', include(('analytics.urls', 'analytics'), namespace='analytics')),
     path('', home, name='home'),
     path('contact/', contact, name='contact'),
+    path('metrics/', metrics, name='metrics'),
+    path('metrics/dashboard/', metrics_dashboard, name='metrics_dashboard'),
+    path('sitemap.xml', feed_views.sitemap_index, name='sitemap_index'),
+    path('sitemap-products-<int:shard>.xml', feed_views.sitemap_shard, name='sitemap_shard'),
+    path('feeds/merchant.<str:extension>', feed_views.merchant_feed, name='merchant_feed'),
 ]
 
 if settings.DEBUG:
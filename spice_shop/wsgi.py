@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'spice_shop.settings')
 
 application = get_wsgi_application()
+
+# Set by gunicorn.conf.py (preload_app): warm caches once in the master before it forks
+if os.environ.get('SPICE_SHOP_PRELOAD') == '1':
+    from core.preload import warm
+
+    warm()